@@ -14,17 +14,17 @@ import asyncio
 import logging
 import re
 from datetime import datetime, timezone
-from playwright.async_api import async_playwright
+from browser_pool import get_browser_pool, close_browser_pool
+from readiness import ReadinessProbes
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class AdditionalMetricsExtractor:
     """Extracteur pour les métriques supplémentaires des boutiques"""
     
-    def __init__(self):
+    def __init__(self, readiness: ReadinessProbes = None):
         self.timeout = 30000  # 30 secondes
+        self.readiness = readiness or ReadinessProbes()
     
     def parse_int(self, s):
         """Parse un entier depuis une chaîne"""
@@ -56,135 +56,22 @@ class AdditionalMetricsExtractor:
         except:
             return None
     
-    async def extract_additional_metrics(self, shop_url):
+    async def extract_additional_metrics(self, shop_url, page=None):
         """
         Extrait les métriques supplémentaires d'une boutique
+
+        Si `page` est fourni, l'extraction se fait sur cette page, sinon une
+        page est empruntée au pool de navigateurs partagé.
         """
         logger.info(f"🔍 Extraction des métriques supplémentaires pour: {shop_url}")
         
         try:
-            async with async_playwright() as p:
-                # Lancer le navigateur
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=['--no-sandbox', '--disable-setuid-sandbox']
-                )
-                
-                context = await browser.new_context(
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                )
-                
-                page = await context.new_page()
-                
-                # Aller sur la page de la boutique
-                await page.goto(shop_url, timeout=self.timeout)
-                await page.wait_for_load_state('networkidle', timeout=10000)  # Timeout réduit à 10s
-                
-                # Initialiser les résultats
-                metrics = {
-                    "total_products": None,
-                    "pixel_google": None,
-                    "pixel_facebook": None,
-                    "aov": None,
-                    "extracted_at": datetime.now(timezone.utc).isoformat()
-                }
-                
-                # 1. Extraire le nombre total de produits
-                try:
-                    # Chercher des sélecteurs communs pour le nombre de produits
-                    product_selectors = [
-                        '[data-testid*="product"]',
-                        '.product-count',
-                        '.total-products',
-                        '[class*="product"][class*="count"]',
-                        'span:contains("products")',
-                        'div:contains("items")'
-                    ]
-                    
-                    for selector in product_selectors:
-                        try:
-                            element = await page.query_selector(selector)
-                            if element:
-                                text = await element.text_content()
-                                if text:
-                                    # Extraire les nombres du texte
-                                    numbers = re.findall(r'\d+', text)
-                                    if numbers:
-                                        metrics["total_products"] = self.parse_int(numbers[0])
-                                        logger.info(f"✅ Total products trouvé: {metrics['total_products']}")
-                                        break
-                        except:
-                            continue
-                except Exception as e:
-                    logger.warning(f"⚠️ Erreur extraction total_products: {e}")
-                
-                # 2. Détecter les pixels Google Analytics et Facebook
-                try:
-                    # Vérifier la présence de Google Analytics
-                    google_scripts = await page.query_selector_all('script[src*="google-analytics"], script[src*="gtag"]')
-                    if google_scripts:
-                        metrics["pixel_google"] = 1
-                        logger.info("✅ Pixel Google détecté")
-                    else:
-                        # Vérifier aussi dans le contenu des scripts
-                        page_content = await page.content()
-                        if 'gtag' in page_content or 'google-analytics' in page_content:
-                            metrics["pixel_google"] = 1
-                            logger.info("✅ Pixel Google détecté dans le contenu")
-                        else:
-                            metrics["pixel_google"] = 0
-                    
-                    # Vérifier la présence de Facebook Pixel
-                    facebook_scripts = await page.query_selector_all('script[src*="facebook"]')
-                    if facebook_scripts:
-                        metrics["pixel_facebook"] = 1
-                        logger.info("✅ Pixel Facebook détecté")
-                    else:
-                        # Vérifier aussi dans le contenu des scripts
-                        if 'fbq' in page_content or 'facebook' in page_content:
-                            metrics["pixel_facebook"] = 1
-                            logger.info("✅ Pixel Facebook détecté dans le contenu")
-                        else:
-                            metrics["pixel_facebook"] = 0
-                        
-                except Exception as e:
-                    logger.warning(f"⚠️ Erreur détection pixels: {e}")
-                    metrics["pixel_google"] = 0
-                    metrics["pixel_facebook"] = 0
-                
-                # 3. Extraire l'AOV (Average Order Value)
-                try:
-                    # Chercher des sélecteurs communs pour l'AOV
-                    aov_selectors = [
-                        '[data-testid*="aov"]',
-                        '[class*="aov"]',
-                        '[class*="order-value"]',
-                        'span:contains("AOV")',
-                        'div:contains("average order")',
-                        'span:contains("$")'
-                    ]
-                    
-                    for selector in aov_selectors:
-                        try:
-                            element = await page.query_selector(selector)
-                            if element:
-                                text = await element.text_content()
-                                if text and '$' in text:
-                                    # Extraire les nombres avec le symbole $
-                                    numbers = re.findall(r'\$?(\d+(?:\.\d+)?)', text)
-                                    if numbers:
-                                        metrics["aov"] = self.parse_float(numbers[0])
-                                        logger.info(f"✅ AOV trouvé: {metrics['aov']}")
-                                        break
-                        except:
-                            continue
-                except Exception as e:
-                    logger.warning(f"⚠️ Erreur extraction AOV: {e}")
-                
-                await browser.close()
-                
-                logger.info(f"✅ Métriques extraites: {json.dumps(metrics, indent=2)}")
-                return metrics
+            if page is not None:
+                return await self.extract_from_page(page, shop_url)
+            
+            # Page fournie par le pool partagé (navigateur réutilisé entre boutiques)
+            async with get_browser_pool().page() as page:
+                return await self.extract_from_page(page, shop_url)
                 
         except Exception as e:
             logger.error(f"❌ Erreur extraction métriques supplémentaires: {e}")
@@ -197,12 +84,128 @@ class AdditionalMetricsExtractor:
                 "error": str(e)
             }
 
+    async def extract_from_page(self, page, shop_url):
+        """
+        Navigue sur la boutique et extrait produits, pixels et AOV
+        """
+        # Aller sur la page de la boutique
+        await page.goto(shop_url, timeout=self.timeout)
+        # DOM stable (au plus 10s) : networkidle n'est jamais atteint sur les boutiques chargées en trackers
+        await self.readiness.dom_quiet(page, 'additional_metrics:stable', deadline=10, quiet=0.5)
+        
+        # Initialiser les résultats
+        metrics = {
+            "total_products": None,
+            "pixel_google": None,
+            "pixel_facebook": None,
+            "aov": None,
+            "extracted_at": datetime.now(timezone.utc).isoformat()
+        }
+        
+        # 1. Extraire le nombre total de produits
+        try:
+            # Chercher des sélecteurs communs pour le nombre de produits
+            product_selectors = [
+                '[data-testid*="product"]',
+                '.product-count',
+                '.total-products',
+                '[class*="product"][class*="count"]',
+                'span:contains("products")',
+                'div:contains("items")'
+            ]
+            
+            for selector in product_selectors:
+                try:
+                    element = await page.query_selector(selector)
+                    if element:
+                        text = await element.text_content()
+                        if text:
+                            # Extraire les nombres du texte
+                            numbers = re.findall(r'\d+', text)
+                            if numbers:
+                                metrics["total_products"] = self.parse_int(numbers[0])
+                                logger.info(f"✅ Total products trouvé: {metrics['total_products']}")
+                                break
+                except:
+                    continue
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur extraction total_products: {e}")
+        
+        # 2. Détecter les pixels Google Analytics et Facebook
+        try:
+            # Vérifier la présence de Google Analytics
+            google_scripts = await page.query_selector_all('script[src*="google-analytics"], script[src*="gtag"]')
+            if google_scripts:
+                metrics["pixel_google"] = 1
+                logger.info("✅ Pixel Google détecté")
+            else:
+                # Vérifier aussi dans le contenu des scripts
+                page_content = await page.content()
+                if 'gtag' in page_content or 'google-analytics' in page_content:
+                    metrics["pixel_google"] = 1
+                    logger.info("✅ Pixel Google détecté dans le contenu")
+                else:
+                    metrics["pixel_google"] = 0
+            
+            # Vérifier la présence de Facebook Pixel
+            facebook_scripts = await page.query_selector_all('script[src*="facebook"]')
+            if facebook_scripts:
+                metrics["pixel_facebook"] = 1
+                logger.info("✅ Pixel Facebook détecté")
+            else:
+                # Vérifier aussi dans le contenu des scripts
+                if 'fbq' in page_content or 'facebook' in page_content:
+                    metrics["pixel_facebook"] = 1
+                    logger.info("✅ Pixel Facebook détecté dans le contenu")
+                else:
+                    metrics["pixel_facebook"] = 0
+        
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur détection pixels: {e}")
+            metrics["pixel_google"] = 0
+            metrics["pixel_facebook"] = 0
+        
+        # 3. Extraire l'AOV (Average Order Value)
+        try:
+            # Chercher des sélecteurs communs pour l'AOV
+            aov_selectors = [
+                '[data-testid*="aov"]',
+                '[class*="aov"]',
+                '[class*="order-value"]',
+                'span:contains("AOV")',
+                'div:contains("average order")',
+                'span:contains("$")'
+            ]
+            
+            for selector in aov_selectors:
+                try:
+                    element = await page.query_selector(selector)
+                    if element:
+                        text = await element.text_content()
+                        if text and '$' in text:
+                            # Extraire les nombres avec le symbole $
+                            numbers = re.findall(r'\$?(\d+(?:\.\d+)?)', text)
+                            if numbers:
+                                metrics["aov"] = self.parse_float(numbers[0])
+                                logger.info(f"✅ AOV trouvé: {metrics['aov']}")
+                                break
+                except:
+                    continue
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur extraction AOV: {e}")
+        
+        logger.info(f"✅ Métriques extraites: {json.dumps(metrics, indent=2)}")
+        return metrics
+
 async def main():
     """Fonction principale pour tester l'extracteur"""
     if len(sys.argv) < 2:
         print("Usage: python3 additional_metrics_extractor.py <shop_url>")
         sys.exit(1)
     
+    # Configuration du logging (uniquement en mode CLI)
+    logging.basicConfig(level=logging.INFO)
+    
     shop_url = sys.argv[1]
     extractor = AdditionalMetricsExtractor()
     
@@ -212,6 +215,8 @@ async def main():
     except Exception as e:
         print(f"❌ Erreur: {e}")
         sys.exit(1)
+    finally:
+        await close_browser_pool()
 
 if __name__ == "__main__":
     asyncio.run(main())
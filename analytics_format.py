@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Formatage des données d'une boutique pour l'API (ligne de la table analytics)
+Sans dépendance navigateur : le scraper l'appelle et les tests vérifient que
+chaque métrique suivie par la fraîcheur est bien une colonne écrite.
+"""
+
+from typing import Dict
+
+# Colonnes écrites dans analytics, dans l'ordre de l'API
+ANALYTICS_FIELDS = (
+    'organic_traffic', 'bounce_rate', 'average_visit_duration', 'branded_traffic',
+    'conversion_rate', 'paid_search_traffic', 'traffic', 'percent_branded_traffic', 'visits',
+    # NOUVEAUX CHAMPS
+    'total_products', 'pixel_google', 'pixel_facebook', 'aov',
+    'market_us', 'market_uk', 'market_de', 'market_ca', 'market_au', 'market_fr', 'cpc',
+)
+
+# Clés de session_data['data']['domain_overview'] -> colonnes analytics
+OVERVIEW_FIELDS = {
+    'organic_traffic': 'organic_search_traffic',
+    'paid_search_traffic': 'paid_search_traffic',
+    'bounce_rate': 'bounce_rate',
+    'average_visit_duration': 'avg_visit_duration',
+    'traffic': 'traffic',
+    'branded_traffic': 'branded_traffic',
+    'conversion_rate': 'conversion_rate',
+    # NOUVEAUX CHAMPS - Récupération des métriques supplémentaires
+    'total_products': 'total_products',
+    'pixel_google': 'pixel_google',
+    'pixel_facebook': 'pixel_facebook',
+    'aov': 'aov',
+    'market_us': 'market_us',
+    'market_uk': 'market_uk',
+    'market_de': 'market_de',
+    'market_ca': 'market_ca',
+    'market_au': 'market_au',
+    'market_fr': 'market_fr',
+    'cpc': 'cpc',
+}
+
+# Métriques supplémentaires portées par les attributs du scraper
+EXTRA_METRICS = (
+    'total_products', 'pixel_google', 'pixel_facebook', 'aov', 'cpc',
+    'market_us', 'market_uk', 'market_de', 'market_ca', 'market_au', 'market_fr',
+)
+
+
+def format_analytics(session_data: Dict, extra: Dict) -> Dict[str, str]:
+    """
+    Ligne analytics à partir des données de session et des métriques
+    supplémentaires (valeurs non vides de `extra` prioritaires).
+    percent_branded_traffic reste vide : il est calculé par le scraper.
+    """
+    analytics_data = {field: "" for field in ANALYTICS_FIELDS}
+    data = session_data.get('data', {})
+
+    # Récupérer les données de domain_overview
+    if 'domain_overview' in data:
+        domain_data = data['domain_overview']
+        for field, key in OVERVIEW_FIELDS.items():
+            analytics_data[field] = domain_data.get(key, '')
+
+    # Récupérer les données de traffic_analysis (visits)
+    if 'traffic_analysis' in data:
+        analytics_data['visits'] = data['traffic_analysis'].get('visits', '')
+
+    # Récupérer les nouvelles métriques depuis les attributs du scraper
+    for metric in EXTRA_METRICS:
+        value = extra.get(metric, '')
+        if value:
+            analytics_data[metric] = str(value)
+
+    return analytics_data
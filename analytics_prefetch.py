@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Pré-chargement groupé des analytics existantes (scraper intelligent)
+Une requête `WHERE shop_id IN (...)` par lot de boutiques au lieu d'un
+api.get_shop_analytics() par boutique, exécutée hors de la boucle asyncio.
+Seules les colonnes écrites par le scraper (ANALYTICS_FIELDS) sont lues ;
+au premier lot, les lignes obtenues sont comparées à api.get_shop_analytics()
+et, au moindre écart, le pré-chargement repasse par l'API boutique par boutique.
+Le résultat est gardé dans un dict compact (valeurs non vides uniquement),
+invalidé quand le worker réécrit une boutique.
+"""
+
+import asyncio
+import logging
+import sqlite3
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from analytics_format import ANALYTICS_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Table des analytics (une ligne par boutique, la plus récente l'emporte)
+ANALYTICS_TABLE = "analytics"
+ANALYTICS_KEY_COLUMN = "shop_id"
+
+# Colonnes lues : celles que le scraper écrit puis relit pour décider quoi sauter
+ANALYTICS_COLUMNS = ANALYTICS_FIELDS
+
+# SQLite limite le nombre de paramètres par requête (999 sur les anciennes versions)
+MAX_IN_PARAMS = 500
+
+# Boutiques comparées à api.get_shop_analytics() au premier lot
+PARITY_SAMPLES = 3
+
+
+def non_empty(row: Optional[Dict], columns: Iterable[str] = ANALYTICS_COLUMNS) -> Dict[str, str]:
+    """Valeurs non vides des colonnes suivies, en texte (comparaison base / API)"""
+    row = row or {}
+    return {column: str(row[column]) for column in columns if row.get(column) not in (None, '')}
+
+
+def load_analytics_bulk(db_path: str, shop_ids: Iterable[int], table: str = ANALYTICS_TABLE,
+                        key_column: str = ANALYTICS_KEY_COLUMN,
+                        columns: Tuple[str, ...] = ANALYTICS_COLUMNS) -> Dict[int, Dict]:
+    """Lit les analytics de plusieurs boutiques en une requête par tranche de MAX_IN_PARAMS"""
+    shop_ids = list(dict.fromkeys(shop_ids))
+    analytics: Dict[int, Dict] = {}
+    selected = ", ".join(f'"{column}"' for column in (key_column,) + tuple(columns))
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        for start in range(0, len(shop_ids), MAX_IN_PARAMS):
+            chunk = shop_ids[start:start + MAX_IN_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT {selected} FROM {table} WHERE {key_column} IN ({placeholders}) ORDER BY rowid",
+                chunk
+            ).fetchall()
+            for row in rows:
+                analytics[row[key_column]] = {
+                    column: row[column] for column in columns if row[column] not in (None, '')
+                }
+    finally:
+        conn.close()
+    return analytics
+
+
+class AnalyticsPrefetcher:
+    """Cache en mémoire des analytics existantes, rempli par lots"""
+
+    def __init__(self, db_path: Optional[str], fallback: Optional[Callable[[int], Dict]] = None,
+                 table: str = ANALYTICS_TABLE, key_column: str = ANALYTICS_KEY_COLUMN,
+                 columns: Tuple[str, ...] = ANALYTICS_COLUMNS):
+        self.db_path = db_path
+        self.fallback = fallback
+        self.table = table
+        self.key_column = key_column
+        self.columns = tuple(columns)
+        self.analytics: Dict[int, Dict] = {}
+        # Parité avec l'API vérifiée au premier lot ; désactivé au premier écart
+        self.bulk_enabled = True
+        self.parity_checked = False
+        self.stats = {'bulk_queries': 0, 'hits': 0, 'misses': 0, 'parity_mismatches': 0}
+
+    async def _fallback_load(self, shop_ids):
+        """Lecture boutique par boutique (hors boucle asyncio) si la lecture groupée échoue"""
+        for shop_id in shop_ids:
+            self.analytics[shop_id] = await asyncio.to_thread(self.fallback, shop_id) or {}
+
+    async def _check_parity(self, loaded: Dict[int, Dict], shop_ids: List[int]) -> bool:
+        """Compare quelques lignes groupées à api.get_shop_analytics() (valeurs non vides)"""
+        self.parity_checked = True
+        samples = [shop_id for shop_id in shop_ids if loaded.get(shop_id)][:PARITY_SAMPLES] or shop_ids[:1]
+        for shop_id in samples:
+            expected = non_empty(await asyncio.to_thread(self.fallback, shop_id), self.columns)
+            found = non_empty(loaded.get(shop_id), self.columns)
+            if found != expected:
+                self.stats['parity_mismatches'] += 1
+                differing = sorted(k for k in set(found) | set(expected) if found.get(k) != expected.get(k))
+                logger.warning(f"⚠️ Analytics pré-chargées différentes de l'API pour la boutique {shop_id} "
+                               f"({', '.join(differing)}) - lecture par boutique via l'API")
+                return False
+        return True
+
+    async def prefetch(self, shop_ids: Iterable[int]):
+        """Charge les analytics d'un lot de boutiques pas encore en cache"""
+        missing = [shop_id for shop_id in shop_ids if shop_id not in self.analytics]
+        if not missing:
+            return
+
+        if self.bulk_enabled:
+            try:
+                if not self.db_path:
+                    raise RuntimeError("chemin de base de données inconnu")
+                loaded = await asyncio.to_thread(load_analytics_bulk, self.db_path, missing, self.table,
+                                                 self.key_column, self.columns)
+                self.stats['bulk_queries'] += 1
+                if self.fallback and not self.parity_checked:
+                    self.bulk_enabled = await self._check_parity(loaded, missing)
+                if self.bulk_enabled:
+                    for shop_id in missing:
+                        self.analytics[shop_id] = loaded.get(shop_id, {})
+                    logger.info(f"📚 Analytics pré-chargées pour {len(missing)} boutiques ({len(loaded)} existantes)")
+                    return
+            except Exception as e:
+                logger.warning(f"⚠️ Pré-chargement groupé des analytics impossible ({e}) - lecture par boutique")
+
+        if self.fallback:
+            await self._fallback_load(missing)
+
+    async def get(self, shop_id: int) -> Dict:
+        """Analytics existantes d'une boutique (depuis le cache si possible)"""
+        if shop_id in self.analytics:
+            self.stats['hits'] += 1
+            return self.analytics[shop_id]
+        self.stats['misses'] += 1
+        await self.prefetch([shop_id])
+        return self.analytics.get(shop_id, {})
+
+    def invalidate(self, shop_id: int):
+        """À appeler après chaque écriture des analytics de la boutique"""
+        self.analytics.pop(shop_id, None)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Barrière d'authentification entre workers (remplace le LockManager à scrutation)
+Le Worker 0 ouvre la barrière (begin) en prenant un verrou fcntl exclusif,
+s'authentifie, écrit le résultat (succès / échec) puis relâche le verrou
+(finish). Les autres workers attendent ce résultat :
+- même processus : asyncio.Event, réveil immédiat ;
+- autre processus : un thread démon bloqué sur un verrou fcntl partagé est
+  réveillé par le système dès que le verrou exclusif est relâché.
+Seul l'intervalle avant que le Worker 0 n'ouvre la barrière (état 'pending',
+navigateur en cours de configuration) est surveillé par courte relecture.
+Si le Worker 0 meurt en cours d'authentification, son verrou disparaît avec
+lui : les workers en attente le voient et reçoivent un échec.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCESS = 'success'
+FAILED = 'failed'
+TIMEOUT = 'timeout'
+
+PENDING_POLL = 0.2  # secondes, seulement avant l'ouverture de la barrière
+
+# Réveil dans le processus, par fichier de barrière
+_LOCAL_EVENTS: Dict[str, asyncio.Event] = {}
+
+
+class AuthBarrier:
+    """Barrière à un meneur (Worker 0) : verrou fcntl + état JSON, asyncio.Event dans le processus"""
+
+    def __init__(self, lock_dir: str = "locks", name: str = "auth_barrier"):
+        self.lock_dir = Path(lock_dir)
+        self.lock_dir.mkdir(exist_ok=True)
+        self.lock_path = self.lock_dir / f"{name}.lock"
+        self.state_path = self.lock_dir / f"{name}.json"
+        self.key = str(self.lock_path.resolve())
+        self._leader_fd: Optional[int] = None
+
+    def _local_event(self) -> asyncio.Event:
+        if self.key not in _LOCAL_EVENTS:
+            _LOCAL_EVENTS[self.key] = asyncio.Event()
+        return _LOCAL_EVENTS[self.key]
+
+    def _write(self, status: str, error: str = ""):
+        """Écriture atomique de l'état (le verrou reste sur un fichier séparé, stable)"""
+        tmp_path = self.state_path.with_name(self.state_path.name + f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps({'status': status, 'error': error, 'pid': os.getpid(),
+                                        'updated_at': time.time()}))
+        os.replace(tmp_path, self.state_path)
+
+    def read(self) -> Dict:
+        """État courant ({status, error, pid, updated_at}) ; pending si absent"""
+        try:
+            return json.loads(self.state_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {'status': PENDING, 'error': ''}
+
+    def reset(self):
+        """Début de run (processus principal) : barrière fermée, résultat précédent oublié"""
+        self._write(PENDING)
+        _LOCAL_EVENTS.pop(self.key, None)
+
+    async def begin(self):
+        """Meneur : prend le verrou exclusif et passe l'état à 'running'"""
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        await asyncio.to_thread(fcntl.flock, fd, fcntl.LOCK_EX)
+        self._leader_fd = fd
+        self._local_event().clear()
+        self._write(RUNNING)
+
+    def finish(self, success: bool, error: str = ""):
+        """Meneur : publie le résultat, relâche le verrou (réveil inter-processus) puis l'Event local"""
+        self._write(SUCCESS if success else FAILED, error)
+        if self._leader_fd is not None:
+            fcntl.flock(self._leader_fd, fcntl.LOCK_UN)
+            os.close(self._leader_fd)
+            self._leader_fd = None
+        self._local_event().set()
+
+    def _released(self) -> asyncio.Future:
+        """Future résolu quand plus aucun verrou exclusif n'est tenu (thread démon bloqué sur flock)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def block():
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_SH)
+                # Verrou partagé obtenu : 'running' ici signifie que le meneur est mort
+                state = self.read()
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            finally:
+                os.close(fd)
+            try:
+                loop.call_soon_threadsafe(lambda: future.done() or future.set_result(state))
+            except RuntimeError:
+                pass  # boucle déjà fermée : plus personne n'attend
+
+        # Démon : un meneur bloqué ne retient pas la fin du processus en attente
+        threading.Thread(target=block, name="auth-barrier-wait", daemon=True).start()
+        return future
+
+    async def wait(self, timeout: float = 300.0) -> str:
+        """Attend le résultat du meneur : 'success', 'failed' ou 'timeout'"""
+        deadline = time.monotonic() + timeout
+        event = self._local_event()
+        released = None
+        event_task = asyncio.ensure_future(event.wait())
+        try:
+            while True:
+                state = self.read()
+                if state['status'] in (SUCCESS, FAILED):
+                    if state['status'] == FAILED and state.get('error'):
+                        logger.warning(f"⚠️ Authentification du meneur en échec: {state['error']}")
+                    return state['status']
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return TIMEOUT
+
+                if state['status'] == RUNNING:
+                    if released is None or released.done():
+                        released = self._released()
+                    await asyncio.wait({event_task, released}, timeout=remaining,
+                                       return_when=asyncio.FIRST_COMPLETED)
+                else:
+                    # Meneur pas encore arrivé (autre processus) : courte relecture
+                    poll = asyncio.ensure_future(asyncio.sleep(min(PENDING_POLL, remaining)))
+                    await asyncio.wait({event_task, poll}, return_when=asyncio.FIRST_COMPLETED)
+                    poll.cancel()
+
+                if released is not None and released.done() and released.result()['status'] == RUNNING:
+                    logger.error("❌ Meneur de l'authentification disparu en cours de route")
+                    return FAILED
+                if event_task.done():
+                    event_task = asyncio.ensure_future(event.wait())
+        finally:
+            event_task.cancel()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+État d'authentification Playwright persisté (storage_state chiffré sur disque)
+Après un login réussi, le storage_state du contexte est enregistré chiffré
+(Fernet) avec son expiration. Les runs et processus workers suivants le
+rechargent et le valident par une requête légère ; le vrai login n'est fait
+que si l'état est absent, expiré ou refusé par le serveur.
+Sans le paquet cryptography, rien n'est écrit : l'état n'est jamais
+stocké en clair et chaque run refait simplement le login.
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # dépendance optionnelle
+    Fernet = None
+    InvalidToken = ValueError
+
+KEY_ENV = "SCRAPER_STATE_KEY"
+
+# Durée de vie maximale d'un état, même si les cookies expirent plus tard
+DEFAULT_MAX_AGE = 12 * 3600
+
+
+def load_cipher(key_path: str = "auth_state.key"):
+    """
+    Chiffreur Fernet : clé de SCRAPER_STATE_KEY, sinon fichier de clé local
+    (créé en 0600 au premier run). None si cryptography n'est pas installé.
+    """
+    if Fernet is None:
+        return None
+    key = os.environ.get(KEY_ENV)
+    if key:
+        return Fernet(key.encode())
+    path = Path(key_path)
+    if not path.exists():
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass  # créée au même moment par un autre processus
+        else:
+            with os.fdopen(fd, 'wb') as handle:
+                handle.write(Fernet.generate_key())
+    return Fernet(path.read_bytes().strip())
+
+
+def state_expiry(state: Dict, saved_at: float, max_age: float, auth_cookies=None) -> float:
+    """Première expiration parmi les cookies d'auth (sessions exclues) et saved_at + max_age"""
+    expiry = saved_at + max_age
+    for cookie in state.get('cookies', []):
+        if auth_cookies and cookie.get('name') not in auth_cookies:
+            continue
+        expires = cookie.get('expires', -1)
+        if expires and expires > 0:
+            expiry = min(expiry, expires)
+    return expiry
+
+
+class AuthStateStore:
+    """Fichier chiffré contenant {saved_at, expires_at, state}"""
+
+    def __init__(self, path: str = "auth_state.bin", cipher=None, max_age: float = DEFAULT_MAX_AGE,
+                 auth_cookies=None):
+        self.path = Path(path)
+        self.cipher = cipher
+        self.max_age = max_age
+        self.auth_cookies = tuple(auth_cookies) if auth_cookies else None
+
+    def save(self, state: Dict) -> bool:
+        """Enregistre l'état chiffré (écriture atomique) ; faux sans chiffreur"""
+        if self.cipher is None:
+            logger.info("🔐 État d'authentification non persisté (cryptography absent : jamais en clair)")
+            return False
+        saved_at = time.time()
+        payload = {
+            'saved_at': saved_at,
+            'expires_at': state_expiry(state, saved_at, self.max_age, self.auth_cookies),
+            'state': state,
+        }
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(self.cipher.encrypt(json.dumps(payload).encode()))
+        os.replace(tmp_path, self.path)
+        return True
+
+    def load(self) -> Optional[Dict]:
+        """storage_state encore valide, ou None (absent, expiré, illisible)"""
+        if self.cipher is None or not self.path.exists():
+            return None
+        try:
+            payload = json.loads(self.cipher.decrypt(self.path.read_bytes()))
+            remaining = payload['expires_at'] - time.time()
+        except (InvalidToken, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"⚠️ État d'authentification illisible ({type(e).__name__}) : ignoré")
+            self.clear()
+            return None
+        if remaining <= 0:
+            logger.info("⌛ État d'authentification expiré : login nécessaire")
+            self.clear()
+            return None
+        logger.info(f"🔐 État d'authentification chargé (expire dans {remaining / 60:.0f} min)")
+        return payload['state']
+
+    def clear(self):
+        """Supprime l'état (refusé par le serveur ou expiré)"""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
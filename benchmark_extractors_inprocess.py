@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark des extracteurs market traffic / live ads :
+ancien mode subprocess (un interpréteur + un Chromium par appel)
+vs nouveau mode in-process (une seule page Chromium réutilisée).
+
+Usage: python3 benchmark_extractors_inprocess.py <shop_url> [<shop_url> ...]
+"""
+
+import sys
+import os
+import time
+import asyncio
+import subprocess
+from playwright.async_api import async_playwright
+
+from market_traffic_extractor import MarketTrafficExtractor
+from live_ads_progression_extractor import LiveAdsProgressionExtractor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_subprocess_mode(shop_urls):
+    """Reproduit l'ancien comportement : deux subprocess.run par boutique"""
+    durations = []
+    for shop_url in shop_urls:
+        start = time.perf_counter()
+        for script in ("market_traffic_extractor.py", "live_ads_progression_extractor.py"):
+            try:
+                subprocess.run(
+                    ["python3", os.path.join(SCRIPT_DIR, script), shop_url],
+                    capture_output=True, text=True, timeout=30
+                )
+            except subprocess.TimeoutExpired:
+                pass
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+async def run_inprocess_mode(shop_urls):
+    """Nouveau comportement : extracteurs appelés en coroutine sur une page partagée"""
+    market_extractor = MarketTrafficExtractor()
+    live_ads_extractor = LiveAdsProgressionExtractor()
+    durations = []
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=['--no-sandbox', '--disable-setuid-sandbox'])
+        context = await browser.new_context()
+        page = await context.new_page()
+
+        for shop_url in shop_urls:
+            start = time.perf_counter()
+            for coro in (market_extractor.extract_market_traffic(shop_url, page=page),
+                         live_ads_extractor.extract_live_ads_progression(shop_url, page=page)):
+                try:
+                    await asyncio.wait_for(coro, timeout=30)
+                except asyncio.TimeoutError:
+                    pass
+            durations.append(time.perf_counter() - start)
+
+        await browser.close()
+    return durations
+
+
+def summarize(label, durations):
+    """Affiche le temps moyen par boutique"""
+    avg = sum(durations) / len(durations) if durations else 0.0
+    print(f"  {label:<12} total={sum(durations):7.2f}s  moyenne/boutique={avg:6.2f}s")
+    return avg
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python3 benchmark_extractors_inprocess.py <shop_url> [<shop_url> ...]")
+        sys.exit(1)
+
+    shop_urls = sys.argv[1:]
+    print(f"⏱️ Benchmark extracteurs sur {len(shop_urls)} boutique(s)")
+
+    avg_subprocess = summarize("subprocess", run_subprocess_mode(shop_urls))
+    avg_inprocess = summarize("in-process", asyncio.run(run_inprocess_mode(shop_urls)))
+
+    print(f"🎯 Gain par boutique: {avg_subprocess - avg_inprocess:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
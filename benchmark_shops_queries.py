@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark des requêtes chaudes sur une table `shops` de 1M lignes,
+avant / après les index de la migration 2 (migrations.py).
+
+Usage: python3 benchmark_shops_queries.py [nb_lignes] [db_path]
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from migrations import migrate
+from shop_source import ELIGIBLE_STATUSES, eligibility_predicate
+
+SHOPS_SCHEMA = """
+    CREATE TABLE shops (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        shop_name TEXT NOT NULL,
+        shop_url TEXT NOT NULL,
+        monthly_visits INTEGER,
+        monthly_revenue TEXT,
+        live_ads TEXT,
+        creation_date TEXT,
+        category TEXT,
+        total_products INTEGER,
+        pixel_google TEXT,
+        pixel_facebook TEXT,
+        aov NUMERIC,
+        market_us NUMERIC,
+        market_uk NUMERIC,
+        market_de NUMERIC,
+        market_ca NUMERIC,
+        market_au NUMERIC,
+        market_fr NUMERIC,
+        scraping_status TEXT,
+        updated_at TEXT,
+        project_source TEXT
+    )
+"""
+
+STATUSES = ['completed'] * 80 + ['partial'] * 8 + ['failed'] * 4 + ['na'] * 5 + [None] * 2 + ['']
+SOURCES = ['trendtrack', 'import_csv', 'manual', 'test_data']
+
+FRESHNESS_CUTOFF = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
+
+# (nom, requête, paramètres)
+HOT_QUERIES = [
+    ("éligibilité (page keyset)",
+     f"SELECT id, shop_name, shop_url FROM shops WHERE {eligibility_predicate()} AND id > ? ORDER BY id LIMIT 500",
+     ELIGIBLE_STATUSES + (0,)),
+    ("éligibilité (comptage)",
+     f"SELECT COUNT(*) FROM shops WHERE {eligibility_predicate()}",
+     ELIGIBLE_STATUSES),
+    ("doublon par URL",
+     "SELECT id FROM shops WHERE shop_url = ?",
+     ("https://shop-500000.myshopify.com",)),
+    ("fraîcheur (plus anciennes)",
+     "SELECT id, updated_at FROM shops WHERE updated_at < ? ORDER BY updated_at LIMIT 500",
+     (FRESHNESS_CUTOFF,)),
+    ("source + statut",
+     "SELECT COUNT(*) FROM shops WHERE project_source = ? AND scraping_status = 'failed'",
+     ("import_csv",)),
+]
+
+
+def populate(db_path: str, rows: int):
+    """Crée la table shops et l'alimente avec `rows` lignes synthétiques"""
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    conn = sqlite3.connect(db_path)
+    conn.execute(SHOPS_SCHEMA)
+
+    def generate():
+        for i in range(rows):
+            yield (
+                f"Shop {i}",
+                f"https://shop-{i}.myshopify.com",
+                rng.choice(STATUSES),
+                (now - timedelta(minutes=rng.randint(0, 90 * 24 * 60))).isoformat(),
+                rng.choice(SOURCES),
+            )
+
+    conn.executemany(
+        "INSERT INTO shops (shop_name, shop_url, scraping_status, updated_at, project_source) VALUES (?, ?, ?, ?, ?)",
+        generate()
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_queries(db_path: str, repeat: int = 5):
+    """Temps médian de chaque requête chaude + plan d'exécution"""
+    conn = sqlite3.connect(db_path)
+    timings = {}
+    for name, sql, params in HOT_QUERIES:
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            durations.append(time.perf_counter() - start)
+        plan = " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall())
+        timings[name] = (sorted(durations)[len(durations) // 2], plan)
+    conn.close()
+    return timings
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    db_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(tempfile.mkdtemp(), "bench_shops.db")
+
+    print(f"🏗️ Création de {rows:,} boutiques dans {db_path}...")
+    start = time.perf_counter()
+    populate(db_path, rows)
+    print(f"✅ Table créée en {time.perf_counter() - start:.1f}s")
+
+    migrate(db_path, target=1)
+    before = run_queries(db_path)
+
+    start = time.perf_counter()
+    migrate(db_path)
+    print(f"✅ Migration des index appliquée en {time.perf_counter() - start:.1f}s")
+    after = run_queries(db_path)
+
+    print(f"\n{'Requête':<28} {'sans index':>12} {'avec index':>12} {'gain':>8}")
+    for name, _, _ in HOT_QUERIES:
+        t_before, _ = before[name]
+        t_after, plan = after[name]
+        gain = t_before / t_after if t_after else float('inf')
+        print(f"{name:<28} {t_before * 1000:>10.1f}ms {t_after * 1000:>10.1f}ms {gain:>7.1f}x")
+        print(f"    plan: {plan}")
+
+
+if __name__ == "__main__":
+    main()
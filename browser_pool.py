@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Pool de navigateurs Chromium partagés pour les extracteurs autonomes
+(market traffic, live ads, métriques supplémentaires).
+
+- Navigateurs lancés à la demande et réutilisés entre les boutiques
+- Un contexte par navigateur, réutilisé pour toutes ses pages
+- Plafond de pages ouvertes par navigateur
+- Recyclage d'un navigateur après N pages servies
+- Détection des navigateurs crashés et relance automatique
+- Métriques d'attente dans la file (queue wait)
+- Interception des requêtes sur chaque page (profil dom-lite par défaut)
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from playwright.async_api import async_playwright
+
+from request_interception import InterceptionStats, RequestInterceptor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+DEFAULT_LAUNCH_ARGS = ['--no-sandbox', '--disable-setuid-sandbox']
+
+
+class PooledBrowser:
+    """Navigateur du pool avec son contexte réutilisable et ses compteurs"""
+
+    def __init__(self, browser_id: int, browser, context):
+        self.browser_id = browser_id
+        self.browser = browser
+        self.context = context
+        self.pages_open = 0
+        self.pages_served = 0
+        self.crashed = False
+        self.retiring = False
+        browser.on("disconnected", lambda _: self._on_disconnected())
+
+    def _on_disconnected(self):
+        """Callback Playwright : le processus Chromium a disparu"""
+        if not self.retiring:
+            self.crashed = True
+            logger.warning(f"💥 BrowserPool: navigateur {self.browser_id} déconnecté (crash détecté)")
+
+    def is_alive(self) -> bool:
+        """Vérifie que le navigateur est toujours connecté"""
+        return not self.crashed and self.browser.is_connected()
+
+
+class BrowserPool:
+    """Pool de navigateurs Chromium avec plafond de pages et recyclage"""
+
+    def __init__(self, max_browsers: int = 2, max_pages_per_browser: int = 4,
+                 recycle_after: int = 50, headless: bool = True,
+                 launch_args: Optional[List[str]] = None, user_agent: str = DEFAULT_USER_AGENT,
+                 interception_profile: Optional[str] = 'dom-lite'):
+        self.max_browsers = max_browsers
+        self.max_pages_per_browser = max_pages_per_browser
+        self.recycle_after = recycle_after
+        self.headless = headless
+        self.launch_args = launch_args or DEFAULT_LAUNCH_ARGS
+        self.user_agent = user_agent
+        self.interception_profile = interception_profile
+        self.request_stats = InterceptionStats()
+
+        self._playwright = None
+        self._browsers: List[PooledBrowser] = []
+        self._next_browser_id = 0
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_browsers * max_pages_per_browser)
+
+        # Métriques
+        self._queue_waits = deque(maxlen=1000)
+        self.metrics = {
+            'pages_served': 0,
+            'launches': 0,
+            'recycles': 0,
+            'crash_relaunches': 0,
+            'waiting': 0
+        }
+
+    async def _ensure_playwright(self):
+        """Démarre Playwright une seule fois pour tout le pool"""
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+
+    async def _launch_browser(self) -> PooledBrowser:
+        """Lance un nouveau Chromium avec son contexte réutilisable"""
+        await self._ensure_playwright()
+        browser = await self._playwright.chromium.launch(headless=self.headless, args=self.launch_args)
+        context = await browser.new_context(user_agent=self.user_agent)
+        pooled = PooledBrowser(self._next_browser_id, browser, context)
+        self._next_browser_id += 1
+        self._browsers.append(pooled)
+        self.metrics['launches'] += 1
+        logger.info(f"🚀 BrowserPool: navigateur {pooled.browser_id} lancé ({len(self._browsers)}/{self.max_browsers})")
+        return pooled
+
+    async def _retire_browser(self, pooled: PooledBrowser):
+        """Ferme un navigateur (recyclage ou crash) et le retire du pool"""
+        pooled.retiring = True
+        if pooled in self._browsers:
+            self._browsers.remove(pooled)
+        try:
+            await pooled.browser.close()
+        except Exception:
+            pass
+
+    async def _select_browser(self) -> PooledBrowser:
+        """Choisit un navigateur disponible, en relance un si nécessaire"""
+        async with self._lock:
+            # Retirer les navigateurs crashés
+            for pooled in list(self._browsers):
+                if not pooled.is_alive():
+                    self.metrics['crash_relaunches'] += 1
+                    await self._retire_browser(pooled)
+
+            # Recycler les navigateurs qui ont servi assez de pages et sont inactifs
+            for pooled in list(self._browsers):
+                if pooled.pages_served >= self.recycle_after:
+                    pooled.retiring = True
+                    if pooled.pages_open == 0:
+                        logger.info(f"♻️ BrowserPool: recyclage du navigateur {pooled.browser_id} après {pooled.pages_served} pages")
+                        self.metrics['recycles'] += 1
+                        await self._retire_browser(pooled)
+
+            candidates = [b for b in self._browsers
+                          if not b.retiring and b.pages_open < self.max_pages_per_browser]
+            if candidates:
+                return min(candidates, key=lambda b: b.pages_open)
+
+            # Aucun navigateur disponible : en lancer un (un navigateur en cours de
+            # recyclage encore occupé peut faire dépasser temporairement max_browsers)
+            return await self._launch_browser()
+
+    @asynccontextmanager
+    async def page(self):
+        """
+        Fournit une page prête à l'emploi, fermée automatiquement en sortie.
+        Le temps d'attente d'un slot libre est mesuré (queue wait).
+        """
+        wait_start = time.perf_counter()
+        self.metrics['waiting'] += 1
+        await self._slots.acquire()
+        self.metrics['waiting'] -= 1
+        self._queue_waits.append(time.perf_counter() - wait_start)
+
+        pooled = None
+        page = None
+        try:
+            pooled = await self._select_browser()
+            pooled.pages_open += 1
+            pooled.pages_served += 1
+            self.metrics['pages_served'] += 1
+            page = await pooled.context.new_page()
+            if self.interception_profile:
+                await RequestInterceptor(self.interception_profile, self.request_stats).attach(page)
+            yield page
+        finally:
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            if pooled is not None:
+                pooled.pages_open -= 1
+            self._slots.release()
+
+    def get_metrics(self) -> Dict[str, float]:
+        """Retourne les compteurs du pool et les statistiques d'attente"""
+        waits = sorted(self._queue_waits)
+        stats = dict(self.metrics)
+        stats['browsers_alive'] = sum(1 for b in self._browsers if b.is_alive())
+        stats['requests_blocked'] = self.request_stats.blocked
+        stats['blocked_mb_estimate'] = round(self.request_stats.blocked_bytes / 1_000_000, 1)
+        stats['queue_wait_count'] = len(waits)
+        if waits:
+            stats['queue_wait_avg'] = sum(waits) / len(waits)
+            stats['queue_wait_p95'] = waits[min(len(waits) - 1, int(len(waits) * 0.95))]
+            stats['queue_wait_max'] = waits[-1]
+        else:
+            stats['queue_wait_avg'] = stats['queue_wait_p95'] = stats['queue_wait_max'] = 0.0
+        return stats
+
+    async def close(self):
+        """Ferme tous les navigateurs et arrête Playwright"""
+        async with self._lock:
+            for pooled in list(self._browsers):
+                await self._retire_browser(pooled)
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+        logger.info(f"🔒 BrowserPool fermé - métriques: {self.get_metrics()}")
+
+
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """Retourne le pool partagé du processus (créé à la première utilisation)"""
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool()
+    return _browser_pool
+
+
+async def close_browser_pool():
+    """Ferme le pool partagé s'il a été créé"""
+    global _browser_pool
+    if _browser_pool is not None:
+        await _browser_pool.close()
+        _browser_pool = None
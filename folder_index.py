@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Index persistant domaine -> Folder ID (FID) MyToolsPlan
+Chargé une fois par run avec une pagination complète de folders/selector-list,
+gardé en mémoire (dict) et sauvegardé sur disque. Les dossiers créés sont
+ajoutés immédiatement ; un rafraîchissement incrémental ne relit que les
+dernières pages. Recherche O(1), sans requête supplémentaire.
+"""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# fetch_page(offset, limit) -> {"success": bool, "data": {"projects": [...]}, "error": str}
+FetchPage = Callable[[int, int], Awaitable[Dict]]
+
+
+def normalize_domain(domain: str) -> str:
+    """Même nettoyage que le scraper : sans protocole, sans www., en minuscules"""
+    return domain.replace('https://', '').replace('http://', '').replace('www.', '').strip('/').lower()
+
+
+class FolderIndex:
+    """Dictionnaire domaine -> FID avec chargement paginé et persistance JSON"""
+
+    def __init__(self, path: Optional[str] = "folder_index.json", page_size: int = 500, max_age: float = 24 * 3600):
+        self.path = Path(path) if path else None
+        self.page_size = page_size
+        self.max_age = max_age
+        self.folders: Dict[str, str] = {}
+        self.folders_seen = 0  # nombre de dossiers déjà lus côté API (offset de reprise)
+        self.refreshed_at = 0.0
+        self.loaded = False
+
+    def get(self, domain: str) -> Optional[str]:
+        """FID connu pour ce domaine, sinon None"""
+        return self.folders.get(normalize_domain(domain))
+
+    def add(self, domain: str, folder_id) -> None:
+        """Ajoute un dossier (ex: juste créé) et sauvegarde l'index"""
+        self.folders[normalize_domain(domain)] = str(folder_id)
+        self.folders_seen += 1
+        self.save()
+
+    def _index_projects(self, projects) -> None:
+        """Ajoute une page de dossiers à l'index"""
+        for folder in projects:
+            folder_domain = normalize_domain(folder.get('domain', '') or '')
+            folder_id = folder.get('id')
+            if folder_domain and folder_id:
+                self.folders.setdefault(folder_domain, str(folder_id))
+
+    async def refresh(self, fetch_page: FetchPage, full: bool = False) -> bool:
+        """
+        Relit la liste des dossiers page par page.
+        - full=True : tout relire depuis l'offset 0
+        - sinon : reprendre à la dernière page connue (nouveaux dossiers uniquement)
+        """
+        offset = 0 if full else max(0, self.folders_seen - self.page_size)
+        if full:
+            self.folders = {}
+        pages = 0
+
+        while True:
+            response = await fetch_page(offset, self.page_size)
+            if not response.get('success', False):
+                logger.warning(f"⚠️ FolderIndex: Erreur API folders/selector-list (offset {offset}): {response.get('error', '')}")
+                return False
+
+            projects = (response.get('data') or {}).get('projects', []) or []
+            self._index_projects(projects)
+            pages += 1
+            offset += len(projects)
+            if len(projects) < self.page_size:
+                break
+
+        # Relecture complète : compte exact (dossiers supprimés côté API compris)
+        self.folders_seen = offset if full else max(self.folders_seen, offset)
+        self.refreshed_at = time.time()
+        self.loaded = True
+        self.save()
+        logger.info(f"📁 FolderIndex: {len(self.folders)} dossiers indexés ({pages} page(s), {'complet' if full else 'incrémental'})")
+        return True
+
+    async def load(self, fetch_page: FetchPage) -> bool:
+        """Charge l'index (disque puis incrémental, ou relecture complète si trop ancien)"""
+        if self.loaded:
+            return True
+        if self._load_from_disk() and time.time() - self.refreshed_at < self.max_age:
+            return await self.refresh(fetch_page)
+        return await self.refresh(fetch_page, full=True)
+
+    def _load_from_disk(self) -> bool:
+        """Relit l'index sauvegardé, s'il existe"""
+        if not self.path or not self.path.exists():
+            return False
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.folders = data.get('folders', {})
+            self.folders_seen = data.get('folders_seen', len(self.folders))
+            self.refreshed_at = data.get('refreshed_at', 0.0)
+            logger.info(f"📁 FolderIndex: {len(self.folders)} dossiers relus depuis {self.path}")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ FolderIndex: Index illisible {self.path}: {e}")
+            return False
+
+    def save(self) -> None:
+        """Sauvegarde atomique (fichier temporaire puis renommage)"""
+        if not self.path:
+            return
+        try:
+            tmp_path = self.path.with_suffix(self.path.suffix + f".{os.getpid()}.tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'folders': self.folders,
+                    'folders_seen': self.folders_seen,
+                    'refreshed_at': self.refreshed_at
+                }, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"⚠️ FolderIndex: Sauvegarde impossible {self.path}: {e}")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Fraîcheur des métriques par boutique (re-scraping incrémental)
+Chaque métrique écrite est horodatée (table metric_freshness, migration 3) et
+chaque famille de métriques a sa durée de validité (TTL). Le planificateur ne
+garde que les métriques encore fraîches et indique les étapes à relancer :
+une relance nocturne ne refait que ce qui a expiré.
+"""
+
+import sqlite3
+import logging
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Familles de métriques et durée de validité
+METRIC_FAMILIES = {
+    'organic': (timedelta(days=30), [
+        'organic_traffic', 'paid_search_traffic', 'traffic', 'branded_traffic',
+        'percent_branded_traffic', 'cpc'
+    ]),
+    'engagement': (timedelta(days=30), [
+        'visits', 'bounce_rate', 'average_visit_duration', 'conversion_rate'
+    ]),
+    'markets': (timedelta(days=7), ['market_us', 'market_uk', 'market_de', 'market_ca', 'market_au', 'market_fr']),
+    'pixels': (timedelta(days=7), ['pixel_google', 'pixel_facebook']),
+    'catalog': (timedelta(days=7), ['total_products', 'aov']),
+}
+
+# Métriques écrites dans analytics par chaque étape du graphe d'une boutique.
+# La page boutique donne aussi live_ads_7d / live_ads_30d, mais ils ne sont pas
+# des colonnes analytics (voir analytics_format.ANALYTICS_FIELDS) : l'étape est
+# fraîche quand ses marchés le sont.
+STAGE_METRICS = {
+    'domain_overview': [
+        'organic_traffic', 'paid_search_traffic', 'traffic', 'branded_traffic',
+        'bounce_rate', 'average_visit_duration', 'conversion_rate'
+    ],
+    'shop_page': [
+        'market_us', 'market_uk', 'market_de', 'market_ca', 'market_au', 'market_fr'
+    ],
+    'pixel_data': ['pixel_google', 'pixel_facebook'],
+    'total_products': ['total_products'],
+    'aov': ['aov'],
+    'cpc': ['cpc'],
+}
+
+EMPTY_VALUES = (None, '', 'na', 'N/A')
+
+
+def stale_cutoffs(families: Dict = None, now: Optional[datetime] = None) -> List[Tuple[str, List[str]]]:
+    """(horodatage limite ISO, métriques) par famille : écrites avant la limite = expirées"""
+    now = now or datetime.now(timezone.utc)
+    return [((now - ttl).isoformat(), list(metrics)) for ttl, metrics in (families or METRIC_FAMILIES).values()]
+
+
+def has_value(value) -> bool:
+    """Même règle que la logique de skip : valeur présente et différente de 'na'"""
+    return value not in EMPTY_VALUES
+
+
+class FreshnessPlanner:
+    """Décide quelles métriques existantes sont encore valables et quelles étapes relancer"""
+
+    def __init__(self, families: Dict = None):
+        self.ttls: Dict[str, timedelta] = {}
+        for ttl, metrics in (families or METRIC_FAMILIES).values():
+            for metric in metrics:
+                self.ttls[metric] = ttl
+
+    def is_fresh(self, metric: str, fetched_at: Optional[str], now: datetime) -> bool:
+        """Vrai si la métrique a été écrite il y a moins que le TTL de sa famille"""
+        ttl = self.ttls.get(metric)
+        if ttl is None or not fetched_at:
+            return False
+        try:
+            fetched = datetime.fromisoformat(fetched_at)
+        except ValueError:
+            return False
+        if fetched.tzinfo is None:
+            fetched = fetched.replace(tzinfo=timezone.utc)
+        return now - fetched < ttl
+
+    def fresh_metrics(self, existing: Dict, timestamps: Optional[Dict[str, str]],
+                      now: Optional[datetime] = None) -> Dict:
+        """
+        Sous-ensemble des métriques existantes encore fraîches.
+        `timestamps` None (pas d'horodatage disponible) : comportement historique,
+        toute valeur présente est gardée.
+        """
+        existing = existing or {}
+        if timestamps is None:
+            return dict(existing)
+        now = now or datetime.now(timezone.utc)
+        return {
+            metric: value for metric, value in existing.items()
+            if has_value(value) and self.is_fresh(metric, timestamps.get(metric), now)
+        }
+
+    def stale_stages(self, fresh: Dict, stages: Dict[str, List[str]] = None) -> Set[str]:
+        """Étapes dont au moins une métrique n'est pas fraîche"""
+        stages = stages or STAGE_METRICS
+        return {
+            stage for stage, metrics in stages.items()
+            if any(not has_value(fresh.get(metric)) for metric in metrics)
+        }
+
+
+def fetched_metrics(analytics_data: Dict, reused: Dict) -> List[str]:
+    """Métriques non vides de la ligne écrite qui n'ont pas été reprises des données fraîches"""
+    return [
+        metric for metric, value in analytics_data.items()
+        if has_value(value) and metric not in reused
+    ]
+
+
+class FreshnessStore:
+    """Horodatages par (boutique, métrique) dans la table metric_freshness"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def load(self, shop_ids: Iterable[int]) -> Dict[int, Dict[str, str]]:
+        """Horodatages de plusieurs boutiques (une requête par tranche de 500)"""
+        shop_ids = list(dict.fromkeys(shop_ids))
+        timestamps: Dict[int, Dict[str, str]] = {shop_id: {} for shop_id in shop_ids}
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            for start in range(0, len(shop_ids), 500):
+                chunk = shop_ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT shop_id, metric, fetched_at FROM metric_freshness WHERE shop_id IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for shop_id, metric, fetched_at in rows:
+                    timestamps[shop_id][metric] = fetched_at
+        return timestamps
+
+    def record(self, fetched: Iterable[Tuple[int, Iterable[str]]], fetched_at: Optional[str] = None):
+        """
+        Horodate les métriques réellement récupérées pendant ce run, par boutique
+        (une transaction). Les métriques fraîches reprises telles quelles gardent
+        leur horodatage d'origine et finissent donc par expirer.
+        """
+        fetched_at = fetched_at or datetime.now(timezone.utc).isoformat()
+        values = [
+            (shop_id, metric, fetched_at)
+            for shop_id, metrics in fetched
+            for metric in metrics
+        ]
+        if not values:
+            return
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO metric_freshness (shop_id, metric, fetched_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(shop_id, metric) DO UPDATE SET fetched_at = excluded.fetched_at",
+                    values
+                )
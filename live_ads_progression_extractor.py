@@ -10,17 +10,64 @@ import asyncio
 import logging
 import re
 from datetime import datetime, timezone
-from playwright.async_api import async_playwright
+from browser_pool import get_browser_pool, close_browser_pool
+from readiness import ReadinessProbes
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Libellés des badges : la page est prête quand l'un d'eux est affiché
+LIVE_ADS_READY_SELECTORS = ['text="7d"', 'text="30d"']
+
+# Script d'extraction des badges de variation 7d/30d (exécuté dans la page boutique)
+LIVE_ADS_BADGES_JS = """
+() => {
+    function parsePercentText(txt) {
+        if (!txt) return null;
+        const n = parseInt(String(txt).replace(/[^\\d-]/g, ""), 10);
+        return Number.isNaN(n) ? null : n;
+    }
+
+    function signedByClass(raw, className) {
+        if (raw == null) return null;
+        const negative = className?.includes("bg-red-300");
+        return negative ? -Math.abs(raw) : Math.abs(raw);
+    }
+
+    function findBadgeAfterLabel(root, label) {
+        const all = Array.from(root.querySelectorAll("*"));
+        const labelNode = all.find(n => n.childNodes.length === 1 && n.textContent.trim() === label);
+        if (!labelNode) return null;
+
+        // 1) Essaye les frères directs à droite
+        for (let sib = labelNode.nextElementSibling; sib; sib = sib.nextElementSibling) {
+            if (/%/.test(sib.textContent)) return sib;
+        }
+        // 2) Fallback: dans le même parent, l'élément avec un %
+        const parent = labelNode.parentElement || root;
+        const candidate = Array.from(parent.children).find(el => /%/.test(el.textContent));
+        return candidate || null;
+    }
+
+    const badge7 = findBadgeAfterLabel(document, "7d");
+    const badge30 = findBadgeAfterLabel(document, "30d");
+
+    const v7 = parsePercentText(badge7?.textContent);
+    const v30 = parsePercentText(badge30?.textContent);
+
+    const live_ads_7d = signedByClass(v7, badge7?.className || "");
+    const live_ads_30d = signedByClass(v30, badge30?.className || "");
+
+    return { live_ads_7d, live_ads_30d };
+}
+"""
+
 class LiveAdsProgressionExtractor:
     """Extracteur pour les variations de Live Ads"""
     
-    def __init__(self):
+    def __init__(self, readiness: ReadinessProbes = None):
         self.timeout = 30000  # 30 secondes
+        self.ready_deadline = 10  # secondes (ancien plafond networkidle)
+        self.readiness = readiness or ReadinessProbes()
     
     def parse_percent_text(self, txt):
         """Parse un pourcentage depuis une chaîne"""
@@ -81,95 +128,22 @@ class LiveAdsProgressionExtractor:
         except:
             return None
     
-    async def extract_live_ads_progression(self, shop_url):
+    async def extract_live_ads_progression(self, shop_url, page=None):
         """
         Extrait les variations de Live Ads (7d et 30d) d'une boutique
+
+        Si `page` est fourni, l'extraction se fait sur cette page (navigateur
+        du worker appelant) sans passer par le pool partagé.
         """
         logger.info(f"📊 Extraction variations Live Ads pour: {shop_url}")
         
         try:
-            async with async_playwright() as p:
-                # Lancer le navigateur
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=['--no-sandbox', '--disable-setuid-sandbox']
-                )
-                
-                context = await browser.new_context(
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                )
-                
-                page = await context.new_page()
-                
-                # Aller sur la page de la boutique
-                await page.goto(shop_url, timeout=self.timeout)
-                await page.wait_for_load_state('networkidle', timeout=10000)
-                
-                # Initialiser les résultats
-                progression_data = {
-                    "live_ads_7d": None,
-                    "live_ads_30d": None,
-                    "extracted_at": datetime.now(timezone.utc).isoformat()
-                }
-                
-                # Utiliser page.evaluate pour exécuter le JavaScript d'extraction
-                try:
-                    extraction_result = await page.evaluate("""
-                        () => {
-                            function parsePercentText(txt) {
-                                if (!txt) return null;
-                                const n = parseInt(String(txt).replace(/[^\\d-]/g, ""), 10);
-                                return Number.isNaN(n) ? null : n;
-                            }
-                            
-                            function signedByClass(raw, className) {
-                                if (raw == null) return null;
-                                const negative = className?.includes("bg-red-300");
-                                return negative ? -Math.abs(raw) : Math.abs(raw);
-                            }
-                            
-                            function findBadgeAfterLabel(root, label) {
-                                const all = Array.from(root.querySelectorAll("*"));
-                                const labelNode = all.find(n => n.childNodes.length === 1 && n.textContent.trim() === label);
-                                if (!labelNode) return null;
-                                
-                                // 1) Essaye les frères directs à droite
-                                for (let sib = labelNode.nextElementSibling; sib; sib = sib.nextElementSibling) {
-                                    if (/%/.test(sib.textContent)) return sib;
-                                }
-                                // 2) Fallback: dans le même parent, l'élément avec un %
-                                const parent = labelNode.parentElement || root;
-                                const candidate = Array.from(parent.children).find(el => /%/.test(el.textContent));
-                                return candidate || null;
-                            }
-                            
-                            const badge7 = findBadgeAfterLabel(document, "7d");
-                            const badge30 = findBadgeAfterLabel(document, "30d");
-                            
-                            const v7 = parsePercentText(badge7?.textContent);
-                            const v30 = parsePercentText(badge30?.textContent);
-                            
-                            const live_ads_7d = signedByClass(v7, badge7?.className || "");
-                            const live_ads_30d = signedByClass(v30, badge30?.className || "");
-                            
-                            return { live_ads_7d, live_ads_30d };
-                        }
-                    """)
-                    
-                    if extraction_result:
-                        progression_data["live_ads_7d"] = extraction_result.get("live_ads_7d")
-                        progression_data["live_ads_30d"] = extraction_result.get("live_ads_30d")
-                        logger.info(f"✅ Variations Live Ads extraites: 7d={progression_data['live_ads_7d']}%, 30d={progression_data['live_ads_30d']}%")
-                    else:
-                        logger.warning("⚠️ Aucune donnée de progression Live Ads trouvée")
-                        
-                except Exception as e:
-                    logger.warning(f"⚠️ Erreur extraction JavaScript: {e}")
-                
-                await browser.close()
-                
-                logger.info(f"✅ Données de progression extraites: {json.dumps(progression_data, indent=2)}")
-                return progression_data
+            if page is not None:
+                return await self.extract_from_page(page, shop_url)
+            
+            # Page fournie par le pool partagé (navigateur réutilisé entre boutiques)
+            async with get_browser_pool().page() as page:
+                return await self.extract_from_page(page, shop_url)
                 
         except Exception as e:
             logger.error(f"❌ Erreur extraction progression Live Ads: {e}")
@@ -179,6 +153,39 @@ class LiveAdsProgressionExtractor:
                 "extracted_at": datetime.now(timezone.utc).isoformat(),
                 "error": str(e)
             }
+    
+    async def extract_from_page(self, page, shop_url):
+        """
+        Navigue sur la page de la boutique et extrait les badges 7d/30d
+        """
+        # Aller sur la page de la boutique
+        await page.goto(shop_url, timeout=self.timeout)
+        # Badges affichés plutôt que networkidle (jamais atteint sur les pages chargées en trackers)
+        await self.readiness.selector(page, LIVE_ADS_READY_SELECTORS, 'live_ads:badges', self.ready_deadline)
+        
+        # Initialiser les résultats
+        progression_data = {
+            "live_ads_7d": None,
+            "live_ads_30d": None,
+            "extracted_at": datetime.now(timezone.utc).isoformat()
+        }
+        
+        # Utiliser page.evaluate pour exécuter le JavaScript d'extraction
+        try:
+            extraction_result = await page.evaluate(LIVE_ADS_BADGES_JS)
+            
+            if extraction_result:
+                progression_data["live_ads_7d"] = extraction_result.get("live_ads_7d")
+                progression_data["live_ads_30d"] = extraction_result.get("live_ads_30d")
+                logger.info(f"✅ Variations Live Ads extraites: 7d={progression_data['live_ads_7d']}%, 30d={progression_data['live_ads_30d']}%")
+            else:
+                logger.warning("⚠️ Aucune donnée de progression Live Ads trouvée")
+                
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur extraction JavaScript: {e}")
+        
+        logger.info(f"✅ Données de progression extraites: {json.dumps(progression_data, indent=2)}")
+        return progression_data
 
 async def main():
     """Fonction principale pour tester l'extracteur"""
@@ -186,6 +193,9 @@ async def main():
         print("Usage: python3 live_ads_progression_extractor.py <shop_url>")
         sys.exit(1)
     
+    # Configuration du logging (uniquement en mode CLI)
+    logging.basicConfig(level=logging.INFO)
+    
     shop_url = sys.argv[1]
     extractor = LiveAdsProgressionExtractor()
     
@@ -195,6 +205,8 @@ async def main():
     except Exception as e:
         print(f"❌ Erreur: {e}")
         sys.exit(1)
+    finally:
+        await close_browser_pool()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
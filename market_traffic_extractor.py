@@ -10,17 +10,81 @@ import asyncio
 import logging
 import re
 from datetime import datetime, timezone
-from playwright.async_api import async_playwright
+from browser_pool import get_browser_pool, close_browser_pool
+from readiness import ReadinessProbes
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sélecteurs possibles du titre de la section "Trafic par pays"
+COUNTRY_SECTION_SELECTORS = [
+    'h3:has-text("Trafic par pays")',
+    'h3.font-semibold.tracking-tight.text-lg',
+    'h3:has-text("Traffic by Country")'
+]
+
+# Script d'extraction du trafic par pays (exécuté dans la page de détail boutique)
+COUNTRY_TRAFFIC_JS = """
+() => {
+    const marketData = {
+        market_us: null,
+        market_uk: null,
+        market_de: null,
+        market_ca: null,
+        market_au: null,
+        market_fr: null
+    };
+
+    // Chercher tous les éléments de pays
+    const countryElements = document.querySelectorAll('.flex.gap-2.w-full.items-center');
+
+    countryElements.forEach(el => {
+        try {
+            const img = el.querySelector('img');
+            const percentageEl = el.querySelector('p:last-child');
+
+            if (img && percentageEl) {
+                const countryCode = img.alt.toLowerCase();
+                const percentageText = percentageEl.textContent.replace('%', '').trim();
+                const percentage = parseFloat(percentageText) / 100; // Convertir en décimal
+
+                // Mapper les codes pays
+                switch(countryCode) {
+                    case 'us':
+                        marketData.market_us = percentage;
+                        break;
+                    case 'gb':
+                        marketData.market_uk = percentage;
+                        break;
+                    case 'de':
+                        marketData.market_de = percentage;
+                        break;
+                    case 'ca':
+                        marketData.market_ca = percentage;
+                        break;
+                    case 'au':
+                        marketData.market_au = percentage;
+                        break;
+                    case 'fr':
+                        marketData.market_fr = percentage;
+                        break;
+                }
+            }
+        } catch (e) {
+            console.log('Erreur parsing pays:', e);
+        }
+    });
+
+    return marketData;
+}
+"""
+
 class MarketTrafficExtractor:
     """Extracteur pour les données de trafic par pays"""
     
-    def __init__(self):
+    def __init__(self, readiness: ReadinessProbes = None):
         self.timeout = 30000  # 30 secondes
+        self.ready_deadline = 10  # secondes
+        self.readiness = readiness or ReadinessProbes()
     
     def parse_float(self, s):
         """Parse un float depuis une chaîne"""
@@ -37,141 +101,22 @@ class MarketTrafficExtractor:
         except:
             return None
     
-    async def extract_market_traffic(self, shop_url, targets=["us", "uk", "de", "ca", "au", "fr"]):
+    async def extract_market_traffic(self, shop_url, targets=["us", "uk", "de", "ca", "au", "fr"], page=None):
         """
         Extrait les données de trafic par pays d'une boutique
+
+        Si `page` est fourni, l'extraction se fait sur cette page (navigateur
+        du worker appelant) sans passer par le pool partagé.
         """
         logger.info(f"🌍 Extraction trafic par pays pour: {shop_url}")
         
         try:
-            async with async_playwright() as p:
-                # Lancer le navigateur
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=['--no-sandbox', '--disable-setuid-sandbox']
-                )
-                
-                context = await browser.new_context(
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                )
-                
-                page = await context.new_page()
-                
-                # CORRECTION: Construire l'URL TrendTrack pour cette boutique
-                # Utiliser l'URL directe de la boutique fournie
-                logger.info(f"🌐 Navigation vers la page de détail boutique: {shop_url}")
-                await page.goto(shop_url, wait_until='domcontentloaded', timeout=30000)
-                
-                # Initialiser les résultats
-                market_data = {
-                    "market_us": None,
-                    "market_uk": None,
-                    "market_de": None,
-                    "market_ca": None,
-                    "market_au": None,
-                    "market_fr": None,
-                    "extracted_at": datetime.now(timezone.utc).isoformat()
-                }
-                
-                # Attendre que la page se charge complètement
-                await page.wait_for_timeout(3000)
-                
-                # Extraire les données de trafic par pays
-                try:
-                    # Attendre la section "Trafic par pays" avec timeout augmenté
-                    logger.info("🔍 Recherche de la section 'Trafic par pays'...")
-                    
-                    # Essayer plusieurs sélecteurs pour la section
-                    section_found = False
-                    selectors_to_try = [
-                        'h3:has-text("Trafic par pays")',
-                        'h3.font-semibold.tracking-tight.text-lg',
-                        'h3:has-text("Traffic by Country")'
-                    ]
-                    
-                    for selector in selectors_to_try:
-                        try:
-                            await page.wait_for_selector(selector, timeout=10000)
-                            logger.info(f"✅ Section trouvée avec le sélecteur: {selector}")
-                            section_found = True
-                            break
-                        except:
-                            logger.info(f"⚠️ Sélecteur {selector} non trouvé, essai suivant...")
-                            continue
-                    
-                    if not section_found:
-                        logger.warning("⚠️ Section 'Trafic par pays' non trouvée sur cette page")
-                        return market_data
-                    
-                    # Extraire les données des pays
-                    country_data = await page.evaluate("""
-                        () => {
-                            const marketData = {
-                                market_us: null,
-                                market_uk: null,
-                                market_de: null,
-                                market_ca: null,
-                                market_au: null,
-                                market_fr: null
-                            };
-                            
-                            // Chercher tous les éléments de pays
-                            const countryElements = document.querySelectorAll('.flex.gap-2.w-full.items-center');
-                            
-                            countryElements.forEach(el => {
-                                try {
-                                    const img = el.querySelector('img');
-                                    const percentageEl = el.querySelector('p:last-child');
-                                    
-                                    if (img && percentageEl) {
-                                        const countryCode = img.alt.toLowerCase();
-                                        const percentageText = percentageEl.textContent.replace('%', '').trim();
-                                        const percentage = parseFloat(percentageText) / 100; // Convertir en décimal
-                                        
-                                        // Mapper les codes pays
-                                        switch(countryCode) {
-                                            case 'us':
-                                                marketData.market_us = percentage;
-                                                break;
-                                            case 'gb':
-                                                marketData.market_uk = percentage;
-                                                break;
-                                            case 'de':
-                                                marketData.market_de = percentage;
-                                                break;
-                                            case 'ca':
-                                                marketData.market_ca = percentage;
-                                                break;
-                                            case 'au':
-                                                marketData.market_au = percentage;
-                                                break;
-                                            case 'fr':
-                                                marketData.market_fr = percentage;
-                                                break;
-                                        }
-                                    }
-                                } catch (e) {
-                                    console.log('Erreur parsing pays:', e);
-                                }
-                            });
-                            
-                            return marketData;
-                        }
-                    """)
-                    
-                    if country_data:
-                        market_data.update(country_data)
-                        logger.info(f"✅ Données de trafic extraites: {country_data}")
-                    else:
-                        logger.warning("⚠️ Aucune donnée de trafic par pays trouvée")
-                        
-                except Exception as e:
-                    logger.warning(f"⚠️ Erreur extraction trafic par pays: {e}")
-                
-                await browser.close()
-                
-                logger.info(f"✅ Données de trafic extraites: {json.dumps(market_data, indent=2)}")
-                return market_data
+            if page is not None:
+                return await self.extract_from_page(page, shop_url)
+            
+            # Page fournie par le pool partagé (navigateur réutilisé entre boutiques)
+            async with get_browser_pool().page() as page:
+                return await self.extract_from_page(page, shop_url)
                 
         except Exception as e:
             logger.error(f"❌ Erreur extraction trafic par pays: {e}")
@@ -185,6 +130,56 @@ class MarketTrafficExtractor:
                 "extracted_at": datetime.now(timezone.utc).isoformat(),
                 "error": str(e)
             }
+    
+    async def extract_from_page(self, page, shop_url):
+        """
+        Navigue sur la page de détail boutique et extrait le trafic par pays
+        """
+        # CORRECTION: Construire l'URL TrendTrack pour cette boutique
+        # Utiliser l'URL directe de la boutique fournie
+        logger.info(f"🌐 Navigation vers la page de détail boutique: {shop_url}")
+        await page.goto(shop_url, wait_until='domcontentloaded', timeout=self.timeout)
+        
+        # Initialiser les résultats
+        market_data = {
+            "market_us": None,
+            "market_uk": None,
+            "market_de": None,
+            "market_ca": None,
+            "market_au": None,
+            "market_fr": None,
+            "extracted_at": datetime.now(timezone.utc).isoformat()
+        }
+        
+        # Extraire les données de trafic par pays
+        try:
+            # Attendre la section "Trafic par pays" (tous les sélecteurs en parallèle,
+            # au lieu de 3s fixes puis un essai de 10s par sélecteur)
+            logger.info("🔍 Recherche de la section 'Trafic par pays'...")
+            matched = await self.readiness.selector(
+                page, COUNTRY_SECTION_SELECTORS, 'market_traffic:section', self.ready_deadline, replaces=3.0
+            )
+            if matched:
+                logger.info(f"✅ Section trouvée avec le sélecteur: {matched}")
+            
+            if not matched:
+                logger.warning("⚠️ Section 'Trafic par pays' non trouvée sur cette page")
+                return market_data
+            
+            # Extraire les données des pays
+            country_data = await page.evaluate(COUNTRY_TRAFFIC_JS)
+            
+            if country_data:
+                market_data.update(country_data)
+                logger.info(f"✅ Données de trafic extraites: {country_data}")
+            else:
+                logger.warning("⚠️ Aucune donnée de trafic par pays trouvée")
+                
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur extraction trafic par pays: {e}")
+        
+        logger.info(f"✅ Données de trafic extraites: {json.dumps(market_data, indent=2)}")
+        return market_data
 
 async def main():
     """Fonction principale pour tester l'extracteur"""
@@ -192,6 +187,9 @@ async def main():
         print("Usage: python3 market_traffic_extractor.py <shop_url>")
         sys.exit(1)
     
+    # Configuration du logging (uniquement en mode CLI)
+    logging.basicConfig(level=logging.INFO)
+    
     shop_url = sys.argv[1]
     extractor = MarketTrafficExtractor()
     
@@ -201,6 +199,8 @@ async def main():
     except Exception as e:
         print(f"❌ Erreur: {e}")
         sys.exit(1)
+    finally:
+        await close_browser_pool()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,52 +1,24 @@
 #!/usr/bin/env python3
 """
 Migration pour ajouter les colonnes live_ads_7d et live_ads_30d à la table shops
+Conservé pour compatibilité : délègue au moteur de migrations versionnées
+(migrations.py), qui applique aussi les migrations suivantes (index).
 """
 
-import sqlite3
 import os
-from datetime import datetime
+
+from migrations import DEFAULT_DB_PATHS, migrate
 
 def migrate_database():
     """Ajoute les colonnes live_ads_7d et live_ads_30d à la table shops"""
     
-    # Chemin vers la base de données (à adapter selon votre configuration)
-    db_paths = [
-        "trendtrack.db",
-        "test_trendtrack.db",
-        "/home/ubuntu/projects/shopshopshops/test/trendtrack-scraper-final/trendtrack.db"
-    ]
-    
-    for db_path in db_paths:
+    for db_path in DEFAULT_DB_PATHS:
         if os.path.exists(db_path):
             print(f"🔄 Migration de la base de données: {db_path}")
             
             try:
-                conn = sqlite3.connect(db_path)
-                cursor = conn.cursor()
-                
-                # Vérifier si les colonnes existent déjà
-                cursor.execute("PRAGMA table_info(shops)")
-                columns = [column[1] for column in cursor.fetchall()]
-                
-                # Ajouter live_ads_7d si elle n'existe pas
-                if 'live_ads_7d' not in columns:
-                    cursor.execute("ALTER TABLE shops ADD COLUMN live_ads_7d NUMERIC")
-                    print("✅ Colonne live_ads_7d ajoutée")
-                else:
-                    print("ℹ️ Colonne live_ads_7d existe déjà")
-                
-                # Ajouter live_ads_30d si elle n'existe pas
-                if 'live_ads_30d' not in columns:
-                    cursor.execute("ALTER TABLE shops ADD COLUMN live_ads_30d NUMERIC")
-                    print("✅ Colonne live_ads_30d ajoutée")
-                else:
-                    print("ℹ️ Colonne live_ads_30d existe déjà")
-                
-                conn.commit()
-                conn.close()
-                
-                print(f"✅ Migration terminée pour {db_path}")
+                version = migrate(db_path)
+                print(f"✅ Migration terminée pour {db_path} (schéma version {version})")
                 
             except Exception as e:
                 print(f"❌ Erreur migration {db_path}: {e}")
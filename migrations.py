@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Migrations versionnées du schéma SQLite TrendTrack
+Chaque migration a un numéro de version, s'exécute dans une seule transaction
+et est enregistrée dans la table schema_migrations. Les migrations déjà
+appliquées ne sont jamais rejouées.
+
+Usage: python3 migrations.py [<db_path> ...]
+"""
+
+import os
+import sys
+import sqlite3
+import logging
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Chemins par défaut (mêmes bases que l'ancien script de migration)
+DEFAULT_DB_PATHS = [
+    "trendtrack.db",
+    "test_trendtrack.db",
+    "/home/ubuntu/projects/shopshopshops/test/trendtrack-scraper-final/trendtrack.db"
+]
+
+Step = Union[str, Callable[[sqlite3.Connection], None]]
+
+
+class Migration:
+    """Migration versionnée : une liste d'étapes SQL (ou fonctions) appliquées ensemble"""
+
+    def __init__(self, version: int, description: str, steps: List[Step]):
+        self.version = version
+        self.description = description
+        self.steps = steps
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    """Colonnes existantes d'une table"""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def add_column_if_missing(table: str, column: str, column_type: str) -> Callable[[sqlite3.Connection], None]:
+    """Étape ALTER TABLE idempotente (bases déjà migrées à la main)"""
+    def step(conn: sqlite3.Connection):
+        if column not in table_columns(conn, table):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+    return step
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Colonnes live_ads_7d et live_ads_30d sur shops", [
+        add_column_if_missing("shops", "live_ads_7d", "NUMERIC"),
+        add_column_if_missing("shops", "live_ads_30d", "NUMERIC"),
+    ]),
+    Migration(2, "Index des requêtes chaudes sur shops (éligibilité, doublons, fraîcheur, source)", [
+        # Éligibilité : WHERE scraping_status IS NULL OR scraping_status IN (...) puis id > ? ORDER BY id
+        "CREATE INDEX IF NOT EXISTS idx_shops_scraping_status_id ON shops(scraping_status, id)",
+        # Fraîcheur : WHERE updated_at < ? ORDER BY updated_at
+        "CREATE INDEX IF NOT EXISTS idx_shops_updated_at ON shops(updated_at)",
+        # Doublons / recherche par URL
+        "CREATE INDEX IF NOT EXISTS idx_shops_shop_url ON shops(shop_url)",
+        # Filtre par source de projet
+        "CREATE INDEX IF NOT EXISTS idx_shops_project_source_status ON shops(project_source, scraping_status)",
+        "ANALYZE shops",
+    ]),
+    Migration(3, "Horodatage par métrique (fraîcheur / re-scraping incrémental)", [
+        """
+        CREATE TABLE IF NOT EXISTS metric_freshness (
+            shop_id INTEGER NOT NULL,
+            metric TEXT NOT NULL,
+            fetched_at TEXT NOT NULL,
+            PRIMARY KEY (shop_id, metric)
+        )
+        """,
+    ]),
+    Migration(4, "Index de la fraîcheur par métrique (sélection des boutiques à re-scraper)", [
+        # Métriques expirées : WHERE metric IN (...) AND fetched_at < ?
+        "CREATE INDEX IF NOT EXISTS idx_metric_freshness_metric_fetched ON metric_freshness(metric, fetched_at)",
+    ]),
+]
+
+
+def ensure_migrations_table(conn: sqlite3.Connection):
+    """Crée la table de suivi des versions appliquées"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """Version la plus haute appliquée (0 si aucune)"""
+    ensure_migrations_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()
+    return row[0] or 0
+
+
+def apply_migration(conn: sqlite3.Connection, migration: Migration):
+    """Applique une migration et l'enregistre, dans une seule transaction"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for step in migration.steps:
+            if callable(step):
+                step(conn)
+            else:
+                conn.execute(step)
+        conn.execute(
+            "INSERT INTO schema_migrations (version, description, applied_at) VALUES (?, ?, ?)",
+            (migration.version, migration.description, datetime.now(timezone.utc).isoformat())
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def migrate(db_path: str, target: Optional[int] = None, migrations: Optional[List[Migration]] = None) -> int:
+    """
+    Applique dans l'ordre les migrations manquantes (jusqu'à `target` inclus).
+    Retourne la version finale du schéma.
+    """
+    migrations = sorted(migrations if migrations is not None else MIGRATIONS, key=lambda m: m.version)
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        version = current_version(conn)
+        for migration in migrations:
+            if migration.version <= version or (target is not None and migration.version > target):
+                continue
+            logger.info(f"🔄 Migration {migration.version}: {migration.description} ({db_path})")
+            apply_migration(conn, migration)
+            version = migration.version
+            logger.info(f"✅ Migration {migration.version} appliquée")
+        return version
+    finally:
+        conn.close()
+
+
+def main():
+    """Migre les bases passées en argument (ou les chemins par défaut)"""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    db_paths = sys.argv[1:] or DEFAULT_DB_PATHS
+    for db_path in db_paths:
+        if not os.path.exists(db_path):
+            logger.warning(f"⚠️ Base de données non trouvée: {db_path}")
+            continue
+        try:
+            version = migrate(db_path)
+            logger.info(f"🎉 {db_path}: schéma en version {version}")
+        except Exception as e:
+            logger.error(f"❌ Erreur migration {db_path}: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,8 @@ import random
 import platform
 import multiprocessing
 import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone, timedelta
 
 # Import du convertisseur de dates centralisé
@@ -23,7 +25,7 @@ import os
 # Import local du module copié
 from date_converter import DateConverter, convert_api_response_dates
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 import sqlite3
 
 # Imports pour la refactorisation
@@ -33,6 +35,26 @@ from stealth_system import stealth_system
 import config
 from playwright.async_api import async_playwright
 from trendtrack_api import TrendTrackAPI
+from shop_page_extractor import ShopPageExtractor
+from stage_graph import StageGraph, format_stage_results
+from rpc_batcher import RPCBatcher
+from folder_index import FolderIndex
+from work_queue import ShopWorkQueue
+from analytics_prefetch import AnalyticsPrefetcher
+from write_behind import WriteBehindBuffer
+from shop_source import ShopSource, derive_eligible_statuses
+from migrations import migrate
+from analytics_format import EXTRA_METRICS, format_analytics
+from freshness import FreshnessPlanner, FreshnessStore, fetched_metrics
+from stage_metrics import REGISTRY, MetricsServer, summarize
+from rate_limiter import SharedRateLimiter
+from retry_policy import AUTH, RetryPolicy, classify
+from request_interception import InterceptionStats, RequestInterceptor
+from readiness import ReadinessProbes
+from response_capture import ResponseCapture, format_visit_duration
+from session_keeper import AUTH_COOKIES, CHECK_URL, shared_keeper
+from auth_state import AuthStateStore, load_cipher
+from auth_barrier import FAILED, PENDING, TIMEOUT, AuthBarrier
 api = TrendTrackAPI()
 
 # Configuration du logging
@@ -60,29 +82,6 @@ def setup_logging():
     logging.getLogger('playwright').setLevel(logging.WARNING)
     logging.getLogger('urllib3').setLevel(logging.WARNING)
 
-class LockManager:
-    """Gestionnaire de locks global pour session partagée"""
-    
-    def __init__(self, worker_id: int):
-        self.worker_id = worker_id
-        self.lock_file = "scraping_lock_global.lock"
-        self.lock_dir = Path("locks")
-        self.lock_dir.mkdir(exist_ok=True)
-        self.lock_path = self.lock_dir / self.lock_file
-    
-    def acquire_lock(self) -> bool:
-        """Acquiert le lock global (DÉSACTIVÉ - retourne toujours True)"""
-        logger.info(f"🔓 Worker {self.worker_id}: Système de locks désactivé - accès libre")
-        return True
-    
-    def release_lock(self):
-        """Libère le lock global (DÉSACTIVÉ - ne fait rien)"""
-        logger.info(f"🔓 Worker {self.worker_id}: Système de locks désactivé - libération ignorée")
-    
-    def is_locked(self) -> bool:
-        """Vérifie si le lock global existe (DÉSACTIVÉ - retourne toujours False)"""
-        return False
-
 class ParallelProductionScraper:
     """Scraper de production parallélisé avec session partagée"""
     
@@ -139,7 +138,13 @@ class ParallelProductionScraper:
             'na': 0,
             'failed': 0
         }
-        self.lock_manager = LockManager(worker_id)
+        self.auth_barrier = AuthBarrier("locks")
+        
+        # Gardien de la session du contexte partagé (créé après l'authentification)
+        self.session_keeper = None
+        
+        # storage_state authentifié persisté chiffré (démarrage sans login s'il est encore valide)
+        self.auth_state = AuthStateStore("auth_state.bin", load_cipher("auth_state.key"), auth_cookies=AUTH_COOKIES)
         
         # Initialisation des nouvelles métriques
         self.total_products = ""
@@ -161,6 +166,76 @@ class ParallelProductionScraper:
         # Initialisation de l'APIClient pour la refactorisation
         self.api_client = APIClient()
         
+        # Histogrammes de latence par étape (registre du processus, label worker)
+        self.stage_metrics = REGISTRY
+        
+        # Sondes de disponibilité (sélecteur, réponse JSON, URL, DOM stable) à la place des attentes fixes
+        self.readiness = ReadinessProbes(self.stage_metrics, worker_id)
+        
+        # Métriques lues dans les réponses JSON de la page (page.on('response')) avant le rendu
+        self.response_capture = ResponseCapture(readiness=self.readiness)
+        
+        # Extracteur TrendTrack composite exécuté dans le processus (page dédiée du worker)
+        self.shop_page_extractor = ShopPageExtractor(readiness=self.readiness)
+        self.extractor_page = None
+        self.extractor_timeout = 30  # secondes, identique à l'ancien subprocess
+        
+        # Interception des requêtes (page.route) : profil choisi à chaque navigation
+        self.request_stats = InterceptionStats()
+        self.page_interceptor = RequestInterceptor('dom-lite', self.request_stats)
+        self.extractor_interceptor = RequestInterceptor('dom-lite', self.request_stats)
+        
+        # DAG d'étapes par boutique : concurrence et timeouts par étape (secondes)
+        self.stage_concurrency = 4
+        self.stage_timeouts = {
+            'domain_overview': 300,
+            'shop_page': self.extractor_timeout + 5,
+            'pixel_data': 30,
+            'total_products': 30,
+            'aov': 30,
+            'cpc': 10
+        }
+        
+        # Débit partagé par famille d'endpoints entre tous les workers et processus (AIMD)
+        self.rate_limiter = SharedRateLimiter("rate_limits.db")
+        
+        # Retries : erreurs classées, jitter décorrélé, budget du run, disjoncteur par endpoint (partagés)
+        self.retry_policy = RetryPolicy("retry_state.db")
+        
+        # Appels organic.Summary groupés entre boutiques (pré-filtrage 'na' en masse)
+        self.rpc_batcher = RPCBatcher(lambda: self.page, max_batch=20, window=0.05, worker_id=worker_id,
+                                      rate_limiter=self.rate_limiter)
+        self.organic_prefetch_size = 20
+        
+        # File de travail partagée : nombre de boutiques louées à la fois
+        self.queue_batch_size = 4
+        self.queue_poll_interval = 0.5  # file vide mais encore alimentée
+        
+        # Analytics existantes lues par lot (une requête pour tout le lot loué)
+        self.analytics_prefetcher = AnalyticsPrefetcher(getattr(api, 'db_path', None), fallback=api.get_shop_analytics)
+        
+        # Fraîcheur des métriques (TTL par famille) : seules les étapes périmées sont relancées
+        self.freshness_planner = FreshnessPlanner()
+        self.freshness_store = FreshnessStore(api.db_path) if getattr(api, 'db_path', None) else None
+        self.metric_timestamps = {}
+        # Métriques récupérées pendant ce run, par boutique, en attente d'écriture
+        self.fetched_metrics: Dict[int, set] = {}
+        
+        # Écritures des analytics différées et groupées (journal disque par worker)
+        self.analytics_writer = WriteBehindBuffer(
+            self.write_analytics_rows,
+            f"analytics_journal_worker_{worker_id}.jsonl",
+            max_rows=20,
+            max_delay=5.0
+        )
+        self.organic_summary_cache = {}
+        
+        # Index domaine -> FID (chargé une fois par run, persisté sur disque)
+        self.folder_index = FolderIndex("folder_index.json")
+        
+        # Phase Domain Overview : 'concurrent' (appels API en parallèle) ou 'sequential'
+        self.overview_mode = 'concurrent'
+        
         # Configuration des timeouts adaptatifs
         self.selector_timeouts = {
             'organic_search_traffic': 30000,
@@ -330,25 +405,20 @@ class ParallelProductionScraper:
             
             logger.info(f"🌐 Worker {self.worker_id}: Domaine nettoyé: {clean_domain}")
             
-            # Utiliser APIClient au lieu du code direct
-            params = self.api_client.get_organic_params(clean_domain, target_date)
-            result = await self.api_client.call_rpc_api(self.page, "organic.Summary", params, self.worker_id)
+            # Réponse pré-chargée par le lot RPC si disponible, sinon appel direct via APIClient
+            result = self.organic_summary_cache.pop(clean_domain, None)
+            if result is not None:
+                logger.info(f"📦 Worker {self.worker_id}: organic.Summary pré-chargé (lot RPC) pour {clean_domain}")
+            else:
+                params = self.api_client.get_organic_params(clean_domain, target_date)
+                result = await self.call_rpc("organic.Summary", params)
             
             if not result:
                 logger.info(f"❌ Worker {self.worker_id}: Aucune donnée trouvée via API")
                 return None
             
-            if result.get('result') and len(result['result']) > 0:
-                # Chercher l'entrée USA (MÊME LOGIQUE que l'ancienne méthode)
-                us_entry = None
-                for entry in result['result']:
-                    if entry.get('database') == 'us':
-                        us_entry = entry
-                        break
-                
-                if not us_entry:
-                    us_entry = result['result'][0]
-                
+            us_entry = self.select_us_entry(result)
+            if us_entry:
                 organic_raw = us_entry.get('organicTraffic', 0)
                 paid_raw = us_entry.get('adwordsTraffic', 0)  # Traffic payant direct
                 cpc_raw = us_entry.get('adwordsCpc', us_entry.get('cpc', 0))  # CPC depuis la même session API
@@ -379,6 +449,88 @@ class ParallelProductionScraper:
             logger.error(f"❌ Worker {self.worker_id}: Erreur API organic.Summary (REFACTORISÉ): {error}")
             return None
     
+    def select_us_entry(self, result: Dict) -> Optional[Dict]:
+        """Retourne l'entrée USA d'une réponse organic.Summary (sinon la première)"""
+        if not result or not result.get('result'):
+            return None
+        for entry in result['result']:
+            if entry.get('database') == 'us':
+                return entry
+        return result['result'][0]
+    
+    def is_prefiltered_na(self, domain: str) -> bool:
+        """Vrai si la réponse organic.Summary pré-chargée place la boutique en 'na'"""
+        clean_domain = domain.replace('https://', '').replace('http://', '').replace('www.', '').strip('/')
+        us_entry = self.select_us_entry(self.organic_summary_cache.get(clean_domain))
+        return bool(us_entry) and us_entry.get('organicTraffic', 0) < 1000
+    
+    async def prefetch_organic_summaries(self, shops: List[Dict]):
+        """
+        Pré-charge organic.Summary pour un lot de boutiques via le RPCBatcher :
+        un seul page.evaluate pour tout le lot, et les boutiques 'na'
+        (organic < 1000) sont identifiées avant tout travail coûteux.
+        """
+        self.organic_summary_cache.clear()
+        domains = [shop.get('domain', '').replace('https://', '').replace('http://', '').replace('www.', '').strip('/')
+                   for shop in shops]
+        domains = [d for d in domains if d]
+        if not domains:
+            return
+        
+        try:
+            calls = [
+                self.rpc_batcher.call("organic.Summary", self.api_client.get_organic_params(d, self.target_date))
+                for d in domains
+            ]
+            with self.timed('rpc', 'organic.Summary[lot]'):
+                results = await asyncio.gather(*calls, return_exceptions=True)
+        except Exception as e:
+            logger.warning(f"⚠️ Worker {self.worker_id}: Pré-chargement organic.Summary impossible: {e}")
+            return
+        
+        for clean_domain, result in zip(domains, results):
+            # Les réponses en erreur ne sont pas gardées : appel direct plus tard
+            if isinstance(result, Exception) or not result or result.get('error'):
+                continue
+            self.organic_summary_cache[clean_domain] = result
+        
+        na_count = sum(1 for d in self.organic_summary_cache if self.is_prefiltered_na(d))
+        logger.info(f"📦 Worker {self.worker_id}: organic.Summary pré-chargé pour {len(self.organic_summary_cache)}/{len(domains)} boutiques ({na_count} 'na')")
+    
+    def timed(self, kind: str, name: str):
+        """Mesure un bloc dans l'histogramme (type, nom) de ce worker"""
+        return self.stage_metrics.time(kind, name, self.worker_id)
+    
+    async def call_rpc(self, method: str, params: Dict, send: Optional[Callable[[], Awaitable]] = None):
+        """
+        Appel RPC via APIClient, mesuré par méthode et soumis au débit partagé 'rpc'.
+        `send` remplace l'envoi générique call_rpc_api (méthodes dédiées d'APIClient).
+        Disjoncteur de la méthode ouvert : None tout de suite (comme "aucune donnée").
+        """
+        if not await asyncio.to_thread(self.retry_policy.allow_request, method):
+            logger.warning(f"🔌 Worker {self.worker_id}: {method} - Disjoncteur ouvert, échec immédiat")
+            return None
+        # Réponses de nos propres appels : jamais prises pour la synthèse de la page
+        self.response_capture.ignore_method(method)
+        await self.wait_for_session()
+        await self.rate_limiter.acquire('rpc')
+        start = time.perf_counter()
+        try:
+            with self.timed('rpc', method):
+                if send is not None:
+                    result = await send()
+                else:
+                    result = await self.api_client.call_rpc_api(self.page, method, params, self.worker_id)
+        except Exception as e:
+            await self.rate_limiter.report('rpc', e, time.perf_counter() - start)
+            await asyncio.to_thread(self.retry_policy.record_result, method, classify(e))
+            raise
+        await self.rate_limiter.report('rpc', result, time.perf_counter() - start)
+        await asyncio.to_thread(self.retry_policy.record_result, method, classify(result))
+        if classify(result) == AUTH:
+            await self.ensure_session(f"{method} refusé")
+        return result
+    
     def format_number(self, num: int) -> str:
         """Formate un nombre pour l'affichage"""
         if num >= 1000000:
@@ -396,32 +548,35 @@ class ParallelProductionScraper:
             target_date = self.target_date
             clean_domain = domain.replace('https://', '').replace('http://', '').replace('www.', '').strip('/')
             
-            # Appel API organic.OverviewTrend
-            result = await self.api_client.call_organic_overview_trend_api(self.page, clean_domain, self.worker_id, target_date)
+            # Appel API organic.OverviewTrend dédié d'APIClient (seul consommateur de cette méthode)
+            result = await self.call_rpc(
+                "organic.OverviewTrend",
+                {'domain': clean_domain, 'date': str(target_date)},
+                send=lambda: self.api_client.call_organic_overview_trend_api(self.page, clean_domain, self.worker_id, target_date)
+            )
             
             if not result:
                 return None
             
             # CORRECTION: Traiter la réponse de l'API avec le bon chemin
-            if result.get('data') and result['data'].get('result'):
-                overview_data = result['data']['result']
-                if overview_data and len(overview_data) > 0:
-                    # Prendre la dernière entrée (comme dans les fichiers qui fonctionnent)
-                    latest_data = overview_data[-1]
-                    
-                    # Extraire les métriques selon la documentation
-                    traffic_raw = latest_data.get('traffic', 0)
-                    branded_traffic_raw = latest_data.get('trafficBranded', 0)
-                    
-                    logger.info(f"✅ Worker {self.worker_id}: OverviewTrend - Traffic: {traffic_raw}, Branded: {branded_traffic_raw}")
-                    
-                    return {
-                        'traffic': str(traffic_raw),
-                        'branded_traffic': str(branded_traffic_raw),
-                        'traffic_raw': traffic_raw,
-                        'branded_traffic_raw': branded_traffic_raw,
-                        'source': 'organic.OverviewTrend API'
-                    }
+            overview_data = self.overview_trend_rows(result)
+            if overview_data:
+                # Prendre la dernière entrée (comme dans les fichiers qui fonctionnent)
+                latest_data = overview_data[-1]
+                
+                # Extraire les métriques selon la documentation
+                traffic_raw = latest_data.get('traffic', 0)
+                branded_traffic_raw = latest_data.get('trafficBranded', 0)
+                
+                logger.info(f"✅ Worker {self.worker_id}: OverviewTrend - Traffic: {traffic_raw}, Branded: {branded_traffic_raw}")
+                
+                return {
+                    'traffic': str(traffic_raw),
+                    'branded_traffic': str(branded_traffic_raw),
+                    'traffic_raw': traffic_raw,
+                    'branded_traffic_raw': branded_traffic_raw,
+                    'source': 'organic.OverviewTrend API'
+                }
             
             return None
             
@@ -429,6 +584,12 @@ class ParallelProductionScraper:
             logger.error(f"❌ Worker {self.worker_id}: Erreur API organic.OverviewTrend: {error}")
             return None
     
+    def overview_trend_rows(self, result: Optional[Dict]) -> List[Dict]:
+        """Lignes d'une réponse organic.OverviewTrend (`result` ou `data.result`)"""
+        if not result:
+            return []
+        return result.get('result') or (result.get('data') or {}).get('result') or []
+    
     async def setup_browser(self):
         """Configuration du navigateur avec session partagée via bootstrap global"""
         logger.info(f"🔧 Worker {self.worker_id}: Configuration du navigateur...")
@@ -438,89 +599,165 @@ class ParallelProductionScraper:
             from global_bootstrap import get_shared_browser_context
             self.context = await get_shared_browser_context()
             self.page = await self.context.new_page()
+            await self.page_interceptor.attach(self.page)
+            self.response_capture.attach(self.page)
             logger.info(f"✅ Worker {self.worker_id}: Navigateur configuré (session partagée)")
         except Exception as e:
             logger.error(f"❌ Worker {self.worker_id}: Erreur configuration navigateur: {e}")
             raise
     
     async def authenticate_mytoolsplan(self):
-        """Authentification MyToolsPlan avec gestion des locks pour session partagée"""
+        """Authentification MyToolsPlan : le Worker 0 s'authentifie, les autres attendent son résultat (barrière)"""
         logger.info(f"🔐 Worker {self.worker_id}: Authentification MyToolsPlan...")
 
         # Seul le Worker 0 fait l'authentification
         if self.worker_id == 0:
             logger.info(f"🔑 Worker {self.worker_id}: Authentification principale (Worker 0)")
             
-            # Acquérir le lock pour l'authentification
-            if not self.lock_manager.acquire_lock():
-                logger.warning(f"⚠️ Worker {self.worker_id}: Impossible d'acquérir le lock d'authentification")
-                return False
+            # Ouvrir la barrière : les autres workers attendent le résultat
+            await self.auth_barrier.begin()
+            authenticated = False
+            auth_error = ""
             
             try:
-                # Navigation vers la page de login
-                await self.page.goto("https://app.mytoolsplan.com/login", wait_until='domcontentloaded', timeout=20000)  # Réduit de 30s à 20s
-                await self.page.wait_for_load_state('networkidle')
-
-                # Récupérer les credentials
-                username, password = config.get_mytoolsplan_credentials()
-
-                # Remplir les champs de login
-                await self.page.fill('input[name="amember_login"]', username)
-                await self.page.fill('input[name="amember_pass"]', password)
-
-                # Soumettre le formulaire
-                try:
-                    await self.page.click('input[type="submit"][class="frm-submit"]')
-                except:
-                    await self.page.evaluate('document.querySelector("form[name=\"login\"]").submit()')
-
-                await self.page.wait_for_load_state('networkidle')
-                await asyncio.sleep(1)  # Réduit de 2s à 1s
-
-                # Vérifier que nous sommes sur la page membre
-                current_url = self.page.url
-                logger.info(f"✅ Worker {self.worker_id}: Login réussi, URL actuelle: {current_url}")
-
-                if "member" not in current_url.lower():
-                    logger.error(f"❌ Worker {self.worker_id}: Login échoué - Pas sur la page membre")
-                    return False
-
-                # Synchroniser les cookies avec sam.mytoolsplan.xyz
-                await self.sync_cookies_with_sam()
+                # État persisté encore accepté par le serveur : pas de login
+                if await self.restore_auth_state():
+                    logger.info(f"✅ Worker {self.worker_id}: Session restaurée depuis l'état persisté (login évité)")
+                    authenticated = True
+                    return True
                 
-                logger.info(f"✅ Worker {self.worker_id}: Authentification terminée")
-                return True
+                authenticated, auth_error = await self.login_with_form()
+                return authenticated
 
             except Exception as e:
                 error_msg = f"❌ Worker {self.worker_id}: Erreur lors de l'authentification: {e}"
                 logger.error(error_msg)
+                auth_error = str(e)
                 return False
             finally:
-                # Libérer le lock après l'authentification
-                self.lock_manager.release_lock()
-                logger.info(f"🔓 Worker {self.worker_id}: Lock d'authentification libéré")
+                # Publier le résultat : réveille aussitôt les workers en attente
+                self.auth_barrier.finish(authenticated, auth_error)
+                logger.info(f"🔓 Worker {self.worker_id}: Barrière d'authentification levée ({'succès' if authenticated else 'échec'})")
         
         else:
             # Les autres workers attendent que l'authentification soit terminée
             logger.info(f"⏳ Worker {self.worker_id}: Attente de l'authentification par Worker 0...")
             
-            # Attendre que le lock soit libéré (authentification terminée)
-            max_wait_time = 300  # 5 minutes max
-            wait_time = 0
-            while self.lock_manager.is_locked() and wait_time < max_wait_time:
-                await asyncio.sleep(5)
-                wait_time += 5
-                logger.info(f"⏳ Worker {self.worker_id}: Attente authentification... ({wait_time}s)")
+            # Réveil dès que le Worker 0 publie son résultat (5 minutes max)
+            started = time.perf_counter()
+            outcome = await self.auth_barrier.wait(timeout=300)
+            logger.info(f"⏳ Worker {self.worker_id}: Résultat de l'authentification après {time.perf_counter() - started:.1f}s: {outcome}")
             
-            if wait_time >= max_wait_time:
+            if outcome == TIMEOUT:
                 logger.error(f"❌ Worker {self.worker_id}: Timeout attente authentification")
                 return False
+            if outcome == FAILED:
+                logger.error(f"❌ Worker {self.worker_id}: Authentification du Worker 0 en échec")
+                return False
             
-            logger.info(f"✅ Worker {self.worker_id}: Authentification terminée par Worker 0")
-            return True
+            # Contexte partagé (mode async) déjà authentifié, ou état persisté par le Worker 0 (mode process)
+            if await self.restore_auth_state() or await self.has_valid_session():
+                logger.info(f"✅ Worker {self.worker_id}: Authentification terminée par Worker 0")
+                return True
+            
+            # Contexte sans session valide (processus séparé, état persisté absent ou expiré) : login propre
+            logger.warning(f"⚠️ Worker {self.worker_id}: Aucune session valide dans ce contexte - login complet")
+            try:
+                authenticated, auth_error = await self.login_with_form()
+            except Exception as e:
+                authenticated, auth_error = False, str(e)
+            if not authenticated:
+                logger.error(f"❌ Worker {self.worker_id}: Login de repli en échec: {auth_error}")
+            return authenticated
+    
+    async def login_with_form(self, page=None, interceptor: Optional[RequestInterceptor] = None) -> Tuple[bool, str]:
+        """
+        Login complet par le formulaire puis synchronisation des cookies ; retourne (succès, erreur).
+        Sur `page` si fournie (avec son intercepteur), sinon sur la page du worker.
+        """
+        page = page or self.page
+        interceptor = interceptor or self.page_interceptor
+        # Navigation vers la page de login (formulaire : DOM sans images ni trackers)
+        interceptor.use('dom-lite')
+        with self.timed('navigation', 'login'):
+            await page.goto("https://app.mytoolsplan.com/login", wait_until='domcontentloaded', timeout=20000)  # Réduit de 30s à 20s
+        # Formulaire affiché (au lieu de networkidle)
+        await self.readiness.selector(page, 'input[name="amember_login"]', 'login:form', 20)
+
+        # Récupérer les credentials
+        username, password = config.get_mytoolsplan_credentials()
+
+        # Remplir les champs de login
+        await page.fill('input[name="amember_login"]', username)
+        await page.fill('input[name="amember_pass"]', password)
+
+        # Soumettre le formulaire
+        try:
+            await page.click('input[type="submit"][class="frm-submit"]')
+        except:
+            await page.evaluate('document.querySelector("form[name=\"login\"]").submit()')
+
+        # Redirection vers l'espace membre (au lieu de networkidle + 1s)
+        await self.readiness.url(page, lambda url: "member" in url.lower(), 'login:member', 20, replaces=1.0)
+
+        # Vérifier que nous sommes sur la page membre
+        current_url = page.url
+        logger.info(f"✅ Worker {self.worker_id}: Login réussi, URL actuelle: {current_url}")
+
+        if "member" not in current_url.lower():
+            logger.error(f"❌ Worker {self.worker_id}: Login échoué - Pas sur la page membre")
+            return False, f"Pas sur la page membre ({current_url})"
+
+        # Synchroniser les cookies avec sam.mytoolsplan.xyz
+        if await self.sync_cookies_with_sam(page, interceptor):
+            await self.save_auth_state()
+        
+        logger.info(f"✅ Worker {self.worker_id}: Authentification terminée")
+        return True, ""
+    
+    async def restore_auth_state(self) -> bool:
+        """
+        Recharge les cookies de l'état persisté et les valide par une seule
+        requête (document seul) qui laisse la page là où le login complet la laisse.
+        """
+        state = await asyncio.to_thread(self.auth_state.load)
+        if not state:
+            return False
+        try:
+            await self.context.add_cookies(state.get('cookies', []))
+        except Exception as e:
+            logger.warning(f"⚠️ Worker {self.worker_id}: Cookies de l'état persisté refusés par le navigateur: {e}")
+            return False
+        valid = await self.has_valid_session()
+        if not valid:
+            logger.info(f"🔐 Worker {self.worker_id}: État persisté refusé par le serveur - login complet")
+            await asyncio.to_thread(self.auth_state.clear)
+        return valid
+    
+    async def has_valid_session(self) -> bool:
+        """Session du contexte acceptée par le serveur (analytics servi sans redirection vers le login)"""
+        try:
+            self.page_interceptor.use('api-only')
+            with self.timed('navigation', 'validation session'):
+                await self.page.goto(CHECK_URL, wait_until='domcontentloaded', timeout=10000)
+            return "analytics" in self.page.url and "login" not in self.page.url.lower()
+        except Exception as e:
+            logger.warning(f"⚠️ Worker {self.worker_id}: Validation de la session impossible: {e}")
+            return False
     
-    async def sync_cookies_with_sam(self):
-        """Synchronisation des cookies avec sam.mytoolsplan.xyz (optimisée)"""
+    async def save_auth_state(self):
+        """Enregistre le storage_state authentifié (chiffré) pour les runs et processus suivants"""
+        try:
+            state = await self.context.storage_state()
+            if await asyncio.to_thread(self.auth_state.save, state):
+                logger.info(f"💾 Worker {self.worker_id}: État d'authentification enregistré (chiffré)")
+        except Exception as e:
+            logger.warning(f"⚠️ Worker {self.worker_id}: Enregistrement de l'état d'authentification impossible: {e}")
+    
+    async def sync_cookies_with_sam(self, page=None, interceptor: Optional[RequestInterceptor] = None):
+        """Synchronisation des cookies avec sam.mytoolsplan.xyz (optimisée) ; par défaut sur la page du worker"""
+        page = page or self.page
+        interceptor = interceptor or self.page_interceptor
         logger.info(f"🔄 Worker {self.worker_id}: Synchronisation des cookies avec sam.mytoolsplan.xyz...")
         
         try:
@@ -538,10 +775,13 @@ class ParallelProductionScraper:
             
             # Test de la session directement (on est déjà sur app.mytoolsplan.com/member)
             logger.info(f"🔍 Worker {self.worker_id}: Test de la session sur app.mytoolsplan.com/analytics/...")
-            await self.page.goto("https://app.mytoolsplan.com/analytics/", wait_until='domcontentloaded', timeout=10000)  # Réduit de 15s à 10s
+            # Seule l'URL finale est lue : document uniquement
+            interceptor.use('api-only')
+            with self.timed('navigation', 'session app.mytoolsplan.com'):
+                await page.goto("https://app.mytoolsplan.com/analytics/", wait_until='domcontentloaded', timeout=10000)  # Réduit de 15s à 10s
             # Pas d'attente supplémentaire nécessaire
             
-            current_url = self.page.url
+            current_url = page.url
             if "analytics" in current_url:
                 logger.info(f"✅ Worker {self.worker_id}: Session synchronisée avec succès sur app.mytoolsplan.com")
                 return True
@@ -553,58 +793,91 @@ class ParallelProductionScraper:
             logger.error(f"❌ Worker {self.worker_id}: Erreur synchronisation cookies: {e}")
             return False
     
+    async def refresh_shared_session(self) -> bool:
+        """
+        Rafraîchit la session du contexte partagé sur une page dédiée (les pages
+        des workers restent où elles sont) : même test que sync_cookies_with_sam.
+        Session expirée (les cookies actuels ne suffisent plus) : login complet
+        par le formulaire sur cette même page, qui enregistre le nouvel état.
+        Appelé par le SessionKeeper : un seul rafraîchissement à la fois.
+        """
+        page = await self.context.new_page()
+        try:
+            interceptor = await RequestInterceptor('api-only', self.request_stats).attach(page)
+            auth_cookies = [c for c in await self.context.cookies() if c['name'] in AUTH_COOKIES]
+            if auth_cookies:
+                await self.context.add_cookies(auth_cookies)
+            with self.timed('navigation', 'session partagée'):
+                await page.goto(CHECK_URL, wait_until='domcontentloaded', timeout=10000)
+            if "analytics" in page.url and "login" not in page.url.lower():
+                await self.save_auth_state()
+                return True
+            
+            logger.warning(f"⚠️ Worker {self.worker_id}: Session partagée expirée - login complet")
+            authenticated, auth_error = await self.login_with_form(page, interceptor)
+            if not authenticated:
+                logger.error(f"❌ Worker {self.worker_id}: Login de rafraîchissement en échec: {auth_error}")
+            return authenticated
+        finally:
+            await page.close()
+    
+    async def wait_for_session(self):
+        """Avant un appel authentifié : attend le rafraîchissement de session en cours s'il y en a un"""
+        if self.session_keeper and not await self.session_keeper.wait_ready():
+            logger.warning(f"⚠️ Worker {self.worker_id}: Rafraîchissement de session trop long, appel sans attendre")
+    
+    async def ensure_session(self, reason: str) -> bool:
+        """Session suspecte : un seul contrôle / rafraîchissement pour tous les workers du processus"""
+        if self.session_keeper is None:
+            return await self.sync_cookies_with_sam()
+        return await self.session_keeper.ensure_fresh(f"Worker {self.worker_id}: {reason}")
+    
     async def navigate_with_smart_timeout(self, url, description=""):
         """Navigation avec timeout adaptatif"""
         try:
             logger.info(f"🌐 Worker {self.worker_id}: Navigation vers {description}")
-            await self.page.goto(url, wait_until='domcontentloaded', timeout=60000)  # 60s au lieu de 30s
-            await asyncio.sleep(1)
+            self.page_interceptor.use('dom-lite')
+            with self.timed('navigation', description):
+                await self.page.goto(url, wait_until='domcontentloaded', timeout=60000)  # 60s au lieu de 30s
+            # DOM stable (au plus 1s) au lieu de 1s fixe ici + 1s fixe chez l'appelant ;
+            # les sélecteurs de chaque métrique sont ensuite attendus par validate_selector_adaptive
+            await self.readiness.dom_quiet(self.page, f"navigation:{description}", deadline=1.0, replaces=2.0)
             return True
         except Exception as e:
             logger.error(f"❌ Worker {self.worker_id}: Erreur navigation {description}: {e}")
             return False
 
-    async def fetch_with_retry(self, fetch_code: str, description: str, max_retries: int = 3) -> dict:
-        """Exécute un appel fetch avec retry automatique et backoff adaptatif"""
-        for attempt in range(max_retries):
+    async def fetch_with_retry(self, fetch_code: str, description: str, max_retries: int = 3, arg=None,
+                               family: str = 'rpc') -> dict:
+        """
+        Exécute un appel fetch (`arg` passé au JS) selon la politique de retry :
+        seules les erreurs transitoires sont réessayées (jitter décorrélé, budget
+        du run) et le disjoncteur de l'endpoint fait échouer vite tous les workers.
+        Chaque tentative passe par le débit partagé de `family`.
+        """
+        # Le détail entre parenthèses (offset...) n'entre pas dans le nom de l'endpoint
+        endpoint = description.split(' (')[0]
+        
+        async def attempt():
+            await self.wait_for_session()
+            await self.rate_limiter.acquire(family)
+            start = time.perf_counter()
             try:
-                logger.debug(f"🔄 Worker {self.worker_id}: {description} (tentative {attempt + 1}/{max_retries})")
-                
-                result = await self.page.evaluate(fetch_code)
-                
-                # Vérifier si c'est une erreur fetch
-                if result.get('type') == 'fetch_error':
-                    error_msg = result.get('error', 'Unknown fetch error')
-                    logger.warning(f"⚠️ Worker {self.worker_id}: {description} - Fetch error: {error_msg} (tentative {attempt + 1})")
-                    
-                    # Si ce n'est pas la dernière tentative, attendre avant de retry
-                    if attempt < max_retries - 1:
-                        backoff_delay = (2 ** attempt) * 2  # 2s, 4s, 8s
-                        logger.info(f"🔄 Worker {self.worker_id}: Retry {description} dans {backoff_delay}s...")
-                        await asyncio.sleep(backoff_delay)
-                        continue
+                with self.timed('rpc', endpoint):
+                    if arg is not None:
+                        result = await self.page.evaluate(fetch_code, arg)
                     else:
-                        logger.error(f"❌ Worker {self.worker_id}: {description} - Toutes les tentatives ont échoué")
-                        return result
-                else:
-                    # Succès
-                    if attempt > 0:
-                        logger.info(f"✅ Worker {self.worker_id}: {description} - Succès après {attempt + 1} tentatives")
-                    return result
-                    
+                        result = await self.page.evaluate(fetch_code)
             except Exception as e:
-                logger.error(f"❌ Worker {self.worker_id}: {description} - Exception (tentative {attempt + 1}): {e}")
-                
-                # Si ce n'est pas la dernière tentative, attendre avant de retry
-                if attempt < max_retries - 1:
-                    backoff_delay = (2 ** attempt) * 2  # 2s, 4s, 8s
-                    logger.info(f"🔄 Worker {self.worker_id}: Retry {description} dans {backoff_delay}s...")
-                    await asyncio.sleep(backoff_delay)
-                else:
-                    logger.error(f"❌ Worker {self.worker_id}: {description} - Toutes les tentatives ont échoué")
-                    return {"success": False, "error": str(e), "type": "exception"}
+                await self.rate_limiter.report(family, e, time.perf_counter() - start)
+                raise
+            await self.rate_limiter.report(family, result, time.perf_counter() - start)
+            return result
         
-        return {"success": False, "error": "Max retries exceeded", "type": "max_retries"}
+        result = await self.retry_policy.run(endpoint, attempt, description, self.worker_id, max_attempts=max_retries)
+        if classify(result) == AUTH:
+            await self.ensure_session(f"{endpoint} refusé")
+        return result
 
     def count_metrics_detailed(self, analytics_data: Dict[str, str]):
         """Compte les métriques trouvées/not trouvées de manière détaillée"""
@@ -652,7 +925,8 @@ class ParallelProductionScraper:
         """Validation de sélecteur avec timeout adaptatif"""
         try:
             adaptive_timeout = api.calculate_adaptive_timeout(description, base_timeout)
-            element = await self.page.wait_for_selector(selector, timeout=adaptive_timeout)
+            with self.timed('selector', description):
+                element = await self.page.wait_for_selector(selector, timeout=adaptive_timeout)
             if element:
                 logger.info(f"✅ Worker {self.worker_id}: {description} trouvé")
                 return element
@@ -663,6 +937,92 @@ class ParallelProductionScraper:
             logger.warning(f"⚠️ Worker {self.worker_id}: {description} - Timeout: {e}")
             return None
     
+    async def capture_or_selector(self, metric: str, selector: str, description: str, deadline: float = 15) -> str:
+        """
+        Valeur d'une métrique depuis la réponse JSON capturée, ou depuis le DOM
+        quand le rendu arrive en premier (ou qu'aucune réponse reconnue n'arrive)
+        """
+        captured = asyncio.create_task(self.response_capture.wait_for([metric], deadline, name=f"capture:{metric}"))
+        rendered = asyncio.create_task(self.validate_selector_adaptive(selector, description))
+        try:
+            done, _ = await asyncio.wait({captured, rendered}, return_when=asyncio.FIRST_COMPLETED)
+            if captured in done and captured.result():
+                logger.info(f"✅ Worker {self.worker_id}: {description} (réponse capturée): {captured.result()[metric]}")
+                return captured.result()[metric]
+            element = await rendered
+            return await element.inner_text() if element else ""
+        finally:
+            for task in (captured, rendered):
+                if not task.done():
+                    task.cancel()
+    
+    async def fetch_overview_sequentially(self, domain: str, skip_organic: bool) -> Dict:
+        """
+        Appels de la phase Domain Overview un par un (mode historique).
+        Un retour 'na' d'organic.Summary arrête la phase immédiatement.
+        """
+        fetched = {'organic': None, 'engagement': {}, 'overview_trend': None, 'conversion_rate': ""}
+        if not skip_organic:
+            fetched['organic'] = await self.get_organic_traffic_via_api(domain)
+            if fetched['organic'] == 'na':
+                return fetched
+        
+        # Récupération des métriques engagement via API
+        fetched['engagement'] = await self.scrape_engagement_metrics(domain)
+        
+        # NOUVELLE API: Récupération des métriques manquantes via organic.OverviewTrend
+        fetched['overview_trend'] = await self.get_overview_trend_metrics_via_api(domain)
+        
+        # Récupérer conversion_rate via DOM scraping (SEULE MÉTRIQUE DOM)
+        logger.info(f"🔍 Worker {self.worker_id}: DEBUG - Appel scrape_purchase_conversion pour {domain}")
+        fetched['conversion_rate'] = await self.scrape_purchase_conversion(domain)
+        return fetched
+    
+    async def fetch_overview_concurrently(self, domain: str, skip_organic: bool) -> Dict:
+        """
+        Lance les appels API de la phase Domain Overview en même temps sur self.page
+        (Playwright multiplexe les page.evaluate concurrents).
+        - Règle 'na' conservée : si organic.Summary retourne 'na', les autres appels
+          sont annulés et la phase s'arrête comme en mode séquentiel
+        - Un appel qui lève une exception est rejoué en séquentiel
+        - conversion_rate lit la page (capture / DOM) : il passe après le groupe,
+          seul sur self.page, comme en mode séquentiel
+        """
+        calls = {
+            'engagement': lambda: self.scrape_engagement_metrics(domain),
+            'overview_trend': lambda: self.get_overview_trend_metrics_via_api(domain)
+        }
+        defaults = {'organic': None, 'engagement': {}, 'overview_trend': None, 'conversion_rate': ""}
+        if not skip_organic:
+            calls = {'organic': lambda: self.get_organic_traffic_via_api(domain), **calls}
+        
+        tasks = {name: asyncio.create_task(call()) for name, call in calls.items()}
+        fetched = dict(defaults)
+        
+        if 'organic' in tasks:
+            try:
+                fetched['organic'] = await tasks['organic']
+            except Exception as e:
+                logger.warning(f"⚠️ Worker {self.worker_id}: organic.Summary concurrent en échec: {e}")
+                fetched['organic'] = await self.get_organic_traffic_via_api(domain)
+            if fetched['organic'] == 'na':
+                for task in tasks.values():
+                    task.cancel()
+                await asyncio.gather(*tasks.values(), return_exceptions=True)
+                return fetched
+        
+        names = [name for name in tasks if name != 'organic']
+        outcomes = await asyncio.gather(*(tasks[name] for name in names), return_exceptions=True)
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"⚠️ Worker {self.worker_id}: Appel {name} concurrent en échec ({outcome}) - repli séquentiel")
+                outcome = await calls[name]()
+            fetched[name] = outcome
+        
+        # Seul appel dépendant du DOM : hors du groupe concurrent (la page ne bouge plus)
+        fetched['conversion_rate'] = await self.scrape_purchase_conversion(domain)
+        return fetched
+    
     async def scrape_domain_overview(self, domain: str, date_range: str, existing_metrics: Dict[str, str] = None):
         """Scraping de la page Domain Overview avec API organic.Summary"""
         logger.info(f"📊 Worker {self.worker_id}: Domain Overview pour {domain} (AVEC API organic.Summary)")
@@ -672,12 +1032,23 @@ class ParallelProductionScraper:
             logger.info(f"🚀 Worker {self.worker_id}: Utilisation de l'API organic.Summary (pas de navigation)")
             
             # Organic Search Traffic et Paid Search Traffic via API
-            if existing_metrics and existing_metrics.get("organic_traffic") and existing_metrics.get("organic_traffic") != "na":
+            skip_organic = bool(existing_metrics and existing_metrics.get("organic_traffic") and existing_metrics.get("organic_traffic") != "na")
+            if skip_organic:
                 logger.info(f"⏭️ Worker {self.worker_id}: Organic Traffic déjà présente: {existing_metrics.get('organic_traffic')} - SKIP")
                 # NE PAS retourner True ici - continuer avec les autres métriques
-            else:
-                # NOUVELLE LOGIQUE: Appel API organic.Summary
-                api_result = await self.get_organic_traffic_via_api(domain)
+            
+            # Appels API (organic.Summary, engagement, organic.OverviewTrend) + conversion DOM
+            fetched = None
+            if self.overview_mode == 'concurrent':
+                try:
+                    fetched = await self.fetch_overview_concurrently(domain, skip_organic)
+                except Exception as e:
+                    logger.warning(f"⚠️ Worker {self.worker_id}: Mode concurrent en échec ({e}) - repli séquentiel")
+            if fetched is None:
+                fetched = await self.fetch_overview_sequentially(domain, skip_organic)
+            
+            if not skip_organic:
+                api_result = fetched['organic']
                 
                 # GESTION DU STATUT 'na' - Même logique que le code existant
                 if api_result == 'na':
@@ -727,11 +1098,8 @@ class ParallelProductionScraper:
                     }
                     logger.warning(f"⚠️ Worker {self.worker_id}: Échec API organic.Summary")
             
-            # Récupération des métriques engagement via API
-            engagement_metrics = await self.scrape_engagement_metrics(domain)
-            
-            # NOUVELLE API: Récupération des métriques manquantes via organic.OverviewTrend
-            overview_trend_result = await self.get_overview_trend_metrics_via_api(domain)
+            engagement_metrics = fetched['engagement']
+            overview_trend_result = fetched['overview_trend']
             
             # Mettre à jour les métriques
             if 'domain_overview' not in self.session_data['data']:
@@ -750,9 +1118,8 @@ class ParallelProductionScraper:
                 self.session_data['data']['domain_overview']['traffic'] = ""
                 self.session_data['data']['domain_overview']['branded_traffic'] = ""
             
-            # Récupérer conversion_rate via DOM scraping (SEULE MÉTRIQUE DOM)
-            logger.info(f"🔍 Worker {self.worker_id}: DEBUG - Appel scrape_purchase_conversion pour {domain}")
-            conversion_rate = await self.scrape_purchase_conversion(domain)
+            # conversion_rate via DOM scraping (SEULE MÉTRIQUE DOM)
+            conversion_rate = fetched['conversion_rate']
             logger.info(f"🔍 Worker {self.worker_id}: DEBUG - Résultat scrape_purchase_conversion: '{conversion_rate}'")
             self.session_data['data']['domain_overview']['conversion_rate'] = conversion_rate
             
@@ -776,8 +1143,6 @@ class ParallelProductionScraper:
             if not success:
                 return False
             
-            await asyncio.sleep(1)
-            
             # Branded Traffic et Paid Search Traffic en parallèle
             async def scrape_branded_traffic():
                 if existing_metrics and existing_metrics.get("branded_traffic") and existing_metrics.get("branded_traffic") != "na":
@@ -831,6 +1196,7 @@ class ParallelProductionScraper:
         """Récupère bounce_rate et average_visit_duration via l'API engagement avec retry et fallback"""
         max_retries = 3
         base_timeout = 60000  # 60s au lieu de 30s
+        retry_delay = self.retry_policy.base_delay
         
         for attempt in range(max_retries):
             try:
@@ -879,6 +1245,9 @@ class ParallelProductionScraper:
                     max_retries=3
                 )
                 
+                if result.get("type") == "circuit_open":
+                    break
+                
                 if result.get("success") and result.get("data"):
                     api_data = result["data"]
                     
@@ -887,13 +1256,7 @@ class ParallelProductionScraper:
                         engagement_data = api_data.get('data', {})
                         
                         # Conversion des métriques (comme dans la version qui marchait)
-                        avg_duration_seconds = engagement_data.get('totalAvgVisitDuration', 0)
-                        if avg_duration_seconds:
-                            avg_duration_minutes = avg_duration_seconds // 60
-                            avg_duration_remaining_seconds = avg_duration_seconds % 60
-                            avg_duration_formatted = f"{avg_duration_minutes:02d}:{avg_duration_remaining_seconds:02d}"
-                        else:
-                            avg_duration_formatted = ""
+                        avg_duration_formatted = format_visit_duration(engagement_data.get('totalAvgVisitDuration', 0))
                         
                         # Pour bounce_rate, on prend la valeur décimale brute (pas de conversion en pourcentage)
                         bounce_rate = engagement_data.get("totalBounceRate", "")
@@ -909,41 +1272,57 @@ class ParallelProductionScraper:
                 else:
                     logger.warning(f"⚠️ Worker {self.worker_id}: API engagement échouée pour {domain} (tentative {attempt + 1})")
                 
-                # Si ce n'est pas la dernière tentative, attendre avant de retry
+                # Si ce n'est pas la dernière tentative, attendre avant de retry (jitter décorrélé, budget du run)
                 if attempt < max_retries - 1:
-                    backoff_delay = (2 ** attempt) * 2  # 2s, 4s, 8s
-                    logger.info(f"🔄 Worker {self.worker_id}: Retry dans {backoff_delay}s...")
-                    await asyncio.sleep(backoff_delay)
+                    if not await asyncio.to_thread(self.retry_policy.try_spend_retry):
+                        logger.warning(f"⚠️ Worker {self.worker_id}: Budget de retries du run épuisé")
+                        break
+                    retry_delay = self.retry_policy.next_delay(retry_delay)
+                    logger.info(f"🔄 Worker {self.worker_id}: Retry dans {retry_delay:.1f}s...")
+                    await asyncio.sleep(retry_delay)
                     
-                    # Resynchroniser les cookies avant retry
-                    logger.info(f"🔄 Worker {self.worker_id}: Resynchronisation des cookies avant retry...")
-                    await self.sync_cookies_with_sam()
+                    # Session contrôlée (et rafraîchie une seule fois pour tous) avant retry
+                    await self.ensure_session("API engagement en échec")
                 
             except Exception as e:
                 logger.error(f"❌ Worker {self.worker_id}: Erreur API engagement (tentative {attempt + 1}): {e}")
                 
-                # Si ce n'est pas la dernière tentative, attendre avant de retry
+                # Si ce n'est pas la dernière tentative, attendre avant de retry (jitter décorrélé, budget du run)
                 if attempt < max_retries - 1:
-                    backoff_delay = (2 ** attempt) * 2  # 2s, 4s, 8s
-                    logger.info(f"🔄 Worker {self.worker_id}: Retry dans {backoff_delay}s...")
-                    await asyncio.sleep(backoff_delay)
+                    if not await asyncio.to_thread(self.retry_policy.try_spend_retry):
+                        logger.warning(f"⚠️ Worker {self.worker_id}: Budget de retries du run épuisé")
+                        break
+                    retry_delay = self.retry_policy.next_delay(retry_delay)
+                    logger.info(f"🔄 Worker {self.worker_id}: Retry dans {retry_delay:.1f}s...")
+                    await asyncio.sleep(retry_delay)
                     
-                    # Resynchroniser les cookies avant retry
-                    logger.info(f"🔄 Worker {self.worker_id}: Resynchronisation des cookies avant retry...")
-                    await self.sync_cookies_with_sam()
+                    # Session contrôlée (et rafraîchie une seule fois pour tous) avant retry
+                    await self.ensure_session("API engagement en échec")
         
         # Si toutes les tentatives ont échoué, essayer le fallback DOM scraping
         logger.warning(f"⚠️ Worker {self.worker_id}: Toutes les tentatives API engagement ont échoué, tentative fallback DOM scraping...")
         return await self.scrape_engagement_metrics_fallback(domain)
 
     async def scrape_engagement_metrics_fallback(self, domain: str) -> Dict[str, str]:
-        """Fallback DOM scraping pour les métriques engagement si l'API échoue"""
+        """Fallback si l'API échoue : réponse JSON engagement capturée sur la page, sinon DOM scraping"""
         try:
             logger.info(f"🔄 Worker {self.worker_id}: Fallback DOM scraping pour engagement metrics...")
             
             # Navigation vers la page d'engagement
-            await self.page.goto("https://sam.mytoolsplan.xyz/analytics/engagement/", wait_until='domcontentloaded', timeout=60000)
-            await asyncio.sleep(3)
+            # Pas de reset : la capture est déjà limitée à cette boutique (process_shop)
+            self.page_interceptor.use('dom-lite')
+            with self.timed('navigation', 'Engagement'):
+                await self.page.goto("https://sam.mytoolsplan.xyz/analytics/engagement/", wait_until='domcontentloaded', timeout=60000)
+            
+            # Métriques lues dans la réponse JSON engagement dès son arrivée (au lieu de 3s fixes + DOM)
+            captured = await self.response_capture.wait_for(['bounce_rate', 'avg_visit_duration'], deadline=15,
+                                                            name='engagement:json', replaces=3.0)
+            if len(captured) == 2:
+                logger.info(f"✅ Worker {self.worker_id}: Engagement (réponse capturée) - Bounce: {captured['bounce_rate']}, Duration: {captured['avg_visit_duration']}")
+                return captured
+            
+            await self.readiness.selector(self.page, 'div[data-testid="bounce-rate"] span[data-testid="value"]',
+                                          'engagement:bounce_rate', deadline=5)
             
             # Scraping DOM pour bounce rate
             bounce_element = await self.page.query_selector('div[data-testid="bounce-rate"] span[data-testid="value"]')
@@ -978,25 +1357,26 @@ class ParallelProductionScraper:
             domain_clean = domain.replace("https://", "").replace("http://", "").replace("www.", "").strip("/")
             
             # Utiliser APIClient au lieu du code direct
+            await self.wait_for_session()
             result = await self.api_client.call_engagement_api(self.page, domain_clean, self.worker_id)
             
             if not result:
-                logger.warning(f"⚠️ Worker {self.worker_id}: API engagement (REFACTORISÉ) échouée pour {domain} - seconde tentative après resynchronisation cookies")
-                # Second essai: resynchroniser les cookies puis réessayer une fois
+                logger.warning(f"⚠️ Worker {self.worker_id}: API engagement (REFACTORISÉ) échouée pour {domain} - seconde tentative après contrôle de session")
+                # Second essai: session contrôlée (rafraîchissement partagé) puis une nouvelle tentative
                 try:
-                    await self.sync_cookies_with_sam()
-                    await asyncio.sleep(1)
+                    await self.ensure_session("API engagement en échec")
+                    await self.wait_for_session()
                     result_retry = await self.api_client.call_engagement_api(self.page, domain_clean, self.worker_id)
                     if result_retry.get('success'):
                         api_data = result_retry
                         if api_data.get('success', False):
                             engagement_data = api_data.get('data', {})
-                            avg_duration_seconds = engagement_data.get('totalAvgVisitDuration', 0)
+                            avg_duration = format_visit_duration(engagement_data.get('totalAvgVisitDuration', 0))
                             bounce_rate = engagement_data.get("totalBounceRate", "")
-                            logger.info(f"✅ Worker {self.worker_id}: Engagement API (retry) - Bounce: {bounce_rate}, Duration: {avg_duration_seconds}")
+                            logger.info(f"✅ Worker {self.worker_id}: Engagement API (retry) - Bounce: {bounce_rate}, Duration: {avg_duration}")
                             return {
                                 "bounce_rate": str(bounce_rate),
-                                "avg_visit_duration": str(avg_duration_seconds)
+                                "avg_visit_duration": avg_duration
                             }
                 except Exception:
                     pass
@@ -1014,17 +1394,15 @@ class ParallelProductionScraper:
                     engagement_data = api_data.get('data', {})
                     
                     
-                    # RETOURNER LES VALEURS BRUTES (RAW)
-                    avg_duration_seconds = engagement_data.get('totalAvgVisitDuration', 0)
+                    # Bounce rate brut ; durée en MM:SS comme le fallback (réponse capturée ou DOM)
+                    avg_duration = format_visit_duration(engagement_data.get('totalAvgVisitDuration', 0))
                     bounce_rate = engagement_data.get("totalBounceRate", "")
                     
-                    # TOUJOURS RETOURNER LES VALEURS RAW (BRUTES)
-                    logger.info(f"✅ Worker {self.worker_id}: Engagement API - Bounce: {bounce_rate}, Duration: {avg_duration_seconds}")
+                    logger.info(f"✅ Worker {self.worker_id}: Engagement API - Bounce: {bounce_rate}, Duration: {avg_duration}")
                     
-                    # RETOURNER LES VALEURS BRUTES
                     return {
                         "bounce_rate": str(bounce_rate),
-                        "avg_visit_duration": str(avg_duration_seconds)
+                        "avg_visit_duration": avg_duration
                     }
                 else:
                     logger.warning(f"⚠️ Worker {self.worker_id}: API engagement (REFACTORISÉ) retourne code: {api_data.get('code')}")
@@ -1046,59 +1424,82 @@ class ParallelProductionScraper:
                 "avg_visit_duration": ""
             }
     
-    async def scrape_visits_via_api(self, domain: str) -> str:
-        """
-        Récupère visits via l'API organic.OverviewTrend.
-        NOUVELLE MÉTHODE utilisant APIClient.
+    async def fetch_folder_page(self, offset: int, limit: int) -> dict:
+        """Récupère une page de folders/selector-list (pagination de l'index des dossiers)"""
+        fetch_code = """
+            async ({offset, limit}) => {
+                try {
+                    const response = await fetch(`/apis/v4-raw/folders/api/v0/folders/selector-list?limit=${limit}&offset=${offset}`, {
+                        method: 'GET',
+                        headers: {
+                            'Content-Type': 'application/json',
+                        }
+                    });
+                    
+                    if (!response.ok) {
+                        return { success: false, error: `HTTP ${response.status}: ${response.statusText}` };
+                    }
+                    
+                    const data = await response.json();
+                    return { success: true, data: data };
+                } catch (error) {
+                    return { 
+                        success: false, 
+                        error: error.message,
+                        type: 'fetch_error'
+                    };
+                }
+            }
         """
-        try:
-            
-            # Nettoyer le domaine (MÊME LOGIQUE que les autres APIs)
-            domain_clean = domain.replace("https://", "").replace("http://", "").replace("www.", "").strip("/")
-            
-            # Calculer la date cible (MÊME LOGIQUE que les autres APIs)
-            target_date = self.target_date
-            
-            # Utiliser APIClient pour organic.OverviewTrend
-            params = self.api_client.get_visits_params(domain_clean, target_date)
-            result = await self.api_client.call_rpc_api(self.page, "organic.OverviewTrend", params, self.worker_id)
-            
-            if not result or result.get("error"):
-                logger.warning(f"⚠️ Worker {self.worker_id}: API organic.OverviewTrend (visits) échouée pour {domain}")
-                return ""
-            
-            # Parser la réponse (structure à déterminer selon l'API)
-            if result.get("result") and len(result["result"]) > 0:
-                # Structure à adapter selon la réponse réelle de l'API
-                visits_data = result["result"][0]  # Premier élément
-                visits = visits_data.get("visits", "")
-                
-                logger.info(f"✅ Worker {self.worker_id}: Visits (API NOUVELLE): {visits}")
-                return str(visits) if visits else ""
-            else:
-                logger.warning(f"⚠️ Worker {self.worker_id}: Aucune donnée visits trouvée dans l'API organic.OverviewTrend")
-                return ""
-            
-        except Exception as e:
-            logger.error(f"❌ Worker {self.worker_id}: Erreur API organic.OverviewTrend (visits): {e}")
-            return ""
+        
+        return await self.fetch_with_retry(
+            fetch_code,
+            f"API folders/selector-list (offset {offset})",
+            max_retries=3,
+            arg={'offset': offset, 'limit': limit},
+            family='folders'
+        )
     
     async def get_folder_id_for_domain(self, domain: str) -> Optional[str]:
-        """🔍 Récupère le FID (Folder ID) pour un domaine via l'API"""
+        """🔍 Récupère le FID (Folder ID) pour un domaine via l'index des dossiers"""
         try:
             domain_clean = domain.replace('https://', '').replace('http://', '').replace('www.', '')
             logger.debug(f"🔍 Worker {self.worker_id}: DEBUG - Recherche FID pour domaine: {domain_clean}")
             
-            # 1. Récupérer la liste des projets/dossiers existants
-            logger.debug(f"🔍 Worker {self.worker_id}: DEBUG - Appel API folders/selector-list...")
+            # 1. Index des dossiers existants (pagination complète, chargé une fois par run)
+            if not await self.folder_index.load(self.fetch_folder_page):
+                logger.warning(f"⚠️ Worker {self.worker_id}: Index des dossiers indisponible")
+                return None
+            
+            existing_fid = self.folder_index.get(domain_clean)
+            if not existing_fid:
+                # Un autre worker a pu créer le dossier depuis : relire les dernières pages
+                await self.folder_index.refresh(self.fetch_folder_page)
+                existing_fid = self.folder_index.get(domain_clean)
+            
+            if existing_fid:
+                logger.debug(f"✅ Worker {self.worker_id}: DEBUG - FID existant trouvé: {existing_fid}")
+                return existing_fid
+            
+            # 2. Si pas trouvé, créer un nouveau dossier
+            logger.debug(f"🔍 Worker {self.worker_id}: DEBUG - Aucun FID existant, création d'un nouveau dossier...")
+            api_data = {
+                "properties": [
+                    {"name": {"value": domain_clean}},
+                    {"domain": {"value": domain_clean}}
+                ]
+            }
+            
+            logger.debug(f"🔍 Worker {self.worker_id}: DEBUG - Données création dossier: {api_data}")
             fetch_code = """
-                async () => {
+                async (apiData) => {
                     try {
-                        const response = await fetch('/apis/v4-raw/folders/api/v0/folders/selector-list?limit=2000&offset=0', {
-                            method: 'GET',
+                        const response = await fetch('/apis/v4-raw/folders/api/v0/folders', {
+                            method: 'POST',
                             headers: {
                                 'Content-Type': 'application/json',
-                            }
+                            },
+                            body: JSON.stringify(apiData)
                         });
                         
                         if (!response.ok) {
@@ -1117,82 +1518,24 @@ class ParallelProductionScraper:
                 }
             """
             
-            projects_response = await self.fetch_with_retry(
+            create_response = await self.fetch_with_retry(
                 fetch_code, 
-                "API folders/selector-list", 
-                max_retries=3
+                "API création dossier", 
+                max_retries=3,
+                arg=api_data,
+                family='folders'
             )
             
-            logger.debug(f"🔍 Worker {self.worker_id}: DEBUG - Réponse API folders: {projects_response}")
+            logger.debug(f"🔍 Worker {self.worker_id}: DEBUG - Réponse création dossier: {create_response}")
             
-            if projects_response.get('success', False):
-                folders_data = projects_response.get('data', {})
-                folders = folders_data.get('projects', [])
-                logger.debug(f"🔍 Worker {self.worker_id}: DEBUG - {len(folders)} dossiers trouvés")
-                
-                # Chercher un dossier existant pour ce domaine
-                for folder in folders:
-                    folder_domain = folder.get('domain', '').lower()
-                    logger.debug(f"🔍 Worker {self.worker_id}: DEBUG - Dossier trouvé: domain='{folder_domain}', id='{folder.get('id')}'")
-                    if folder_domain == domain_clean.lower() or folder_domain == domain_clean.lower().replace('www.', ''):
-                        existing_fid = folder.get('id')
-                        if existing_fid:
-                            logger.debug(f"✅ Worker {self.worker_id}: DEBUG - FID existant trouvé: {existing_fid}")
-                            return str(existing_fid)
-                
-                # Si pas trouvé, créer un nouveau dossier
-                logger.debug(f"🔍 Worker {self.worker_id}: DEBUG - Aucun FID existant, création d'un nouveau dossier...")
-                api_data = {
-                    "properties": [
-                        {"name": {"value": domain_clean}},
-                        {"domain": {"value": domain_clean}}
-                    ]
-                }
-                
-                logger.debug(f"🔍 Worker {self.worker_id}: DEBUG - Données création dossier: {api_data}")
-                fetch_code = """
-                    async (apiData) => {
-                        try {
-                            const response = await fetch('/apis/v4-raw/folders/api/v0/folders', {
-                                method: 'POST',
-                                headers: {
-                                    'Content-Type': 'application/json',
-                                },
-                                body: JSON.stringify(apiData)
-                            });
-                            
-                            if (!response.ok) {
-                                return { success: false, error: `HTTP ${response.status}: ${response.statusText}` };
-                            }
-                            
-                            const data = await response.json();
-                            return { success: true, data: data };
-                        } catch (error) {
-                            return { 
-                                success: false, 
-                                error: error.message,
-                                type: 'fetch_error'
-                            };
-                        }
-                    }
-                """
-                
-                create_response = await self.fetch_with_retry(
-                    fetch_code, 
-                    "API création dossier", 
-                    max_retries=3
-                )
-                
-                logger.debug(f"🔍 Worker {self.worker_id}: DEBUG - Réponse création dossier: {create_response}")
-                
-                if create_response.get('success', False):
-                    new_fid = create_response.get('data', {}).get('folder', {}).get('id')
-                    if new_fid:
-                        logger.debug(f"✅ Worker {self.worker_id}: DEBUG - Nouveau FID créé: {new_fid}")
-                        return str(new_fid)
-                        
+            if create_response.get('success', False):
+                new_fid = create_response.get('data', {}).get('folder', {}).get('id')
+                if new_fid:
+                    logger.debug(f"✅ Worker {self.worker_id}: DEBUG - Nouveau FID créé: {new_fid}")
+                    self.folder_index.add(domain_clean, new_fid)
+                    return str(new_fid)
             else:
-                logger.warning(f"⚠️ Worker {self.worker_id}: Erreur API projets: {projects_response.get('error', '')}")
+                logger.warning(f"⚠️ Worker {self.worker_id}: Erreur API création dossier: {create_response.get('error', '')}")
                 
         except Exception as e:
             logger.error(f"❌ Worker {self.worker_id}: Erreur récupération FID: {e}")
@@ -1201,9 +1544,17 @@ class ParallelProductionScraper:
 
     async def scrape_purchase_conversion(self, domain: str) -> str:
         """
-        Récupère conversion_rate via DOM scraping simple (méthode qui marchait).
+        Récupère conversion_rate depuis la réponse JSON capturée pour ce domaine
+        (attendue quelques secondes), sinon via DOM scraping simple (méthode qui marchait).
         """
         try:
+            # Réponse JSON de la page pour ce domaine, attendue au plus 5s avant le DOM
+            captured = await self.response_capture.wait_for(['conversion_rate'], deadline=5, scope=domain,
+                                                            name='capture:conversion_rate')
+            if captured:
+                logger.info(f"✅ Worker {self.worker_id}: Purchase Conversion (réponse capturée): {captured['conversion_rate']}")
+                return captured['conversion_rate']
+            
             logger.info(f"🔍 Worker {self.worker_id}: Récupération purchase conversion via DOM scraping")
             
             # Utiliser la méthode qui marchait : DOM scraping simple
@@ -1224,72 +1575,40 @@ class ParallelProductionScraper:
             logger.error(f"❌ Worker {self.worker_id}: Erreur purchase conversion DOM: {e}")
             return ""
             
-    async def scrape_market_traffic(self, domain: str) -> dict:
+    async def get_extractor_page(self):
         """
-        Récupère les données de trafic par pays (market_*)
+        Retourne la page dédiée aux extracteurs TrendTrack.
+        Séparée de self.page pour ne pas perdre l'origine sam.mytoolsplan.xyz
+        utilisée par les appels API.
         """
-        try:
-            logger.info(f"🌍 Worker {self.worker_id}: Récupération market traffic pour {domain}")
-            
-            # Appeler le script Python via subprocess
-            import subprocess
-            import json
-            
-            # Utiliser le fichier local corrigé
-            script_path = os.path.join(os.getcwd(), "market_traffic_extractor.py")
-            
-            result = subprocess.run([
-                "python3", script_path, domain
-            ], capture_output=True, text=True, timeout=30)
-            
-            if result.returncode == 0:
-                try:
-                    market_data = json.loads(result.stdout)
-                    logger.info(f"✅ Worker {self.worker_id}: Market traffic récupéré: {market_data}")
-                    return market_data
-                except json.JSONDecodeError:
-                    logger.warning(f"⚠️ Worker {self.worker_id}: Erreur parsing JSON market traffic")
-                    return {}
-            else:
-                logger.warning(f"⚠️ Worker {self.worker_id}: Erreur script market traffic: {result.stderr}")
-                return {}
-                
-        except Exception as e:
-            logger.error(f"❌ Worker {self.worker_id}: Erreur market traffic: {e}")
-            return {}
+        if self.extractor_page is None or self.extractor_page.is_closed():
+            self.extractor_page = await self.context.new_page()
+            # Les extracteurs ne lisent que le DOM : ni images, ni polices, ni trackers
+            await self.extractor_interceptor.attach(self.extractor_page)
+        return self.extractor_page
     
-    async def scrape_live_ads_progression(self, domain: str) -> dict:
+    async def scrape_shop_page_metrics(self, domain: str) -> dict:
         """
-        Récupère les variations de Live Ads (live_ads_7d, live_ads_30d)
+        Récupère en une seule navigation toutes les métriques de la page boutique
+        (market_*, live_ads_7d, live_ads_30d) via l'extracteur composite
         """
         try:
-            logger.info(f"📊 Worker {self.worker_id}: Récupération progression Live Ads pour {domain}")
-            
-            # Appeler le script Python via subprocess
-            import subprocess
-            import json
-            
-            # Utiliser le fichier local
-            script_path = os.path.join(os.getcwd(), "live_ads_progression_extractor.py")
+            logger.info(f"🧩 Worker {self.worker_id}: Récupération métriques page boutique pour {domain}")
             
-            result = subprocess.run([
-                "python3", script_path, f"https://{domain}"
-            ], capture_output=True, text=True, timeout=30)
+            page = await self.get_extractor_page()
+            with self.timed('extractor', 'shop_page'):
+                shop_page_data = await asyncio.wait_for(
+                    self.shop_page_extractor.extract_shop_page(f"https://{domain}", page=page),
+                    timeout=self.extractor_timeout
+                )
+            logger.info(f"✅ Worker {self.worker_id}: Métriques page boutique récupérées: {shop_page_data}")
+            return shop_page_data
             
-            if result.returncode == 0:
-                try:
-                    progression_data = json.loads(result.stdout)
-                    logger.info(f"✅ Worker {self.worker_id}: Progression Live Ads récupérée: {progression_data}")
-                    return progression_data
-                except json.JSONDecodeError:
-                    logger.warning(f"⚠️ Worker {self.worker_id}: Erreur parsing JSON progression Live Ads")
-                    return {}
-            else:
-                logger.warning(f"⚠️ Worker {self.worker_id}: Erreur script progression Live Ads: {result.stderr}")
-                return {}
-                
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Worker {self.worker_id}: Timeout page boutique ({self.extractor_timeout}s)")
+            return {}
         except Exception as e:
-            logger.error(f"❌ Worker {self.worker_id}: Erreur progression Live Ads: {e}")
+            logger.error(f"❌ Worker {self.worker_id}: Erreur page boutique: {e}")
             return {}
     
     async def scrape_pixel_data(self, domain: str) -> dict:
@@ -1805,9 +2124,15 @@ class ParallelProductionScraper:
         try:
             logger.info(f"🔍 Worker {self.worker_id}: Récupération métriques produits pour {domain}")
             
-            # Navigation vers la page du domaine
-            await self.page.goto(f"https://{domain}", wait_until="networkidle", timeout=30000)
-            await asyncio.sleep(2)
+            # Navigation vers la page du domaine (trackers relevés mais pas téléchargés)
+            self.page_interceptor.use('dom-lite')
+            self.page_interceptor.reset_trackers()
+            with self.timed('navigation', 'boutique'):
+                await self.page.goto(f"https://{domain}", wait_until="domcontentloaded", timeout=30000)
+            # Liens produits affichés puis DOM stable (trackers injectés) au lieu de networkidle + 2s
+            await self.readiness.selector(self.page, ['a[href*="/product"]', '.product-item', '[data-testid*="product"]'],
+                                          'boutique:produits', deadline=5, state='attached')
+            await self.readiness.dom_quiet(self.page, 'boutique:stable', deadline=2.0, quiet=0.5, replaces=2.0)
             
             metrics = {
                 'total_products': "",
@@ -1827,11 +2152,12 @@ class ParallelProductionScraper:
             except Exception as e:
                 logger.warning(f"⚠️ Worker {self.worker_id}: Erreur détection produits: {e}")
             
-            # Détection des pixels de tracking
+            # Détection des pixels de tracking (requêtes de trackers vues par l'interception + DOM)
+            tracker_pixels = self.page_interceptor.detected_pixels()
             try:
                 # Chercher Google Analytics/Google Tag Manager
                 google_scripts = await self.page.query_selector_all('script[src*="googletagmanager"], script[src*="google-analytics"], script:has-text("gtag")')
-                if google_scripts:
+                if google_scripts or tracker_pixels['pixel_google'] == 'present':
                     metrics['pixel_google'] = "present"
                     logger.info(f"✅ Worker {self.worker_id}: Pixel Google détecté")
                 else:
@@ -1843,7 +2169,7 @@ class ParallelProductionScraper:
             try:
                 # Chercher Facebook Pixel
                 fb_scripts = await self.page.query_selector_all('script[src*="facebook"], script:has-text("fbq"), script:has-text("Facebook")')
-                if fb_scripts:
+                if fb_scripts or tracker_pixels['pixel_facebook'] == 'present':
                     metrics['pixel_facebook'] = "present"
                     logger.info(f"✅ Worker {self.worker_id}: Pixel Facebook détecté")
                 else:
@@ -1952,43 +2278,6 @@ class ParallelProductionScraper:
                 'cpc': ""
             }
     
-    async def scrape_conversion_rate_via_api(self, domain: str) -> str:
-        """
-        Récupère conversion_rate via l'API organic.OverviewTrend.
-        NOUVELLE MÉTHODE utilisant APIClient.
-        """
-        try:
-            
-            # Nettoyer le domaine (MÊME LOGIQUE que les autres APIs)
-            domain_clean = domain.replace("https://", "").replace("http://", "").replace("www.", "").strip("/")
-            
-            # Calculer la date cible (MÊME LOGIQUE que les autres APIs)
-            target_date = self.target_date
-            
-            # Utiliser APIClient pour organic.OverviewTrend
-            params = self.api_client.get_conversion_params(domain_clean, target_date)
-            result = await self.api_client.call_rpc_api(self.page, "organic.OverviewTrend", params, self.worker_id)
-            
-            if not result or result.get("error"):
-                logger.warning(f"⚠️ Worker {self.worker_id}: API organic.OverviewTrend (conversion) échouée pour {domain}")
-                return ""
-            
-            # Parser la réponse (structure à déterminer selon l'API)
-            if result.get("result") and len(result["result"]) > 0:
-                # Structure à adapter selon la réponse réelle de l'API
-                conversion_data = result["result"][0]  # Premier élément
-                conversion_rate = conversion_data.get("conversion_rate", "")
-                
-                logger.info(f"✅ Worker {self.worker_id}: Conversion Rate (API NOUVELLE): {conversion_rate}")
-                return str(conversion_rate) if conversion_rate else ""
-            else:
-                logger.warning(f"⚠️ Worker {self.worker_id}: Aucune donnée conversion_rate trouvée dans l'API organic.OverviewTrend")
-                return ""
-            
-        except Exception as e:
-            logger.error(f"❌ Worker {self.worker_id}: Erreur API organic.OverviewTrend (conversion): {e}")
-            return ""
-    
     async def scrape_traffic_analysis(self, domain: str, date_range: str, existing_metrics: Dict[str, str] = None):
         """Scraping de la page Traffic Analysis - VÉRIFIE AVANT DE SCRAPER"""
         logger.info(f"📊 Worker {self.worker_id}: Traffic Analysis pour {domain}")
@@ -1996,23 +2285,22 @@ class ParallelProductionScraper:
         try:
             url = f"https://app.mytoolsplan.com/analytics/traffic/traffic-overview/?db=us&q={domain}&searchType=domain&date={date_range}"
             
+            self.response_capture.reset(scope=domain)
             success = await self.navigate_with_smart_timeout(url, "Traffic Analysis")
             if not success:
                 return False
             
-            await asyncio.sleep(1)
-            
             # Visits et Conversion Rate en parallèle
             async def scrape_visits():
                 if existing_metrics and existing_metrics.get("visits") and existing_metrics.get("visits") != "na":
                     logger.info(f"⏭️ Worker {self.worker_id}: Visits déjà présents: {existing_metrics.get('visits')} - SKIP")
                     return existing_metrics.get("visits")
                 else:
-                    element = await self.validate_selector_adaptive(
+                    return await self.capture_or_selector(
+                        'visits',
                         'div[data-testid="summary-cell visits"] > div > div > div > span[data-testid="value"]',
                         "Visits"
                     )
-                    return await element.inner_text() if element else ""
             
             async def scrape_conversion_rate():
                 logger.info(f"🔍 Worker {self.worker_id}: DEBUG - Début scrape_conversion_rate")
@@ -2022,21 +2310,20 @@ class ParallelProductionScraper:
                     logger.info(f"⏭️ Worker {self.worker_id}: Conversion Rate déjà présent: {existing_metrics.get('conversion_rate')} - SKIP")
                     return existing_metrics.get("conversion_rate")
                 else:
-                    logger.info(f"🔍 Worker {self.worker_id}: DEBUG - Conversion Rate non présent, début DOM scraping")
+                    logger.info(f"🔍 Worker {self.worker_id}: DEBUG - Conversion Rate non présent, réponse JSON ou DOM scraping")
                     logger.info(f"🔍 Worker {self.worker_id}: DEBUG - URL actuelle avant scraping: {self.page.url}")
                     
-                    element = await self.validate_selector_adaptive(
+                    result = await self.capture_or_selector(
+                        'conversion_rate',
                         'div[data-testid="summary-cell conversion"] > div > div > div > span[data-testid="value"]',
                         "Purchase Conversion"
                     )
                     
-                    if element:
-                        result = await element.inner_text()
+                    if result:
                         logger.info(f"✅ Worker {self.worker_id}: DEBUG - Conversion Rate trouvé: {result}")
-                        return result
                     else:
-                        logger.warning(f"⚠️ Worker {self.worker_id}: DEBUG - Conversion Rate non trouvé via DOM scraping")
-                        return ""
+                        logger.warning(f"⚠️ Worker {self.worker_id}: DEBUG - Conversion Rate non trouvé (réponse ni DOM)")
+                    return result
             
             # Exécuter en parallèle
             visits, conversion_rate = await asyncio.gather(
@@ -2065,74 +2352,12 @@ class ParallelProductionScraper:
     
     def format_analytics_for_api(self) -> Dict[str, str]:
         """Formate les données de session pour l'API"""
-        analytics_data = {
-            "organic_traffic": "",
-            "bounce_rate": "",
-            "average_visit_duration": "",
-            "branded_traffic": "",
-            "conversion_rate": "",
-            "paid_search_traffic": "",
-            "traffic": "",
-            "percent_branded_traffic": "",
-            "visits": "",
-            # NOUVEAUX CHAMPS
-            "total_products": "",
-            "pixel_google": "",
-            "pixel_facebook": "",
-            "aov": "",
-            "market_us": "",
-            "market_uk": "",
-            "market_de": "",
-            "market_ca": "",
-            "market_au": "",
-            "market_fr": "",
-            "cpc": ""
-        }
-        
-        # Récupérer les données de domain_overview
-        if 'domain_overview' in self.session_data['data']:
-            domain_data = self.session_data['data']['domain_overview']
-            analytics_data['organic_traffic'] = domain_data.get('organic_search_traffic', '')
-            analytics_data['paid_search_traffic'] = domain_data.get('paid_search_traffic', '')
-            analytics_data['bounce_rate'] = domain_data.get('bounce_rate', '')
-            analytics_data['average_visit_duration'] = domain_data.get('avg_visit_duration', '')
-            analytics_data['traffic'] = domain_data.get('traffic', '')
-            analytics_data['branded_traffic'] = domain_data.get('branded_traffic', '')
-            analytics_data['conversion_rate'] = domain_data.get('conversion_rate', '')
-            
-            # NOUVEAUX CHAMPS - Récupération des métriques supplémentaires
-            analytics_data['total_products'] = domain_data.get('total_products', '')
-            analytics_data['pixel_google'] = domain_data.get('pixel_google', '')
-            analytics_data['pixel_facebook'] = domain_data.get('pixel_facebook', '')
-            analytics_data['aov'] = domain_data.get('aov', '')
-            analytics_data['market_us'] = domain_data.get('market_us', '')
-            analytics_data['market_uk'] = domain_data.get('market_uk', '')
-            analytics_data['market_de'] = domain_data.get('market_de', '')
-            analytics_data['market_ca'] = domain_data.get('market_ca', '')
-            analytics_data['market_au'] = domain_data.get('market_au', '')
-            analytics_data['market_fr'] = domain_data.get('market_fr', '')
-            analytics_data['cpc'] = domain_data.get('cpc', '')
-        
-        # Récupérer les données de traffic_analysis (visits)
-        if 'traffic_analysis' in self.session_data['data']:
-            traffic_data = self.session_data['data']['traffic_analysis']
-            analytics_data['visits'] = traffic_data.get('visits', '')
+        extra = {metric: getattr(self, metric, '') for metric in EXTRA_METRICS}
+        analytics_data = format_analytics(self.session_data, extra)
         
         # Calculer percent_branded_traffic selon la formule de la doc
         analytics_data['percent_branded_traffic'] = self.calculate_percent_branded_traffic(analytics_data)
         
-        # Récupérer les nouvelles métriques depuis les attributs de la classe
-        new_metrics = [
-            'total_products', 'pixel_google', 'pixel_facebook', 'aov', 'cpc',
-            'market_us', 'market_uk', 'market_de', 'market_ca', 'market_au', 'market_fr'
-        ]
-        
-        for metric in new_metrics:
-            if hasattr(self, metric):
-                value = getattr(self, metric, '')
-                if value:
-                    analytics_data[metric] = str(value)
-        
         return analytics_data
     
     def calculate_percent_branded_traffic(self, analytics_data: Dict[str, str]) -> str:
@@ -2189,11 +2414,320 @@ class ParallelProductionScraper:
         except (ValueError, TypeError):
             return 0.0
     
-    async def run_worker(self, shops: List[Dict], date_range: str) -> str:
-        """Exécute le scraping pour une liste de boutiques"""
+    def build_shop_stage_graph(self, domain: str, date_range: str, existing_metrics: Dict[str, str]) -> StageGraph:
+        """
+        Déclare le travail d'une boutique sous forme de DAG d'étapes.
+        - domain_overview : APIs MyToolsPlan (organic.Summary, engagement, ...) ; un
+          retour 'na' ou un échec annule le reste de la boutique
+        - cpc : dépend du résultat organic.Summary (domain_overview)
+        - shop_page, pixel_data, total_products, aov : indépendantes
+        Seules les étapes dont une métrique est absente ou périmée sont lancées.
+        """
+        stale_stages = self.freshness_planner.stale_stages(existing_metrics)
+        skipped_stages = [name for name in self.stage_timeouts if name not in stale_stages]
+        if skipped_stages:
+            logger.info(f"⏭️ Worker {self.worker_id}: Étapes à jour ignorées pour {domain}: {', '.join(skipped_stages)}")
+        
+        async def fresh_overview():
+            return True
+        
+        graph = StageGraph(max_concurrency=self.stage_concurrency)
+        graph.add_stage(
+            'domain_overview',
+            (lambda deps: self.scrape_domain_overview(domain, date_range, existing_metrics))
+            if 'domain_overview' in stale_stages else (lambda deps: fresh_overview()),
+            timeout=self.stage_timeouts['domain_overview'],
+            abort_on=lambda value: value == 'na' or not value
+        )
+        
+        # Boutique déjà identifiée 'na' par le pré-chargement : inutile de lancer le reste
+        organic_skipped = existing_metrics.get("organic_traffic") and existing_metrics.get("organic_traffic") != "na"
+        if not organic_skipped and self.is_prefiltered_na(domain):
+            logger.info(f"⏭️ Worker {self.worker_id}: {domain} pré-filtré 'na' - étapes supplémentaires ignorées")
+            return graph
+        
+        stages = {
+            'shop_page': (lambda deps: self.scrape_shop_page_metrics(domain), ()),
+            'pixel_data': (lambda deps: self.scrape_pixel_data(domain), ()),
+            'total_products': (lambda deps: self.scrape_total_products(domain), ()),
+            'aov': (lambda deps: self.scrape_aov(domain), ()),
+            'cpc': (lambda deps: self.scrape_cpc(domain), ('domain_overview',)),
+        }
+        for name, (func, depends_on) in stages.items():
+            if name in stale_stages:
+                graph.add_stage(name, func, depends_on=depends_on, timeout=self.stage_timeouts[name])
+        return graph
+    
+    def apply_stage_results(self, stage_results: Dict[str, Dict]):
+        """Reporte les valeurs des étapes supplémentaires sur les attributs du scraper"""
+        def value_of(stage_name):
+            stage_result = stage_results.get(stage_name, {})
+            if stage_result.get('status') != 'success':
+                if stage_result:
+                    logger.warning(f"⚠️ Worker {self.worker_id}: Étape {stage_name} {stage_result.get('status')}: {stage_result.get('error')}")
+                return None
+            return stage_result.get('value')
+        
+        # 1. Page boutique TrendTrack en une navigation :
+        #    market traffic (trafic par pays) + P0: progression Live Ads (7d et 30d)
+        shop_page_data = value_of('shop_page')
+        if shop_page_data:
+            for market_key in ['market_us', 'market_uk', 'market_de', 'market_ca', 'market_au', 'market_fr']:
+                market_value = shop_page_data.get(market_key)
+                if market_value is not None:
+                    setattr(self, market_key, str(market_value))
+                    logger.info(f"✅ Worker {self.worker_id}: {market_key}: {market_value}")
+            for progression_key in ['live_ads_7d', 'live_ads_30d']:
+                progression_value = shop_page_data.get(progression_key)
+                if progression_value is not None:
+                    setattr(self, progression_key, str(progression_value))
+                    logger.info(f"✅ Worker {self.worker_id}: {progression_key}: {progression_value}%")
+        
+        # 2. Pixel data (pixels Google/Facebook)
+        pixel_data = value_of('pixel_data')
+        if pixel_data:
+            for pixel_key, pixel_value in pixel_data.items():
+                setattr(self, pixel_key, pixel_value)
+                logger.info(f"✅ Worker {self.worker_id}: {pixel_key}: {pixel_value}")
+        
+        # 3. Total products
+        total_products = value_of('total_products')
+        if total_products:
+            self.total_products = total_products
+            logger.info(f"✅ Worker {self.worker_id}: total_products: {total_products}")
+        
+        # 4. AOV (Average Order Value)
+        aov = value_of('aov')
+        if aov:
+            self.aov = aov
+            logger.info(f"✅ Worker {self.worker_id}: aov: {aov}")
+        
+        # 5. CPC (Cost Per Click)
+        cpc = value_of('cpc')
+        if cpc:
+            self.cpc = cpc
+            logger.info(f"✅ Worker {self.worker_id}: cpc: {cpc}")
+    
+    async def process_shop(self, shop: Dict, date_range: str, index: int, total_shops) -> bool:
+        """Traite une boutique complète ; retourne True si la boutique est réussie"""
+        domain = shop.get('domain', '')
+        shop_id = shop.get('id', '')
+        
+        try:
+            logger.info(f"🎯 Worker {self.worker_id}: Traitement {index}/{total_shops} - {domain} (ID: {shop_id})")
+            
+            self.reset_shop_state()
+            # Réponses capturées à partir d'ici : celles de cette boutique uniquement
+            self.response_capture.reset(scope=domain)
+            
+            # Récupérer les métriques existantes pour le scraper intelligent
+            # (seules les métriques encore fraîches selon leur TTL sont gardées)
+            existing_metrics = await self.analytics_prefetcher.get(shop_id)
+            timestamps = await self.get_metric_timestamps(shop_id)
+            existing_metrics = self.freshness_planner.fresh_metrics(existing_metrics, timestamps)
+            if timestamps is not None:
+                self.seed_fresh_metrics(existing_metrics)
+            if existing_metrics:
+                logger.info(f"🔍 Worker {self.worker_id}: Métriques existantes trouvées pour {domain}")
+                # Afficher les métriques existantes pour debug
+                for metric, value in existing_metrics.items():
+                    if value and value != 'na' and value != '':
+                        logger.info(f"🔍 Worker {self.worker_id}: {metric}: {value}")
+                
+                # Compter les métriques skippées car déjà présentes
+                self.count_metrics_skipped(existing_metrics)
+            else:
+                logger.info(f"🔍 Worker {self.worker_id}: Aucune métrique existante pour {domain}")
+                existing_metrics = {}
+            
+            # Scraping du domaine et des métriques supplémentaires (DAG d'étapes)
+            graph = self.build_shop_stage_graph(domain, date_range, existing_metrics)
+            stage_results = await graph.run()
+            logger.info(f"⏱️ Worker {self.worker_id}: Étapes {domain}: {format_stage_results(stage_results)}")
+            for stage_name, stage_result in stage_results.items():
+                if stage_result['status'] not in ('skipped', 'cancelled'):
+                    self.stage_metrics.observe('stage', stage_name, stage_result['duration'], self.worker_id,
+                                               error=stage_result['status'] != 'success')
+            
+            overview = stage_results['domain_overview']
+            result = overview['value'] if overview['status'] == 'success' else False
+            
+            if result == 'na':
+                logger.info(f"ℹ️ Worker {self.worker_id}: {domain} marqué comme 'na' (organic traffic < 1000)")
+                # Enregistrer en BDD avec statut 'na'
+                analytics_data = self.format_analytics_for_api()
+                self.note_fetched_metrics(shop_id, analytics_data, existing_metrics)
+                await self.analytics_writer.add(shop_id, analytics_data)
+                self.analytics_prefetcher.invalidate(shop_id)
+                self.count_status('na')
+                logger.info(f"💾 Worker {self.worker_id}: {domain} enregistré en BDD avec statut 'na'")
+                return False
+            elif result:
+                # Toutes les métriques sont récupérées via les APIs dans scrape_domain_overview
+                logger.info(f"✅ Worker {self.worker_id}: {domain} traité avec succès")
+                
+                # NOUVEAUX TRAITEMENTS - Métriques supplémentaires issues du DAG
+                self.apply_stage_results(stage_results)
+                logger.info(f"🎉 Worker {self.worker_id}: Toutes les métriques supplémentaires récupérées pour {domain}")
+                
+                # Enregistrer en BDD avec validation adaptative
+                analytics_data = self.format_analytics_for_api()
+                # Comptage métriques détaillé
+                self.count_metrics_detailed(analytics_data)
+                
+                # Comptage global (pour compatibilité)
+                required_metrics = [
+                    'organic_traffic', 'paid_search_traffic', 'visits', 'bounce_rate',
+                    'average_visit_duration', 'branded_traffic', 'conversion_rate', 'percent_branded_traffic'
+                ]
+                found_count = sum(1 for m in required_metrics if analytics_data.get(m) not in (None, '', 'N/A'))
+                not_found_count = len(required_metrics) - found_count
+                self.metrics_found += found_count
+                self.metrics_not_found += not_found_count
+                status = self.validate_metrics_status(analytics_data)
+                self.note_fetched_metrics(shop_id, analytics_data, existing_metrics)
+                await self.analytics_writer.add(shop_id, analytics_data)
+                self.analytics_prefetcher.invalidate(shop_id)
+                self.count_status(status)
+                logger.info(f"💾 Worker {self.worker_id}: {domain} enregistré en BDD avec statut '{status}'")
+                return True
+            else:
+                if overview['status'] != 'success':
+                    logger.warning(f"⚠️ Worker {self.worker_id}: Domain Overview {overview['status']}: {overview['error']}")
+                logger.warning(f"⚠️ Worker {self.worker_id}: {domain} échoué")
+                self.count_status('failed')
+                return False
+                
+        except Exception as e:
+            logger.error(f"❌ Worker {self.worker_id}: Erreur sur {domain}: {e}")
+            self.count_status('failed')
+            return False
+    
+    def reset_shop_state(self):
+        """Remet à zéro les données de la boutique précédente avant d'en traiter une nouvelle"""
+        self.session_data = {'data': {}}
+        for metric in ['total_products', 'pixel_google', 'pixel_facebook', 'aov', 'cpc',
+                       'market_us', 'market_uk', 'market_de', 'market_ca', 'market_au', 'market_fr',
+                       'live_ads_7d', 'live_ads_30d']:
+            setattr(self, metric, "")
+    
+    def seed_fresh_metrics(self, fresh_metrics: Dict[str, str]):
+        """
+        Reprend les métriques encore fraîches dans les données de la boutique :
+        elles sont réécrites telles quelles et comptent pour le statut.
+        """
+        overview_keys = {
+            'organic_traffic': 'organic_search_traffic',
+            'paid_search_traffic': 'paid_search_traffic',
+            'bounce_rate': 'bounce_rate',
+            'average_visit_duration': 'avg_visit_duration',
+            'traffic': 'traffic',
+            'branded_traffic': 'branded_traffic',
+            'conversion_rate': 'conversion_rate'
+        }
+        overview = {key: fresh_metrics[metric] for metric, key in overview_keys.items() if metric in fresh_metrics}
+        if overview:
+            self.session_data['data']['domain_overview'] = overview
+        if 'visits' in fresh_metrics:
+            self.session_data['data']['traffic_analysis'] = {'visits': fresh_metrics['visits']}
+        for metric in ['total_products', 'pixel_google', 'pixel_facebook', 'aov', 'cpc',
+                       'market_us', 'market_uk', 'market_de', 'market_ca', 'market_au', 'market_fr',
+                       'live_ads_7d', 'live_ads_30d']:
+            if metric in fresh_metrics:
+                setattr(self, metric, str(fresh_metrics[metric]))
+    
+    def note_fetched_metrics(self, shop_id, analytics_data: Dict, reused: Dict[str, str]):
+        """Retient les métriques récupérées pendant ce run (les métriques fraîches reprises ne sont pas réhorodatées)"""
+        if self.freshness_store:
+            self.fetched_metrics.setdefault(shop_id, set()).update(fetched_metrics(analytics_data, reused))
+    
+    async def prefetch_freshness(self, shop_ids: List[int]):
+        """Charge en une requête les horodatages des métriques d'un lot de boutiques"""
+        if not self.freshness_store:
+            return
+        try:
+            self.metric_timestamps.update(await asyncio.to_thread(self.freshness_store.load, shop_ids))
+        except Exception as e:
+            logger.warning(f"⚠️ Worker {self.worker_id}: Horodatages des métriques indisponibles: {e}")
+    
+    async def get_metric_timestamps(self, shop_id) -> Optional[Dict[str, str]]:
+        """Horodatages des métriques d'une boutique (None si la fraîcheur n'est pas suivie)"""
+        if not self.freshness_store:
+            return None
+        if shop_id not in self.metric_timestamps:
+            await self.prefetch_freshness([shop_id])
+        return self.metric_timestamps.pop(shop_id, None)
+    
+    def write_analytics_rows(self, rows: List):
+        """
+        Écrit un lot d'analytics (appelé dans un thread par le write-behind).
+        Une seule transaction si TrendTrackAPI expose l'écriture groupée,
+        sinon une écriture par boutique.
+        """
+        bulk_update = getattr(api, 'update_shops_analytics_bulk', None)
+        if bulk_update:
+            with self.timed('db_write', 'analytics (lot)'):
+                bulk_update(rows)
+        else:
+            for shop_id, analytics_data in rows:
+                with self.timed('db_write', 'analytics'):
+                    api.update_shop_analytics(shop_id, analytics_data)
+        
+        # Horodater les métriques récupérées pendant ce run (fraîcheur)
+        if self.freshness_store:
+            try:
+                with self.timed('db_write', 'metric_freshness'):
+                    self.freshness_store.record(
+                        [(shop_id, self.fetched_metrics.pop(shop_id, ())) for shop_id, _ in rows]
+                    )
+            except Exception as e:
+                logger.warning(f"⚠️ Worker {self.worker_id}: Horodatage des métriques impossible: {e}")
+    
+    async def process_queue(self, queue: ShopWorkQueue, date_range: str):
+        """
+        Prend les boutiques dans la file partagée par petits lots loués jusqu'à
+        épuisement. Retourne (boutiques réussies, boutiques traitées).
+        """
+        successful_shops = 0
+        processed = 0
+        
+        while True:
+            batch = await asyncio.to_thread(queue.lease, self.worker_id, self.queue_batch_size)
+            if not batch:
+                # File vide : attendre la page suivante tant que l'alimentation continue
+                if await asyncio.to_thread(queue.is_feeding):
+                    await asyncio.sleep(self.queue_poll_interval)
+                    continue
+                break
+            
+            total_shops = (await asyncio.to_thread(queue.stats))['total']
+            await self.analytics_prefetcher.prefetch([shop['id'] for shop in batch])
+            await self.prefetch_freshness([shop['id'] for shop in batch])
+            await self.prefetch_organic_summaries(batch)
+            
+            for position, shop in enumerate(batch):
+                processed += 1
+                success = await self.process_shop(shop, date_range, processed, total_shops)
+                if success:
+                    successful_shops += 1
+                await asyncio.to_thread(queue.complete, self.worker_id, shop['id'], success)
+                
+                # Prolonger le bail des boutiques restantes du lot
+                remaining = [s['id'] for s in batch[position + 1:]]
+                if remaining:
+                    await asyncio.to_thread(queue.renew, self.worker_id, remaining)
+        
+        return successful_shops, processed
+    
+    async def run_worker(self, shops, date_range: str) -> str:
+        """Exécute le scraping pour une liste de boutiques ou une file partagée (ShopWorkQueue)"""
         logger = logging.getLogger(__name__)
         
         try:
+            # Écritures laissées en attente par un arrêt brutal précédent
+            self.analytics_writer.replay()
+            self.analytics_writer.start()
+            
             # Configuration du navigateur
             await self.setup_browser()
             logger.info(f"✅ Worker {self.worker_id}: Navigateur configuré")
@@ -2206,130 +2740,69 @@ class ParallelProductionScraper:
             
             logger.info(f"✅ Worker {self.worker_id}: Authentification réussie")
             
+            # Contrôle de fond de la session partagée (un gardien par contexte) ; le rafraîchissement
+            # peut aller jusqu'au login complet (formulaire + synchronisation) : délai élargi
+            self.session_keeper = shared_keeper(self.context, self.refresh_shared_session,
+                                                refresh_timeout=120.0).start()
+            
             # Synchronisation des cookies déjà faite dans authenticate_mytoolsplan()
             logger.info(f"✅ Worker {self.worker_id}: Synchronisation des cookies déjà effectuée")
             
             # Traitement des boutiques
-            successful_shops = 0
-            total_shops = len(shops)
-            
-            for i, shop in enumerate(shops, 1):
-                try:
-                    domain = shop.get('domain', '')
-                    shop_id = shop.get('id', '')
-                    
-                    logger.info(f"🎯 Worker {self.worker_id}: Traitement {i}/{total_shops} - {domain} (ID: {shop_id})")
-                    
-                    # Récupérer les métriques existantes pour le scraper intelligent
-                    existing_metrics = api.get_shop_analytics(shop_id)
-                    if existing_metrics:
-                        logger.info(f"🔍 Worker {self.worker_id}: Métriques existantes trouvées pour {domain}")
-                        # Afficher les métriques existantes pour debug
-                        for metric, value in existing_metrics.items():
-                            if value and value != 'na' and value != '':
-                                logger.info(f"🔍 Worker {self.worker_id}: {metric}: {value}")
-                        
-                        # Compter les métriques skippées car déjà présentes
-                        self.count_metrics_skipped(existing_metrics)
-                    else:
-                        logger.info(f"🔍 Worker {self.worker_id}: Aucune métrique existante pour {domain}")
-                        existing_metrics = {}
-                    
-                    # Scraping du domaine avec métriques existantes
-                    result = await self.scrape_domain_overview(domain, date_range, existing_metrics)
+            if isinstance(shops, ShopWorkQueue):
+                successful_shops, total_shops = await self.process_queue(shops, date_range)
+            else:
+                successful_shops = 0
+                total_shops = len(shops)
+                
+                for i, shop in enumerate(shops, 1):
+                    # Pré-chargement organic.Summary groupé pour les prochaines boutiques
+                    if (i - 1) % self.organic_prefetch_size == 0:
+                        chunk = shops[i - 1:i - 1 + self.organic_prefetch_size]
+                        await self.analytics_prefetcher.prefetch([s['id'] for s in chunk])
+                        await self.prefetch_freshness([s['id'] for s in chunk])
+                        await self.prefetch_organic_summaries(chunk)
                     
-                    if result == 'na':
-                        logger.info(f"ℹ️ Worker {self.worker_id}: {domain} marqué comme 'na' (organic traffic < 1000)")
-                        # Enregistrer en BDD avec statut 'na'
-                        analytics_data = self.format_analytics_for_api()
-                        api.update_shop_analytics(shop_id, analytics_data)
-                        self.count_status('na')
-                        logger.info(f"💾 Worker {self.worker_id}: {domain} enregistré en BDD avec statut 'na'")
-                    elif result:
-                        # Toutes les métriques sont récupérées via les APIs dans scrape_domain_overview
+                    if await self.process_shop(shop, date_range, i, total_shops):
                         successful_shops += 1
-                        logger.info(f"✅ Worker {self.worker_id}: {domain} traité avec succès")
-                        
-                        # NOUVEAUX TRAITEMENTS - Récupération des métriques supplémentaires
-                        logger.info(f"🆕 Worker {self.worker_id}: Récupération des métriques supplémentaires pour {domain}")
-                        
-                        # 1. Market traffic (trafic par pays)
-                        market_data = await self.scrape_market_traffic(domain)
-                        if market_data:
-                            for market_key, market_value in market_data.items():
-                                if market_value is not None:
-                                    setattr(self, market_key, str(market_value))
-                                    logger.info(f"✅ Worker {self.worker_id}: {market_key}: {market_value}")
-                        
-                        # 2. Pixel data (pixels Google/Facebook)
-                        pixel_data = await self.scrape_pixel_data(domain)
-                        if pixel_data:
-                            for pixel_key, pixel_value in pixel_data.items():
-                                setattr(self, pixel_key, pixel_value)
-                                logger.info(f"✅ Worker {self.worker_id}: {pixel_key}: {pixel_value}")
-                        
-                        # 3. P0: Progression Live Ads (7d et 30d)
-                        progression_data = await self.scrape_live_ads_progression(domain)
-                        if progression_data:
-                            for progression_key, progression_value in progression_data.items():
-                                if progression_key in ['live_ads_7d', 'live_ads_30d'] and progression_value is not None:
-                                    setattr(self, progression_key, str(progression_value))
-                                    logger.info(f"✅ Worker {self.worker_id}: {progression_key}: {progression_value}%")
-                        
-                        # 3. Total products
-                        total_products = await self.scrape_total_products(domain)
-                        if total_products:
-                            self.total_products = total_products
-                            logger.info(f"✅ Worker {self.worker_id}: total_products: {total_products}")
-                        
-                        # 4. AOV (Average Order Value)
-                        aov = await self.scrape_aov(domain)
-                        if aov:
-                            self.aov = aov
-                            logger.info(f"✅ Worker {self.worker_id}: aov: {aov}")
-                        
-                        # 5. CPC (Cost Per Click)
-                        cpc = await self.scrape_cpc(domain)
-                        if cpc:
-                            self.cpc = cpc
-                            logger.info(f"✅ Worker {self.worker_id}: cpc: {cpc}")
-                        
-                        logger.info(f"🎉 Worker {self.worker_id}: Toutes les métriques supplémentaires récupérées pour {domain}")
-                        
-                        # Enregistrer en BDD avec validation adaptative
-                        analytics_data = self.format_analytics_for_api()
-                        # Comptage métriques détaillé
-                        self.count_metrics_detailed(analytics_data)
-                        
-                        # Comptage global (pour compatibilité)
-                        required_metrics = [
-                            'organic_traffic', 'paid_search_traffic', 'visits', 'bounce_rate',
-                            'average_visit_duration', 'branded_traffic', 'conversion_rate', 'percent_branded_traffic'
-                        ]
-                        found_count = sum(1 for m in required_metrics if analytics_data.get(m) not in (None, '', 'N/A'))
-                        not_found_count = len(required_metrics) - found_count
-                        self.metrics_found += found_count
-                        self.metrics_not_found += not_found_count
-                        status = self.validate_metrics_status(analytics_data)
-                        api.update_shop_analytics(shop_id, analytics_data)
-                        self.count_status(status)
-                        logger.info(f"💾 Worker {self.worker_id}: {domain} enregistré en BDD avec statut '{status}'")
-                    else:
-                        logger.warning(f"⚠️ Worker {self.worker_id}: {domain} échoué")
-                        self.count_status('failed')
-                        
-                except Exception as e:
-                    logger.error(f"❌ Worker {self.worker_id}: Erreur sur {domain}: {e}")
-                    self.count_status('failed')
-                    continue
             
             logger.info(f"🎉 Worker {self.worker_id}: Terminé - {successful_shops}/{total_shops} boutiques réussies")
             return 'completed'
             
         except Exception as e:
             logger.error(f"❌ Worker {self.worker_id}: Erreur générale: {e}")
+            # Worker 0 tombé avant l'authentification (navigateur) : ne pas laisser les autres attendre
+            if self.worker_id == 0 and self.auth_barrier.read()['status'] == PENDING:
+                self.auth_barrier.finish(False, str(e))
             return 'failed'
         finally:
+            # Écrire les analytics encore en attente
+            await self.analytics_writer.close()
+            logger.info(f"💾 Worker {self.worker_id}: Write-behind: {self.analytics_writer.get_metrics()}")
+            try:
+                logger.info(f"🚦 Worker {self.worker_id}: Débits partagés (req/s): {self.rate_limiter.rates()}")
+                logger.info(f"🔁 Worker {self.worker_id}: Retries: {self.retry_policy.stats}, disjoncteurs: {self.retry_policy.breaker_states()}")
+                logger.info(f"🚫 Worker {self.worker_id}: Requêtes interceptées: {self.request_stats.to_dict()}")
+                logger.info(f"⏱️ Worker {self.worker_id}: Readiness (attendu vs attentes fixes): {self.readiness.summary()}")
+                logger.info(f"📡 Worker {self.worker_id}: Réponses capturées: {self.response_capture.stats}")
+                if self.session_keeper:
+                    logger.info(f"🍪 Worker {self.worker_id}: Session partagée: {self.session_keeper.stats}")
+            except Exception:
+                pass
+            # Le dernier worker du processus arrête le contrôle de fond de la session
+            if self.session_keeper:
+                await self.session_keeper.stop()
+            # Rendre à la file les boutiques encore louées (arrêt sur erreur)
+            if isinstance(shops, ShopWorkQueue):
+                released = await asyncio.to_thread(shops.release, self.worker_id)
+                if released:
+                    logger.info(f"↩️ Worker {self.worker_id}: {released} boutiques rendues à la file")
+            # Fermer la page des extracteurs (propre au worker)
+            if self.extractor_page is not None and not self.extractor_page.is_closed():
+                try:
+                    await self.extractor_page.close()
+                except Exception:
+                    pass
             # Ne pas fermer le contexte ici: session partagée gérée par le bootstrap global
             logger.info(f"🔒 Worker {self.worker_id}: Fin du traitement (contexte partagé non fermé)")
 
@@ -2339,22 +2812,115 @@ class ShopDistributor:
     def __init__(self, num_workers: int = 2):
         self.num_workers = num_workers
         self.distribution_file = Path("shop_distribution.json")
+        self.queue_file = "shop_queue.db"
+    
+    def shop_source(self) -> Optional[ShopSource]:
+        """
+        Sélection SQL (prédicat indexé) dont les statuts sont déduits de
+        api.is_shop_eligible_for_scraping ; None si la base n'est pas accessible
+        ou si la règle de l'API ne se réduit pas à une liste de statuts.
+        """
+        db_path = getattr(api, 'db_path', None)
+        if not db_path:
+            return None
+        is_eligible = getattr(api, 'is_shop_eligible_for_scraping', None)
+        if not is_eligible:
+            return ShopSource(db_path, refresh_stale=True)
+        try:
+            statuses = derive_eligible_statuses(db_path, is_eligible)
+        except Exception as e:
+            logger.warning(f"⚠️ Statuts éligibles non déduits ({e}) : filtre de l'API conservé")
+            return None
+        if statuses is None:
+            return None
+        # Boutiques déjà traitées reprises quand une métrique a expiré (re-scraping par TTL) ;
+        # la règle est gardée pour contrôler toutes les lignes après la sélection
+        return ShopSource(db_path, statuses=statuses, refresh_stale=True, rule=is_eligible)
+    
+    def get_eligible_shops(self):
+        """
+        Retourne (nombre total de boutiques, boutiques éligibles).
+        Filtrage en SQL (prédicat indexé) quand la base est accessible et que
+        la règle de l'API s'y ramène, sinon filtre Python de l'API (aussi en
+        repli si une boutique est jugée autrement par la règle et par le SQL).
+        """
+        source = self.shop_source()
+        if source and source.verify_rule() != ([], []):
+            logger.warning("⚠️ Sélection SQL en désaccord avec la règle de l'API : filtre de l'API utilisé")
+            source = None
+        if source:
+            eligible_shops = source.eligible_shops()
+            total_shops = source.count_all()
+        else:
+            all_shops = api.get_all_shops() or []
+            eligible_shops = [shop for shop in all_shops if api.is_shop_eligible_for_scraping(shop)]
+            total_shops = len(all_shops)
+        
+        if not total_shops:
+            logger.warning("⚠️ Aucune boutique trouvée")
+            return 0, []
+        
+        logger.info(f"📊 {len(eligible_shops)} boutiques éligibles sur {total_shops} total")
+        return total_shops, eligible_shops
+    
+    def build_queue(self) -> Optional[ShopWorkQueue]:
+        """
+        Remplit la file de travail partagée : les workers y prennent les boutiques
+        au fil de l'eau (pas de découpage figé à l'avance).
+        """
+        try:
+            _, eligible_shops = self.get_eligible_shops()
+            if not eligible_shops:
+                return None
+            
+            queue = ShopWorkQueue(self.queue_file)
+            queue.reset(eligible_shops)
+            return queue
+            
+        except Exception as e:
+            logger.error(f"❌ Erreur construction file de travail: {e}")
+            return None
+    
+    async def feed_queue(self, queue: ShopWorkQueue, source: ShopSource, page_size: int = 500,
+                         max_pending: int = 1000):
+        """
+        Alimente la file page par page depuis la base (keyset) pendant que les
+        workers travaillent déjà. Backpressure : l'alimentation s'arrête tant
+        que `max_pending` boutiques attendent dans la file.
+        Une fois le flux épuisé, toutes les boutiques sont contrôlées avec la
+        règle de l'API : les oubliées sont ajoutées, celles en trop retirées.
+        """
+        fed = 0
+        try:
+            async for page in source.stream_eligible_shops(page_size=page_size):
+                while (await asyncio.to_thread(queue.stats))['pending'] >= max_pending:
+                    await asyncio.sleep(1)
+                fed += await asyncio.to_thread(queue.append, page)
+                logger.info(f"📥 File de travail: +{len(page)} boutiques ({fed} au total)")
+            
+            missed, extra = await asyncio.to_thread(source.verify_rule, page_size)
+            if missed or extra:
+                fed += await asyncio.to_thread(queue.append, missed)
+                withdrawn = await asyncio.to_thread(queue.withdraw, [shop['id'] for shop in extra])
+                fed -= withdrawn
+                logger.warning(f"⚠️ File corrigée selon la règle de l'API: +{len(missed)} boutiques, "
+                               f"-{withdrawn} ({len(extra) - withdrawn} déjà prises par les workers)")
+        except Exception as e:
+            logger.error(f"❌ Erreur alimentation file de travail: {e}")
+        finally:
+            await asyncio.to_thread(queue.close_feed)
+            logger.info(f"📊 Alimentation terminée: {fed} boutiques éligibles")
+        return fed
     
     def distribute_shops(self) -> Dict[int, List[Dict]]:
         """Répartit les boutiques entre les workers de manière équitable"""
         try:
-            # Récupérer toutes les boutiques
-            all_shops = api.get_all_shops()
+            # Récupérer les boutiques éligibles
+            total_shops, eligible_shops = self.get_eligible_shops()
             
-            if not all_shops:
-                logger.warning("⚠️ Aucune boutique trouvée")
+            if not total_shops:
                 return {}
             
-            # Filtrer les boutiques éligibles
-            eligible_shops = [shop for shop in all_shops if api.is_shop_eligible_for_scraping(shop)]
-            
-            logger.info(f"📊 {len(eligible_shops)} boutiques éligibles sur {len(all_shops)} total")
-            
             # Répartition équitable
             worker_shops = {}
             for i in range(self.num_workers):
@@ -2365,7 +2931,7 @@ class ShopDistributor:
             distribution_data = {
                 "timestamp": DateConverter.convert_to_iso8601_utc(datetime.now(timezone.utc)),
                 "num_workers": self.num_workers,
-                "total_shops": len(all_shops),
+                "total_shops": total_shops,
                 "eligible_shops": len(eligible_shops),
                 "distribution": {
                     str(worker_id): [
@@ -2442,23 +3008,105 @@ class ShopDistributor:
         
         return convert_api_response_dates(data)
 
-async def run_worker_process(worker_id: int, shops: List[Dict], num_workers: int):
-    """Fonction wrapper pour l'exécution en processus séparé"""
+async def run_worker_process(worker_id: int, shops, num_workers: int, date_range: str = "2025-07-01,2025-07-31") -> Dict:
+    """
+    Exécute un worker et retourne son rapport (résultat, status_count, metrics_count).
+    Utilisé tel quel en mode async, et via run_worker_in_process en mode process.
+    """
     setup_logging()
-    
-    async def main():
-        scraper = ParallelProductionScraper(worker_id)
-        return await scraper.run_worker(shops, "2025-07-01,2025-07-31")
+    start_time = time.time()
+    scraper = ParallelProductionScraper(worker_id)
     
     try:
-        return await main()
+        result = await scraper.run_worker(shops, date_range)
     except Exception as e:
         logger.error(f"❌ Worker {worker_id}: Erreur processus: {e}")
-        return False
+        result = 'failed'
+    
+    return {
+        'worker_id': worker_id,
+        'pid': os.getpid(),
+        'result': result,
+        'duration': round(time.time() - start_time, 1),
+        'status_count': scraper.status_count,
+        'metrics_count': scraper.metrics_count,
+        'stage_metrics': scraper.stage_metrics.snapshot(worker_id),
+        'readiness': scraper.readiness.summary()
+    }
+
+def run_worker_in_process(worker_id: int, queue_file: str, num_workers: int, date_range: str,
+                          metrics_port: int = 0) -> Dict:
+    """
+    Point d'entrée d'un processus worker (mode process) : sa propre boucle
+    asyncio, son propre navigateur, et la file de travail partagée (SQLite).
+    Le rapport retourné remonte au parent par l'IPC du pool de processus.
+    Avec `metrics_port`, le worker expose ses histogrammes sur metrics_port + worker_id.
+    """
+    setup_logging()
+    server = None
+    if metrics_port:
+        try:
+            server = MetricsServer(REGISTRY, metrics_port + worker_id).start()
+        except OSError as e:
+            logger.warning(f"⚠️ Worker {worker_id}: Endpoint métriques indisponible: {e}")
+    try:
+        queue = ShopWorkQueue(queue_file)
+        return asyncio.run(run_worker_process(worker_id, queue, num_workers, date_range))
+    finally:
+        if server:
+            server.stop()
+
+def build_run_report(reports: List[Dict], queue_stats: Dict, mode: str) -> Dict:
+    """Agrège les status_count / metrics_count de tous les workers en un rapport de run"""
+    status_total = {}
+    metrics_total = {}
+    readiness_total = {}
+    for report in reports:
+        for probe, stats in report.get('readiness', {}).items():
+            totals = readiness_total.setdefault(probe, {})
+            for key, value in stats.items():
+                totals[key] = round(totals.get(key, 0) + value, 2)
+        for status, count in report.get('status_count', {}).items():
+            status_total[status] = status_total.get(status, 0) + count
+        for metric, counts in report.get('metrics_count', {}).items():
+            totals = metrics_total.setdefault(metric, {'found': 0, 'not_found': 0, 'skipped': 0})
+            for key, count in counts.items():
+                totals[key] = totals.get(key, 0) + count
+    
+    return {
+        "timestamp": DateConverter.convert_to_iso8601_utc(datetime.now(timezone.utc)),
+        "mode": mode,
+        "num_workers": len(reports),
+        "workers": [
+            {k: report.get(k) for k in ('worker_id', 'pid', 'result', 'duration', 'status_count')}
+            for report in reports
+        ],
+        "status_count": status_total,
+        "metrics_count": metrics_total,
+        "stage_latency": summarize(entry for report in reports for entry in report.get('stage_metrics', [])),
+        "readiness": readiness_total,
+        "queue": queue_stats
+    }
 
-async def main():
+def parse_args(argv=None):
+    """Options de ligne de commande du scraper parallélisé"""
+    parser = argparse.ArgumentParser(description="Scraper de production parallélisé MyToolsPlan")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("SCRAPER_WORKERS", 2)),
+                        help="Nombre de workers (défaut: $SCRAPER_WORKERS ou 2)")
+    # async par défaut : tous les workers partagent le contexte navigateur authentifié par le Worker 0
+    parser.add_argument("--mode", choices=("async", "process"), default=os.environ.get("SCRAPER_MODE", "async"),
+                        help="async (défaut): tâches dans un seul processus, session partagée ; "
+                             "process: un processus par worker, chacun avec son propre contexte à authentifier")
+    parser.add_argument("--date-range", default="2025-07-01,2025-07-31", help="Période analysée")
+    parser.add_argument("--report", default="run_report.json", help="Fichier du rapport de run")
+    parser.add_argument("--metrics-port", type=int, default=int(os.environ.get("SCRAPER_METRICS_PORT", 0)),
+                        help="Port HTTP local des métriques Prometheus (0: désactivé ; mode process: port + worker_id)")
+    return parser.parse_args(argv)
+
+async def main(argv=None):
     """Fonction principale pour le scraping parallélisé"""
     setup_logging()
+    args = parse_args(argv)
     logger.info("🏭 DÉMARAGE DU SCRAPER PARALLÉLISÉ AVEC API ORGANIC.SUMMARY")
     
     # Valider la configuration
@@ -2470,30 +3118,96 @@ async def main():
         return
     
     # Nombre de workers
-    num_workers = 2
-    logger.info(f"👷 Démarrage de {num_workers} workers parallèles")
+    num_workers = max(1, args.workers)
+    logger.info(f"👷 Démarrage de {num_workers} workers parallèles (mode {args.mode})")
+    
+    # Schéma à jour (index utilisés par la sélection des boutiques)
+    db_path = getattr(api, 'db_path', None)
+    if db_path:
+        try:
+            migrate(db_path)
+        except Exception as e:
+            logger.warning(f"⚠️ Migrations non appliquées sur {db_path}: {e}")
+    
+    # Nouveau run : budget de retries remis à zéro, disjoncteurs refermés
+    RetryPolicy("retry_state.db").reset()
+    
+    # Nouveau run : barrière d'authentification refermée (résultat du run précédent oublié)
+    AuthBarrier("locks").reset()
     
-    # Distribuer les boutiques
+    # File de travail partagée (les workers se servent au fil de l'eau)
     distributor = ShopDistributor(num_workers)
-    worker_shops = distributor.distribute_shops()
+    feeder = None
+    metrics_server = None
+    source = distributor.shop_source()
+    if source:
+        # Flux depuis la base : les workers démarrent dès la première page
+        queue = ShopWorkQueue(distributor.queue_file)
+        queue.reset(feeding=True)
+        feeder = asyncio.create_task(distributor.feed_queue(queue, source))
+    else:
+        queue = distributor.build_queue()
     
-    if not worker_shops:
+    if not queue:
         logger.error("❌ Aucune boutique à traiter")
         return
     
-    # Lancer les workers en parallèle
-    tasks = []
-    for worker_id, shops in worker_shops.items():
-        if shops:  # Seulement si le worker a des boutiques
-            task = asyncio.create_task(run_worker_process(worker_id, shops, num_workers))
+    if args.mode == "process":
+        # Un processus par worker (spawn : boucle asyncio et Playwright propres à chaque processus)
+        loop = asyncio.get_running_loop()
+        mp_context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=mp_context) as executor:
+            futures = [
+                loop.run_in_executor(executor, run_worker_in_process, worker_id, queue.path, num_workers,
+                                     args.date_range, args.metrics_port)
+                for worker_id in range(num_workers)
+            ]
+            results = await asyncio.gather(*futures, return_exceptions=True)
+    else:
+        # Un seul processus : un seul endpoint pour tous les workers (label worker)
+        if args.metrics_port:
+            try:
+                metrics_server = MetricsServer(REGISTRY, args.metrics_port).start()
+            except OSError as e:
+                logger.warning(f"⚠️ Endpoint métriques indisponible: {e}")
+        
+        # Lancer les workers en parallèle sur la même file
+        tasks = []
+        for worker_id in range(num_workers):
+            task = asyncio.create_task(run_worker_process(worker_id, queue, num_workers, args.date_range))
             tasks.append(task)
+        
+        # Attendre que tous les workers terminent
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if metrics_server:
+            metrics_server.stop()
+    
+    if feeder is not None:
+        # Workers tous arrêtés : inutile de continuer à alimenter la file
+        feeder.cancel()
+        await asyncio.gather(feeder, return_exceptions=True)
+    
+    reports = []
+    for worker_id, result in enumerate(results):
+        if isinstance(result, Exception):
+            logger.error(f"❌ Worker {worker_id}: Processus en échec: {result}")
+            result = {'worker_id': worker_id, 'result': 'failed', 'status_count': {}, 'metrics_count': {}}
+        reports.append(result)
     
-    # Attendre que tous les workers terminent
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    # Rapport de run agrégé
+    run_report = build_run_report(reports, queue.stats(), args.mode)
+    with open(args.report, 'w') as f:
+        json.dump(run_report, f, indent=2)
     
     # Afficher les résultats
-    success_count = sum(1 for result in results if result is True)
-    logger.info(f"🎉 SCRAPING PARALLÉLISÉ TERMINÉ: {success_count}/{len(tasks)} workers réussis")
+    success_count = sum(1 for report in reports if report['result'] == 'completed')
+    logger.info(f"🎉 SCRAPING PARALLÉLISÉ TERMINÉ: {success_count}/{num_workers} workers réussis")
+    logger.info(f"📊 Statuts: {run_report['status_count']}")
+    logger.info(f"📊 File de travail: {run_report['queue']}")
+    for stage, latency in list(run_report['stage_latency'].items())[:5]:
+        logger.info(f"⏱️ {stage}: {latency['count']} mesures, total {latency['total_s']}s, p50 {latency['p50_s']}s, p95 {latency['p95_s']}s")
+    logger.info(f"💾 Rapport de run sauvegardé: {args.report}")
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Limiteur de débit partagé par famille d'endpoints (seau à jetons adaptatif)
+Un seul seau par famille (RPC /dpa/rpc, API dossiers...) pour tous les workers
+et tous les processus : l'état (débit, jetons, dernière coupe) vit dans un
+fichier SQLite et chaque réservation est une transaction exclusive.
+Le débit suit un AIMD : +increase req/s par réponse saine, x decrease sur
+429 / 5xx / erreur réseau / réponse lente, borné par [min_rate, max_rate].
+Ajouter des workers ne multiplie donc plus le débit envoyé à MyToolsPlan.
+"""
+
+import asyncio
+import logging
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Paramètres par famille : débit initial / min / max (req/s), rafale, AIMD, seuil de lenteur (s)
+DEFAULT_FAMILIES = {
+    'rpc': {'rate': 2.0, 'min_rate': 0.2, 'max_rate': 20.0, 'burst': 5,
+            'increase': 0.05, 'decrease': 0.5, 'slow_after': 10.0},
+    'folders': {'rate': 1.0, 'min_rate': 0.1, 'max_rate': 5.0, 'burst': 2,
+                'increase': 0.02, 'decrease': 0.5, 'slow_after': 10.0},
+}
+
+# Une seule coupe par fenêtre : une rafale de 429 ne divise pas le débit N fois
+CUT_COOLDOWN = 1.0
+
+THROTTLING_STATUSES = (429, 503)
+
+
+def response_status(result) -> Optional[int]:
+    """Code HTTP d'une réponse fetch/RPC ({status}, {error: 429} ou 'HTTP 429: ...' dans error)"""
+    if not isinstance(result, dict):
+        return None
+    if isinstance(result.get('status'), int):
+        return result['status']
+    if isinstance(result.get('error'), int):
+        return result['error']
+    match = re.match(r"HTTP (\d{3})", str(result.get('error') or ''))
+    return int(match.group(1)) if match else None
+
+
+def is_healthy(result) -> bool:
+    """
+    Réponse saine pour le débit : pas de limitation, pas d'erreur serveur ni
+    réseau. Une erreur 4xx métier (paramètres) ne dit rien de la charge : saine.
+    """
+    if isinstance(result, BaseException):
+        return False
+    if not isinstance(result, dict):
+        return True
+    status = response_status(result)
+    if status is not None:
+        return status not in THROTTLING_STATUSES and status < 500
+    return result.get('type') != 'fetch_error'
+
+
+class SharedRateLimiter:
+    """Seaux à jetons adaptatifs partagés via un fichier SQLite"""
+
+    def __init__(self, path: str = "rate_limits.db", families: Dict[str, Dict] = None):
+        self.path = path
+        self.families = families or DEFAULT_FAMILIES
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_buckets (
+                    family TEXT PRIMARY KEY,
+                    rate REAL NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    last_cut REAL NOT NULL DEFAULT 0
+                )
+            """)
+
+    @contextmanager
+    def _transaction(self):
+        """Connexion courte et transaction exclusive par opération (sûre entre threads et processus)"""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _bucket(self, conn, family: str, now: float):
+        """(débit, jetons rechargés, dernière coupe) de la famille, créée au besoin"""
+        params = self.families[family]
+        row = conn.execute("SELECT rate, tokens, updated_at, last_cut FROM rate_buckets WHERE family = ?",
+                           (family,)).fetchone()
+        if row is None:
+            conn.execute("INSERT INTO rate_buckets (family, rate, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                         (family, params['rate'], params['burst'], now))
+            return params['rate'], float(params['burst']), 0.0
+        rate, tokens, updated_at, last_cut = row
+        tokens = min(params['burst'], tokens + rate * max(0.0, now - updated_at))
+        return rate, tokens, last_cut
+
+    def reserve(self, family: str, tokens: int = 1) -> float:
+        """
+        Réserve `tokens` jetons et retourne l'attente nécessaire (secondes).
+        Les jetons peuvent passer en négatif : chaque appelant réserve sa
+        place dans la file et attend son tour, sans scrutation.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            rate, available, _ = self._bucket(conn, family, now)
+            available -= tokens
+            conn.execute("UPDATE rate_buckets SET tokens = ?, updated_at = ? WHERE family = ?",
+                         (available, now, family))
+        return max(0.0, -available / rate)
+
+    def record(self, family: str, healthy: bool, latency: Optional[float] = None) -> float:
+        """Ajuste le débit (AIMD) selon une réponse ; retourne le nouveau débit"""
+        params = self.families[family]
+        if latency is not None and latency > params['slow_after']:
+            healthy = False
+        now = time.time()
+        with self._transaction() as conn:
+            rate, available, last_cut = self._bucket(conn, family, now)
+            if healthy:
+                new_rate = min(params['max_rate'], rate + params['increase'])
+            elif now - last_cut >= CUT_COOLDOWN:
+                new_rate = max(params['min_rate'], rate * params['decrease'])
+                last_cut = now
+                logger.warning(f"🐢 Débit {family}: {rate:.2f} -> {new_rate:.2f} req/s (réponse limitée ou lente)")
+            else:
+                new_rate = rate
+            conn.execute("UPDATE rate_buckets SET rate = ?, tokens = ?, updated_at = ?, last_cut = ? WHERE family = ?",
+                         (new_rate, available, now, last_cut, family))
+        return new_rate
+
+    async def acquire(self, family: str, tokens: int = 1) -> float:
+        """Attend son tour dans le seau de la famille ; retourne le temps attendu"""
+        wait = await asyncio.to_thread(self.reserve, family, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    async def report(self, family: str, result, latency: Optional[float] = None) -> float:
+        """Classe la réponse (ou l'exception) et ajuste le débit de la famille"""
+        return await asyncio.to_thread(self.record, family, is_healthy(result), latency)
+
+    def burst(self, family: str) -> int:
+        """Taille de rafale de la famille (jetons au plus disponibles d'un coup)"""
+        return int(self.families[family]['burst'])
+
+    def rates(self) -> Dict[str, float]:
+        """Débit courant de chaque famille (req/s)"""
+        with self._transaction() as conn:
+            return {family: round(rate, 3) for family, rate in conn.execute("SELECT family, rate FROM rate_buckets")}
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Sondes de disponibilité (readiness) à la place des attentes fixes
+Chaque sonde attend le signal précis dont la métrique a besoin (sélecteur,
+réponse JSON, URL, DOM stable) avec une échéance, puis enregistre le temps
+réellement attendu face à l'ancienne attente fixe qu'elle remplace.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Résout quand le DOM n'a plus bougé pendant quietMs (ou false à l'échéance)
+DOM_QUIET_JS = """
+({quietMs, deadlineMs}) => new Promise(resolve => {
+    let timer = null;
+    let cap = null;
+    const observer = new MutationObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(() => finish(true), quietMs);
+    });
+    const finish = (quiet) => {
+        observer.disconnect();
+        clearTimeout(timer);
+        clearTimeout(cap);
+        resolve(quiet);
+    };
+    observer.observe(document.documentElement || document, {
+        childList: true, subtree: true, attributes: true, characterData: true
+    });
+    timer = setTimeout(() => finish(true), quietMs);
+    cap = setTimeout(() => finish(false), deadlineMs);
+})
+"""
+
+
+class ResponseWaiter:
+    """Attente d'une réponse réseau armée avant la navigation"""
+
+    def __init__(self, probes: 'ReadinessProbes', task: asyncio.Task, name: str, replaces: Optional[float]):
+        self.probes = probes
+        self.task = task
+        self.name = name
+        self.replaces = replaces
+
+    async def wait(self):
+        """Réponse attendue (ou None à l'échéance) ; le temps compte à partir de cet appel"""
+        start = time.perf_counter()
+        try:
+            response = await self.task
+        except Exception:
+            response = None
+        self.probes.record(self.name, time.perf_counter() - start, self.replaces, response is not None)
+        return response
+
+    def cancel(self):
+        if not self.task.done():
+            self.task.cancel()
+
+
+class ReadinessProbes:
+    """Sondes avec échéance et statistiques attendu / attente fixe remplacée"""
+
+    def __init__(self, metrics=None, worker_id=None):
+        self.metrics = metrics  # StageMetrics optionnel (histogramme 'readiness')
+        self.worker_id = worker_id
+        self.stats: Dict[str, Dict] = {}
+
+    def record(self, name: str, waited: float, replaces: Optional[float], ready: bool):
+        """
+        Enregistre une attente. `replaces` : ancienne attente fixe en secondes
+        (None quand elle n'était pas fixe, par exemple networkidle).
+        """
+        stats = self.stats.setdefault(name, {'count': 0, 'ready': 0, 'waited_s': 0.0,
+                                             'fixed_count': 0, 'fixed_waited_s': 0.0, 'replaced_s': 0.0})
+        stats['count'] += 1
+        stats['ready'] += int(ready)
+        stats['waited_s'] += waited
+        if replaces is not None:
+            stats['fixed_count'] += 1
+            stats['fixed_waited_s'] += waited
+            stats['replaced_s'] += replaces
+        if self.metrics is not None:
+            self.metrics.observe('readiness', name, waited, self.worker_id, error=not ready)
+        old = f"{replaces:.1f}s" if replaces is not None else "non fixe"
+        logger.debug(f"⏱️ Readiness {name}: {'prêt' if ready else 'échéance'} en {waited:.2f}s (ancienne attente: {old})")
+
+    async def selector(self, page, selectors: Union[str, Iterable[str]], name: str, deadline: float,
+                       replaces: Optional[float] = None, state: str = 'visible') -> Optional[str]:
+        """Attend le premier sélecteur présent parmi `selectors` (en parallèle) ; retourne lequel"""
+        selectors = [selectors] if isinstance(selectors, str) else list(selectors)
+        start = time.perf_counter()
+        tasks = {
+            asyncio.ensure_future(page.wait_for_selector(selector, timeout=deadline * 1000, state=state)): selector
+            for selector in selectors
+        }
+        matched = None
+        try:
+            pending = set(tasks)
+            while pending and matched is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        matched = tasks[task]
+                        break
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self.record(name, time.perf_counter() - start, replaces, matched is not None)
+        return matched
+
+    def response(self, page, predicate: Callable, name: str, deadline: float,
+                 replaces: Optional[float] = None) -> ResponseWaiter:
+        """Arme l'attente d'une réponse (à appeler AVANT la navigation qui la déclenche)"""
+        task = asyncio.ensure_future(page.wait_for_event('response', predicate=predicate, timeout=deadline * 1000))
+        return ResponseWaiter(self, task, name, replaces)
+
+    async def url(self, page, predicate: Callable[[str], bool], name: str, deadline: float,
+                  replaces: Optional[float] = None) -> bool:
+        """Attend que l'URL de la page vérifie `predicate`"""
+        start = time.perf_counter()
+        try:
+            await page.wait_for_url(predicate, timeout=deadline * 1000)
+            ready = True
+        except Exception:
+            ready = predicate(page.url)
+        self.record(name, time.perf_counter() - start, replaces, ready)
+        return ready
+
+    async def dom_quiet(self, page, name: str, deadline: float, quiet: float = 0.3,
+                        replaces: Optional[float] = None) -> bool:
+        """Attend que le DOM ne bouge plus pendant `quiet` secondes (au plus `deadline`)"""
+        start = time.perf_counter()
+        try:
+            ready = await asyncio.wait_for(
+                page.evaluate(DOM_QUIET_JS, {'quietMs': int(quiet * 1000), 'deadlineMs': int(deadline * 1000)}),
+                timeout=deadline + 1
+            )
+        except Exception:
+            ready = False
+        self.record(name, time.perf_counter() - start, replaces, bool(ready))
+        return bool(ready)
+
+    def summary(self) -> Dict[str, Dict]:
+        """Par sonde : attentes, échéances, temps attendu et gain face aux attentes fixes remplacées"""
+        return {
+            name: {
+                'count': stats['count'],
+                'timeouts': stats['count'] - stats['ready'],
+                'waited_s': round(stats['waited_s'], 2),
+                'replaced_fixed_s': round(stats['replaced_s'], 2),
+                'saved_s': round(stats['replaced_s'] - stats['fixed_waited_s'], 2),
+            }
+            for name, stats in sorted(self.stats.items())
+        }
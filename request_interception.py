@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Interception des requêtes Playwright (page.route) par profils nommés
+- full     : rien n'est bloqué (les trackers sont seulement relevés)
+- dom-lite : images, médias, polices et trackers bloqués (lecture du DOM)
+- api-only : seuls document, xhr et fetch passent (appels API dans la page)
+Une allowlist par domaine garde certains types de ressources malgré le
+profil (scripts de l'application MyToolsPlan par exemple). Les requêtes de
+trackers (Google, Facebook) sont relevées avant d'être bloquées : la
+détection des pixels les voit sans télécharger leur contenu.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+PROFILES = {
+    'full': {'block_types': frozenset(), 'block_trackers': False},
+    'dom-lite': {'block_types': frozenset({'image', 'media', 'font'}), 'block_trackers': True},
+    'api-only': {
+        'block_types': frozenset({'image', 'media', 'font', 'stylesheet', 'script', 'websocket',
+                                  'manifest', 'texttrack', 'eventsource', 'other'}),
+        'block_trackers': True
+    },
+}
+
+# Types de ressources toujours autorisés par domaine (suffixe d'hôte)
+DEFAULT_ALLOWLIST = {
+    'mytoolsplan.com': ('script', 'stylesheet'),
+    'mytoolsplan.xyz': ('script', 'stylesheet'),
+}
+
+# Hôtes / chemins de trackers -> pixel correspondant
+TRACKER_PATTERNS = {
+    'pixel_google': ('googletagmanager.com', 'google-analytics.com', 'googleadservices.com',
+                     'doubleclick.net', 'googlesyndication.com'),
+    'pixel_facebook': ('connect.facebook.net', 'facebook.com/tr', 'facebook.net/signals'),
+}
+
+# Taille moyenne estimée par type (octets) : une requête bloquée n'est jamais téléchargée
+ESTIMATED_BYTES = {
+    'image': 40_000, 'media': 500_000, 'font': 30_000, 'stylesheet': 20_000,
+    'script': 60_000, 'websocket': 0, 'manifest': 1_000, 'other': 5_000,
+}
+
+
+def tracker_of(url: str) -> Optional[str]:
+    """Pixel dont relève l'URL (pixel_google / pixel_facebook) ou None"""
+    lowered = url.lower()
+    for pixel, patterns in TRACKER_PATTERNS.items():
+        if any(pattern in lowered for pattern in patterns):
+            return pixel
+    return None
+
+
+def host_matches(host: str, suffix: str) -> bool:
+    return host == suffix or host.endswith('.' + suffix)
+
+
+class InterceptionStats:
+    """Compteurs partagés par toutes les pages d'un worker ou d'un pool"""
+
+    def __init__(self):
+        self.allowed = 0
+        self.blocked = 0
+        self.blocked_bytes = 0
+        self.blocked_by_type: Dict[str, int] = {}
+
+    def record_block(self, resource_type: str):
+        self.blocked += 1
+        self.blocked_bytes += ESTIMATED_BYTES.get(resource_type, ESTIMATED_BYTES['other'])
+        self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+
+    def to_dict(self) -> Dict:
+        return {
+            'allowed': self.allowed,
+            'blocked': self.blocked,
+            'blocked_mb_estimate': round(self.blocked_bytes / 1_000_000, 1),
+            'blocked_by_type': dict(self.blocked_by_type),
+        }
+
+
+class RequestInterceptor:
+    """Routeur d'une page : applique le profil courant et relève les trackers"""
+
+    def __init__(self, profile: str = 'dom-lite', stats: InterceptionStats = None,
+                 allowlist: Dict[str, Iterable[str]] = None):
+        self.profile = None
+        self.use(profile)
+        self.stats = stats or InterceptionStats()
+        self.allowlist = {host: frozenset(types) for host, types in (allowlist or DEFAULT_ALLOWLIST).items()}
+        self.tracker_hits: Dict[str, int] = {}
+
+    def use(self, profile: str):
+        """Change le profil de la page (pris en compte à la requête suivante)"""
+        if profile not in PROFILES:
+            raise ValueError(f"Profil d'interception inconnu: {profile}")
+        self.profile = profile
+
+    def decide(self, url: str, resource_type: str) -> Tuple[bool, Optional[str]]:
+        """(bloquer ?, pixel relevé) pour une requête selon le profil courant"""
+        settings = PROFILES[self.profile]
+        pixel = tracker_of(url)
+        if pixel:
+            return settings['block_trackers'], pixel
+        if resource_type not in settings['block_types']:
+            return False, None
+        host = (urlparse(url).hostname or '').lower()
+        for suffix, types in self.allowlist.items():
+            if host_matches(host, suffix) and resource_type in types:
+                return False, None
+        return True, None
+
+    async def handle(self, route):
+        """Handler page.route : relève, puis bloque ou laisse passer"""
+        request = route.request
+        block, pixel = self.decide(request.url, request.resource_type)
+        if pixel:
+            self.tracker_hits[pixel] = self.tracker_hits.get(pixel, 0) + 1
+        if block:
+            self.stats.record_block(request.resource_type)
+            await route.abort('blockedbyclient')
+        else:
+            self.stats.allowed += 1
+            await route.continue_()
+
+    async def attach(self, page):
+        """Installe le routeur sur la page"""
+        await page.route("**/*", self.handle)
+        return self
+
+    def reset_trackers(self):
+        """À appeler avant une navigation dont on veut détecter les pixels"""
+        self.tracker_hits.clear()
+
+    def detected_pixels(self) -> Dict[str, str]:
+        """Pixels vus depuis le dernier reset_trackers ('present' / 'absent')"""
+        return {pixel: 'present' if self.tracker_hits.get(pixel) else 'absent' for pixel in TRACKER_PATTERNS}
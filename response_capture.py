@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Extraction par capture des réponses réseau (page.on('response'))
+Les pages d'analytics remplissent leurs cellules à partir de réponses XHR JSON
+déjà reçues : au lieu d'attendre le rendu des nœuds span[data-testid="value"],
+des matchers par métrique lisent le JSON dès son arrivée. Les métriques sont
+disponibles avant la fin du rendu et ne dépendent plus du balisage de l'UI.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EMPTY_VALUES = (None, '', 'na', 'N/A')
+
+# Méthodes RPC envoyées par le scraper lui-même (APIClient, RPCBatcher) : leurs
+# réponses (souvent pour d'autres domaines) ne sont pas la synthèse de la page
+SCRAPER_RPC_METHODS = ('organic.Summary', 'organic.OverviewTrend')
+
+
+def find_key(payload, keys: Iterable[str]):
+    """Première valeur d'une des clés `keys`, en largeur d'abord (les champs de synthèse sont peu profonds)"""
+    keys = tuple(keys)
+    queue = deque([payload])
+    while queue:
+        node = queue.popleft()
+        if isinstance(node, dict):
+            for key in keys:
+                if node.get(key) not in EMPTY_VALUES and not isinstance(node.get(key), (dict, list)):
+                    return node[key]
+            queue.extend(node.values())
+        elif isinstance(node, list):
+            queue.extend(node)
+    return None
+
+
+def rpc_methods(request) -> Tuple[str, ...]:
+    """Méthodes JSON-RPC d'une requête (corps POST, appel seul ou lot) ; vide si illisible"""
+    try:
+        body = json.loads(request.post_data or '')
+    except (AttributeError, TypeError, ValueError):
+        return ()
+    calls = body if isinstance(body, list) else [body]
+    return tuple(call['method'] for call in calls if isinstance(call, dict) and isinstance(call.get('method'), str))
+
+
+class ResponseMatcher:
+    """
+    Associe des réponses (URL) à un parseur de JSON qui retourne {métrique: valeur}.
+    `rpc` : réponse JSON-RPC, retenue seulement si la méthode de la requête est
+    lisible et n'est pas une méthode envoyée par le scraper.
+    """
+
+    def __init__(self, name: str, url_patterns: Iterable[str], extract: Callable[[object], Optional[Dict]],
+                 rpc: bool = False):
+        self.name = name
+        self.url_patterns = tuple(url_patterns)
+        self.extract = extract
+        self.rpc = rpc
+
+    def matches(self, url: str) -> bool:
+        return all(pattern in url for pattern in self.url_patterns)
+
+
+def format_visit_duration(seconds) -> str:
+    """Durée moyenne de visite en secondes -> "MM:SS" (format écrit dans analytics) ; "" si absente"""
+    try:
+        seconds = int(float(seconds or 0))
+    except (TypeError, ValueError):
+        return ""
+    if not seconds:
+        return ""
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def extract_engagement(payload) -> Optional[Dict]:
+    """API engagement (sam.mytoolsplan.xyz) : {code: 200, data: {totalBounceRate, totalAvgVisitDuration}}"""
+    if not isinstance(payload, dict) or payload.get('code') != 200:
+        return None
+    data = payload.get('data') or {}
+    return {
+        'bounce_rate': data.get('totalBounceRate'),
+        'avg_visit_duration': format_visit_duration(data.get('totalAvgVisitDuration')),
+    }
+
+
+def extract_traffic_summary(payload) -> Optional[Dict]:
+    """Synthèse Traffic Analysis : visites et conversion d'achat où qu'elles soient dans le JSON"""
+    return {
+        'visits': find_key(payload, ('visits', 'totalVisits')),
+        'conversion_rate': find_key(payload, ('purchaseConversion', 'conversionRate', 'conversion_rate')),
+    }
+
+
+ENGAGEMENT_MATCHER = ResponseMatcher('engagement', ('/analytics/ta/', 'engagement'), extract_engagement)
+TRAFFIC_RPC_MATCHER = ResponseMatcher('traffic_rpc', ('/dpa/rpc',), extract_traffic_summary, rpc=True)
+TRAFFIC_TA_MATCHER = ResponseMatcher('traffic_ta', ('/analytics/ta/',), extract_traffic_summary)
+
+DEFAULT_MATCHERS = [ENGAGEMENT_MATCHER, TRAFFIC_RPC_MATCHER, TRAFFIC_TA_MATCHER]
+
+
+class ResponseCapture:
+    """
+    Écoute les réponses d'une page et garde la dernière valeur de chaque
+    métrique depuis la dernière navigation (reset()). Le `scope` (domaine
+    analysé) évite de relire la valeur d'une boutique précédente restée sur la page.
+    """
+
+    def __init__(self, matchers: List[ResponseMatcher] = None, readiness=None,
+                 own_methods: Iterable[str] = SCRAPER_RPC_METHODS):
+        self.matchers = matchers if matchers is not None else DEFAULT_MATCHERS
+        self.readiness = readiness  # ReadinessProbes optionnel (temps d'attente des captures)
+        self.own_methods = set(own_methods)
+        self.values: Dict[str, Tuple[object, str]] = {}
+        self.scope: Optional[str] = None
+        self.stats = {'responses_parsed': 0, 'metrics_captured': 0, 'parse_errors': 0, 'own_rpc_ignored': 0}
+        self._updated = asyncio.Event()
+
+    def attach(self, page):
+        """Branche l'écoute sur la page (une fois, à la création de la page)"""
+        page.on("response", self.on_response)
+        return self
+
+    def ignore_method(self, method: str):
+        """Méthode RPC appelée par le scraper : ses réponses ne sont jamais capturées"""
+        self.own_methods.add(method)
+
+    def reset(self, scope: Optional[str] = None):
+        """Oublie les valeurs capturées (à appeler avant chaque navigation) ; `scope` : domaine de la page"""
+        self.values.clear()
+        self.scope = scope
+
+    async def on_response(self, response):
+        """Handler page.on('response') : parse le JSON des réponses reconnues"""
+        matchers = [m for m in self.matchers if m.matches(response.url)]
+        if any(m.rpc for m in matchers):
+            methods = rpc_methods(response.request)
+            if not methods or any(method in self.own_methods for method in methods):
+                if methods:
+                    self.stats['own_rpc_ignored'] += 1
+                matchers = [m for m in matchers if not m.rpc]
+        if not matchers:
+            return
+        try:
+            if 'json' not in (response.headers.get('content-type') or ''):
+                return
+            payload = await response.json()
+        except Exception as e:
+            self.stats['parse_errors'] += 1
+            logger.debug(f"⚠️ Réponse {response.url} illisible: {e}")
+            return
+        self.stats['responses_parsed'] += 1
+        self.ingest(payload, matchers)
+
+    def ingest(self, payload, matchers: List[ResponseMatcher]):
+        """Applique les matchers à un JSON reçu et réveille les attentes"""
+        captured = False
+        for matcher in matchers:
+            try:
+                values = matcher.extract(payload) or {}
+            except Exception:
+                self.stats['parse_errors'] += 1
+                continue
+            for metric, value in values.items():
+                if value not in EMPTY_VALUES:
+                    self.values[metric] = (value, matcher.name)
+                    self.stats['metrics_captured'] += 1
+                    captured = True
+        if captured:
+            self._updated.set()
+
+    def get(self, metric: str, scope: Optional[str] = None) -> Optional[str]:
+        """Valeur capturée (texte brut, comme les chemins API) ou None ; None aussi si `scope` diffère"""
+        if metric not in self.values or (scope is not None and scope != self.scope):
+            return None
+        return str(self.values[metric][0])
+
+    async def wait_for(self, metrics: Iterable[str], deadline: float, name: str = "capture",
+                       replaces: Optional[float] = None, scope: Optional[str] = None) -> Dict[str, str]:
+        """
+        Attend que toutes les `metrics` soient capturées (au plus `deadline` s) ;
+        retourne celles obtenues (rien si `scope` n'est pas le domaine courant)
+        """
+        metrics = list(metrics)
+        if scope is not None and scope != self.scope:
+            return {}
+        start = time.perf_counter()
+        end = start + deadline
+        while any(metric not in self.values for metric in metrics):
+            remaining = end - time.perf_counter()
+            if remaining <= 0:
+                break
+            self._updated.clear()
+            try:
+                await asyncio.wait_for(self._updated.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+        found = {metric: self.get(metric) for metric in metrics if metric in self.values}
+        if self.readiness is not None:
+            self.readiness.record(name, time.perf_counter() - start, replaces, len(found) == len(metrics))
+        return found
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Politique de retry réutilisable : classification des erreurs, jitter
+décorrélé, budget de retries par run et disjoncteur par endpoint
+- Seules les erreurs transitoires sont réessayées (5xx, 429, timeout,
+  fetch_error) ; auth et 4xx échouent tout de suite.
+- Délai décorrélé : min(max_delay, uniform(base_delay, délai_précédent * 3)).
+- Budget : au plus budget_ratio retries par requête du run (+ budget_min).
+- Disjoncteur : ouvert après failure_threshold échecs transitoires
+  consécutifs, une requête sonde après reset_timeout.
+Budget et disjoncteurs vivent dans un fichier SQLite : tous les workers et
+processus échouent vite ensemble quand un endpoint est tombé.
+"""
+
+import asyncio
+import logging
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Optional
+
+from rate_limiter import response_status
+
+logger = logging.getLogger(__name__)
+
+# Classes d'erreurs
+OK = 'ok'
+AUTH = 'auth'
+CLIENT = 'client_4xx'
+THROTTLED = 'throttled'
+SERVER = 'server_5xx'
+TIMEOUT = 'timeout'
+FETCH_ERROR = 'fetch_error'
+
+RETRYABLE = (THROTTLED, SERVER, TIMEOUT, FETCH_ERROR)
+
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half_open'
+
+
+def classify(result) -> str:
+    """Classe une réponse fetch/RPC ou une exception"""
+    if isinstance(result, BaseException):
+        if isinstance(result, asyncio.TimeoutError) or 'Timeout' in type(result).__name__:
+            return TIMEOUT
+        return FETCH_ERROR
+    if not isinstance(result, dict):
+        return OK
+    status = response_status(result)
+    if status is not None:
+        if status in (401, 403):
+            return AUTH
+        if status == 429:
+            return THROTTLED
+        if status >= 500:
+            return SERVER
+        if status >= 400:
+            return CLIENT
+        return OK
+    if result.get('type') in (FETCH_ERROR, 'exception'):
+        return FETCH_ERROR
+    if result.get('success') is False:
+        return FETCH_ERROR
+    if result.get('error'):
+        # Erreur JSON-RPC (paramètres, méthode) : la réponse est arrivée
+        return CLIENT
+    return OK
+
+
+class RetryPolicy:
+    """Retries avec jitter décorrélé, budget de run et disjoncteurs partagés (SQLite)"""
+
+    def __init__(self, path: str = "retry_state.db", max_attempts: int = 3, base_delay: float = 1.0,
+                 max_delay: float = 10.0, budget_ratio: float = 0.2, budget_min: int = 20,
+                 failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_min = budget_min
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.stats = {'attempts': 0, 'retries': 0, 'budget_denied': 0, 'short_circuited': 0}
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS retry_budget (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    requests INTEGER NOT NULL DEFAULT 0,
+                    retries INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("INSERT OR IGNORE INTO retry_budget (id) VALUES (1)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS circuit_breakers (
+                    endpoint TEXT PRIMARY KEY,
+                    state TEXT NOT NULL DEFAULT 'closed',
+                    failures INTEGER NOT NULL DEFAULT 0,
+                    opened_at REAL NOT NULL DEFAULT 0
+                )
+            """)
+
+    @contextmanager
+    def _transaction(self):
+        """Connexion courte et transaction exclusive par opération (sûre entre threads et processus)"""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def reset(self):
+        """Début de run : budget remis à zéro et disjoncteurs refermés"""
+        with self._transaction() as conn:
+            conn.execute("UPDATE retry_budget SET requests = 0, retries = 0")
+            conn.execute("DELETE FROM circuit_breakers")
+
+    def allow_request(self, endpoint: str) -> bool:
+        """Faux si le disjoncteur de l'endpoint est ouvert (une seule sonde en demi-ouvert)"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT state, opened_at FROM circuit_breakers WHERE endpoint = ?",
+                               (endpoint,)).fetchone()
+            if row is None or row[0] == BREAKER_CLOSED:
+                return True
+            state, opened_at = row
+            if state == BREAKER_OPEN and now - opened_at >= self.reset_timeout:
+                # Le premier arrivé sonde l'endpoint, les autres continuent d'échouer vite
+                conn.execute("UPDATE circuit_breakers SET state = ?, opened_at = ? WHERE endpoint = ?",
+                             (BREAKER_HALF_OPEN, now, endpoint))
+                logger.info(f"🔌 Disjoncteur {endpoint}: demi-ouvert (requête sonde)")
+                return True
+            if state == BREAKER_HALF_OPEN and now - opened_at >= self.reset_timeout:
+                # Sonde perdue (worker mort) : en autoriser une autre
+                conn.execute("UPDATE circuit_breakers SET opened_at = ? WHERE endpoint = ?", (now, endpoint))
+                return True
+            return False
+
+    def record_result(self, endpoint: str, error_class: str):
+        """Compte la requête dans le budget et met à jour le disjoncteur"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("UPDATE retry_budget SET requests = requests + 1")
+            if error_class not in RETRYABLE:
+                # Réponse arrivée (même 4xx/auth) : l'endpoint répond
+                conn.execute("DELETE FROM circuit_breakers WHERE endpoint = ?", (endpoint,))
+                return
+            row = conn.execute("SELECT state, failures, opened_at FROM circuit_breakers WHERE endpoint = ?",
+                               (endpoint,)).fetchone()
+            state, failures, opened_at = row if row else (BREAKER_CLOSED, 0, 0)
+            failures += 1
+            if state == BREAKER_HALF_OPEN or (state == BREAKER_CLOSED and failures >= self.failure_threshold):
+                # Les réponses en vol d'un disjoncteur déjà ouvert ne repoussent pas la sonde
+                logger.warning(f"🔌 Disjoncteur {endpoint}: ouvert après {failures} échecs ({error_class})")
+                state = BREAKER_OPEN
+                opened_at = now
+            conn.execute(
+                "INSERT OR REPLACE INTO circuit_breakers (endpoint, state, failures, opened_at) VALUES (?, ?, ?, ?)",
+                (endpoint, state, failures, opened_at)
+            )
+
+    def try_spend_retry(self) -> bool:
+        """Prend un retry dans le budget du run s'il en reste"""
+        with self._transaction() as conn:
+            requests, retries = conn.execute("SELECT requests, retries FROM retry_budget").fetchone()
+            if retries >= self.budget_min + self.budget_ratio * requests:
+                return False
+            conn.execute("UPDATE retry_budget SET retries = retries + 1")
+            return True
+
+    def next_delay(self, previous: float) -> float:
+        """Jitter décorrélé (délai suivant tiré entre base_delay et 3x le précédent)"""
+        return min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous) * 3))
+
+    async def run(self, endpoint: str, attempt: Callable[[], Awaitable], description: str = "",
+                  worker_id: Optional[int] = None, max_attempts: Optional[int] = None):
+        """
+        Exécute `attempt` avec la politique. Retourne la dernière réponse, ou un
+        dict {success: False, error, type} pour une exception ou un disjoncteur ouvert.
+        """
+        max_attempts = max_attempts or self.max_attempts
+        label = f"Worker {worker_id}: {description or endpoint}" if worker_id is not None else (description or endpoint)
+        delay = self.base_delay
+        result, error_class = None, OK
+        for attempt_index in range(max_attempts):
+            if not await asyncio.to_thread(self.allow_request, endpoint):
+                self.stats['short_circuited'] += 1
+                logger.warning(f"🔌 {label} - Disjoncteur ouvert, échec immédiat")
+                return {"success": False, "error": f"Circuit ouvert: {endpoint}", "type": "circuit_open"}
+
+            self.stats['attempts'] += 1
+            try:
+                result = await attempt()
+                error_class = classify(result)
+            except Exception as e:
+                result = e
+                error_class = classify(e)
+            await asyncio.to_thread(self.record_result, endpoint, error_class)
+
+            if error_class == OK:
+                if attempt_index > 0:
+                    logger.info(f"✅ {label} - Succès après {attempt_index + 1} tentatives")
+                return result
+            if error_class not in RETRYABLE:
+                logger.warning(f"⚠️ {label} - Erreur {error_class} non réessayée")
+                break
+            if attempt_index == max_attempts - 1:
+                logger.error(f"❌ {label} - Toutes les tentatives ont échoué ({error_class})")
+                break
+            if not await asyncio.to_thread(self.try_spend_retry):
+                self.stats['budget_denied'] += 1
+                logger.warning(f"⚠️ {label} - Budget de retries du run épuisé ({error_class})")
+                break
+
+            self.stats['retries'] += 1
+            delay = self.next_delay(delay)
+            logger.info(f"🔄 {label} - Retry dans {delay:.1f}s ({error_class})")
+            await asyncio.sleep(delay)
+
+        if isinstance(result, Exception):
+            return {"success": False, "error": str(result), "type": "exception", "error_class": error_class}
+        return result
+
+    def breaker_states(self) -> Dict[str, str]:
+        """État des disjoncteurs non fermés"""
+        with self._transaction() as conn:
+            return dict(conn.execute("SELECT endpoint, state FROM circuit_breakers WHERE state != 'closed'"))
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Regroupement des appels RPC MyToolsPlan (/dpa/rpc) de plusieurs boutiques
+Les requêtes soumises pendant une courte fenêtre (ou jusqu'à N requêtes) sont
+envoyées dans un seul page.evaluate qui exécute les fetch en parallèle
+(Promise.all). Chaque appelant reçoit sa propre réponse. Avec un limiteur de
+débit partagé, un lot ne dépasse pas la rafale de la famille, réserve autant
+de jetons que d'appels et ajuste le débit une seule fois (pire réponse, plus
+longue latence individuelle).
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from rate_limiter import is_healthy
+
+logger = logging.getLogger(__name__)
+
+# Exécute un lot de requêtes JSON-RPC en parallèle dans la page (même origine que /dpa/rpc)
+BATCH_RPC_JS = """
+async (requests) => {
+    return await Promise.all(requests.map(async (payload) => {
+        const start = performance.now();
+        const elapsed = () => (performance.now() - start) / 1000;
+        try {
+            const response = await fetch('/dpa/rpc', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(payload)
+            });
+            const responseText = await response.text();
+            if (!response.ok) {
+                return { result: { error: `HTTP ${response.status}: ${responseText}`, status: response.status }, elapsed: elapsed() };
+            }
+            return { result: JSON.parse(responseText), elapsed: elapsed() };
+        } catch (error) {
+            return { result: { error: error.message, type: 'fetch_error' }, elapsed: elapsed() };
+        }
+    }));
+}
+"""
+
+
+def batch_outcome(results: List, latencies: List[float]) -> Tuple[object, Optional[float]]:
+    """Réponse et latence représentatives d'un lot : la première réponse malsaine sinon la première, latence max"""
+    unhealthy = [result for result in results if not is_healthy(result)]
+    representative = unhealthy[0] if unhealthy else (results[0] if results else None)
+    return representative, (max(latencies) if latencies else None)
+
+
+class RPCBatcher:
+    """Collecte les appels RPC et les envoie par lots dans un seul evaluate"""
+
+    def __init__(self, page_provider: Callable, max_batch: int = 20, window: float = 0.05, worker_id: int = 0,
+                 rate_limiter=None, family: str = 'rpc'):
+        self.page_provider = page_provider
+        # Un lot part d'un coup (Promise.all) : jamais plus que la rafale du seau
+        self.max_batch = min(max_batch, rate_limiter.burst(family)) if rate_limiter else max_batch
+        self.window = window
+        self.worker_id = worker_id
+        self.rate_limiter = rate_limiter
+        self.family = family
+        self._pending: List[Tuple[Dict, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.stats = {'calls': 0, 'batches': 0, 'evaluates_saved': 0}
+
+    async def call(self, method: str, params: Dict) -> Dict:
+        """Soumet un appel RPC et attend sa réponse individuelle"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        payload = {
+            "id": random.randint(0, 9999),
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params
+        }
+        self._pending.append((payload, future))
+        self.stats['calls'] += 1
+
+        if len(self._pending) >= self.max_batch:
+            self._schedule_flush(0)
+        elif self._flush_handle is None:
+            self._schedule_flush(self.window)
+        return await future
+
+    def _schedule_flush(self, delay: float):
+        """Programme l'envoi du lot courant"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        loop = asyncio.get_running_loop()
+        self._flush_handle = loop.call_later(delay, lambda: asyncio.ensure_future(self.flush()))
+
+    async def flush(self):
+        """Envoie les requêtes en attente (par lots de max_batch)"""
+        self._flush_handle = None
+        while self._pending:
+            batch = self._pending[:self.max_batch]
+            self._pending = self._pending[self.max_batch:]
+            await self._send_batch(batch)
+
+    async def _send_batch(self, batch: List[Tuple[Dict, asyncio.Future]]):
+        """Un seul evaluate pour tout le lot ; chaque future reçoit sa réponse"""
+        payloads = [payload for payload, _ in batch]
+        try:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire(self.family, len(batch))
+            start = time.perf_counter()
+            outcomes = await self.page_provider().evaluate(BATCH_RPC_JS, payloads)
+            responses = [outcome.get('result') for outcome in outcomes]
+            if self.rate_limiter:
+                # Un seul ajustement AIMD par lot, sur la latence de chaque requête (pas celle du lot)
+                latencies = [outcome.get('elapsed') for outcome in outcomes if outcome.get('elapsed') is not None]
+                response, latency = batch_outcome(responses, latencies or [time.perf_counter() - start])
+                await self.rate_limiter.report(self.family, response, latency)
+            self.stats['batches'] += 1
+            self.stats['evaluates_saved'] += len(batch) - 1
+            logger.info(f"📦 Worker {self.worker_id}: Lot RPC de {len(batch)} appels envoyé en un evaluate")
+            for index, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result(responses[index] if index < len(responses)
+                                      else {'error': 'réponse absente du lot', 'type': 'fetch_error'})
+        except Exception as e:
+            logger.error(f"❌ Worker {self.worker_id}: Erreur lot RPC ({len(batch)} appels): {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_result({'error': str(e), 'type': 'fetch_error'})
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Gardien de session partagée (cookies d'authentification MyToolsPlan)
+Une tâche de fond contrôle la session du contexte navigateur partagé à
+intervalle régulier (cookies d'auth présents + requête légère, sans rendu).
+Quand elle est périmée, un seul rafraîchissement est lancé pour tous les
+workers du processus (single-flight) et les appels authentifiés attendent sa
+fin (wait_ready) au lieu que chaque worker refasse sa propre navigation.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+AUTH_COOKIES = ('amember_login', 'amember_pass_enc')
+CHECK_URL = "https://app.mytoolsplan.com/analytics/"
+
+
+async def check_auth_request(context) -> bool:
+    """Cookies d'auth présents et page analytics servie sans redirection vers le login"""
+    cookies = await context.cookies()
+    if not any(cookie['name'] in AUTH_COOKIES for cookie in cookies):
+        return False
+    # APIRequestContext du contexte : mêmes cookies, aucune page ni sous-ressource
+    response = await context.request.get(CHECK_URL, timeout=10000)
+    return response.ok and 'login' not in response.url.lower()
+
+
+class SessionKeeper:
+    """Contrôle périodique et rafraîchissement unique de la session d'un contexte partagé"""
+
+    def __init__(self, context, refresh: Callable[[], Awaitable[bool]],
+                 check: Optional[Callable[[], Awaitable[bool]]] = None, interval: float = 60.0,
+                 refresh_timeout: float = 60.0, min_refresh_gap: float = 5.0):
+        self.context = context
+        self._refresh = refresh
+        self._check = check or (lambda: check_auth_request(context))
+        self.interval = interval
+        self.refresh_timeout = refresh_timeout
+        self.min_refresh_gap = min_refresh_gap  # échecs en vol avec les anciens cookies : pas de 2e rafraîchissement
+        self.ready = asyncio.Event()
+        self.ready.set()
+        self.healthy = True
+        self.last_refresh = float('-inf')
+        self._inflight: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.Task] = None
+        self._users = 0
+        self.stats = {'checks': 0, 'stale': 0, 'refreshes': 0, 'refresh_failures': 0,
+                      'coalesced': 0, 'gated_waits': 0}
+
+    async def check(self) -> bool:
+        """Contrôle léger de la session (une erreur compte comme session périmée)"""
+        self.stats['checks'] += 1
+        try:
+            healthy = bool(await self._check())
+        except Exception as e:
+            logger.warning(f"⚠️ Session partagée: contrôle impossible: {e}")
+            healthy = False
+        if not healthy:
+            self.stats['stale'] += 1
+        return healthy
+
+    async def ensure_fresh(self, reason: str = "") -> bool:
+        """
+        Contrôle la session et la rafraîchit si elle est périmée. Un seul
+        contrôle / rafraîchissement en vol : les appelants suivants attendent le même.
+        """
+        if self._inflight and not self._inflight.done():
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(self._inflight)
+        if time.monotonic() - self.last_refresh < self.min_refresh_gap:
+            self.stats['coalesced'] += 1
+            return self.healthy
+        self._inflight = asyncio.ensure_future(self._check_and_refresh(reason))
+        return await asyncio.shield(self._inflight)
+
+    async def _check_and_refresh(self, reason: str) -> bool:
+        if await self.check():
+            self.healthy = True
+            return True
+
+        # Les appels authentifiés attendent la fin du rafraîchissement
+        self.ready.clear()
+        logger.info(f"🔄 Session partagée périmée ({reason or 'contrôle'}) : rafraîchissement unique pour tous les workers")
+        try:
+            healthy = bool(await asyncio.wait_for(self._refresh(), timeout=self.refresh_timeout))
+        except Exception as e:
+            logger.error(f"❌ Session partagée: rafraîchissement en échec: {e}")
+            healthy = False
+        finally:
+            self.last_refresh = time.monotonic()
+            self.ready.set()
+
+        self.healthy = healthy
+        self.stats['refreshes'] += 1
+        if healthy:
+            logger.info("✅ Session partagée rafraîchie")
+        else:
+            self.stats['refresh_failures'] += 1
+            logger.warning("⚠️ Session partagée toujours invalide après rafraîchissement")
+        return healthy
+
+    async def wait_ready(self) -> bool:
+        """À appeler avant un appel authentifié : attend un rafraîchissement en cours (au plus refresh_timeout)"""
+        if self.ready.is_set():
+            return True
+        self.stats['gated_waits'] += 1
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout=self.refresh_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.ensure_fresh("contrôle périodique")
+
+    def start(self):
+        """Un worker de plus utilise la session ; démarre la tâche de fond au premier"""
+        self._users += 1
+        if self._loop is None or self._loop.done():
+            self._loop = asyncio.ensure_future(self._run())
+        return self
+
+    async def stop(self):
+        """Un worker de moins ; la tâche de fond s'arrête avec le dernier"""
+        self._users -= 1
+        if self._users > 0 or self._loop is None:
+            return
+        self._loop.cancel()
+        await asyncio.gather(self._loop, return_exceptions=True)
+        self._loop = None
+        _KEEPERS.pop(id(self.context), None)
+
+
+# Un gardien par contexte navigateur partagé (tous les workers du processus)
+_KEEPERS: Dict[int, SessionKeeper] = {}
+
+
+def shared_keeper(context, refresh: Callable[[], Awaitable[bool]], **kwargs) -> SessionKeeper:
+    """Gardien du contexte, créé par le premier worker (sa fonction de rafraîchissement est gardée)"""
+    keeper = _KEEPERS.get(id(context))
+    if keeper is None:
+        keeper = _KEEPERS[id(context)] = SessionKeeper(context, refresh, **kwargs)
+    return keeper
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Extracteur composite pour la page de détail boutique TrendTrack
+Charge la page une seule fois et exécute toutes les sondes JS enregistrées
+(trafic par pays, badges Live Ads 7d/30d, ...) dans un seul page.evaluate
+"""
+
+import sys
+import json
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from browser_pool import get_browser_pool, close_browser_pool
+from market_traffic_extractor import COUNTRY_SECTION_SELECTORS, COUNTRY_TRAFFIC_JS
+from live_ads_progression_extractor import LIVE_ADS_BADGES_JS, LIVE_ADS_READY_SELECTORS
+from readiness import ReadinessProbes
+
+logger = logging.getLogger(__name__)
+
+
+class ShopPageProbe:
+    """Sonde JS exécutée sur la page boutique"""
+
+    def __init__(self, name: str, script: str, defaults: Dict, ready_selectors: Optional[List[str]] = None):
+        self.name = name
+        self.script = script.strip()
+        self.defaults = defaults
+        self.ready_selectors = ready_selectors or []
+
+
+class ShopPageExtractor:
+    """Extracteur composite : une navigation, un evaluate, un enregistrement fusionné"""
+
+    def __init__(self, register_defaults: bool = True, readiness: ReadinessProbes = None):
+        self.timeout = 30000  # 30 secondes
+        self.ready_timeout = 10000  # 10 secondes
+        self.readiness = readiness or ReadinessProbes()
+        self.probes: Dict[str, ShopPageProbe] = {}
+        if register_defaults:
+            self.register_default_probes()
+
+    def register_probe(self, name: str, script: str, defaults: Dict, ready_selectors: Optional[List[str]] = None):
+        """
+        Enregistre une sonde JS.
+        `script` est une fonction JS sans argument retournant un objet dont les
+        clés sont fusionnées dans le résultat final.
+        """
+        self.probes[name] = ShopPageProbe(name, script, defaults, ready_selectors)
+
+    def register_default_probes(self):
+        """Enregistre les sondes trafic par pays et progression Live Ads"""
+        self.register_probe(
+            "country_traffic",
+            COUNTRY_TRAFFIC_JS,
+            {
+                "market_us": None,
+                "market_uk": None,
+                "market_de": None,
+                "market_ca": None,
+                "market_au": None,
+                "market_fr": None
+            },
+            ready_selectors=COUNTRY_SECTION_SELECTORS
+        )
+        self.register_probe(
+            "live_ads_badges",
+            LIVE_ADS_BADGES_JS,
+            {
+                "live_ads_7d": None,
+                "live_ads_30d": None
+            },
+            ready_selectors=LIVE_ADS_READY_SELECTORS
+        )
+
+    def build_script(self) -> str:
+        """Construit le script unique qui exécute toutes les sondes"""
+        probe_entries = ",\n".join(
+            f"{json.dumps(name)}: ({probe.script})" for name, probe in self.probes.items()
+        )
+        return f"""
+() => {{
+    const probes = {{
+{probe_entries}
+    }};
+    const results = {{}};
+    const errors = {{}};
+    for (const [name, probe] of Object.entries(probes)) {{
+        try {{
+            results[name] = probe();
+        }} catch (e) {{
+            errors[name] = String(e);
+        }}
+    }}
+    return {{ results, errors }};
+}}
+"""
+
+    def empty_record(self) -> Dict:
+        """Enregistrement vide avec les valeurs par défaut de toutes les sondes"""
+        record = {}
+        for probe in self.probes.values():
+            record.update(probe.defaults)
+        record["extracted_at"] = datetime.now(timezone.utc).isoformat()
+        return record
+
+    async def wait_until_ready(self, page) -> List[str]:
+        """
+        Attend, pour chaque sonde, sa propre section (un de ses sélecteurs) avant
+        l'evaluate commun. Les attentes tournent en parallèle avec une échéance
+        partagée : une sonde lente ne prolonge pas l'attente au-delà de ready_timeout.
+        Retourne les sondes prêtes (best effort).
+        """
+        probes = [probe for probe in self.probes.values() if probe.ready_selectors]
+        if not probes:
+            return list(self.probes)
+        matches = await asyncio.gather(*(
+            self.readiness.selector(page, probe.ready_selectors, f'shop_page:{probe.name}', self.ready_timeout / 1000)
+            for probe in probes
+        ))
+        ready = [name for name, probe in self.probes.items() if not probe.ready_selectors]
+        for probe, matched in zip(probes, matches):
+            if matched:
+                ready.append(probe.name)
+                logger.info(f"✅ Section {probe.name} trouvée avec le sélecteur: {matched}")
+            else:
+                logger.warning(f"⚠️ Section {probe.name} absente après {self.ready_timeout / 1000:.0f}s")
+        return ready
+
+    async def extract_from_page(self, page, shop_url) -> Dict:
+        """Navigue une seule fois puis exécute toutes les sondes en un seul evaluate"""
+        logger.info(f"🌐 Navigation vers la page de détail boutique: {shop_url}")
+        await page.goto(shop_url, wait_until='domcontentloaded', timeout=self.timeout)
+
+        record = self.empty_record()
+        if not await self.wait_until_ready(page):
+            logger.warning("⚠️ Aucune section attendue trouvée, exécution des sondes quand même")
+
+        outcome = await page.evaluate(self.build_script())
+        for name, values in (outcome.get("results") or {}).items():
+            if values:
+                record.update(values)
+        if outcome.get("errors"):
+            record["probe_errors"] = outcome["errors"]
+            logger.warning(f"⚠️ Erreurs de sondes: {outcome['errors']}")
+
+        logger.info(f"✅ Données page boutique extraites: {json.dumps(record, indent=2)}")
+        return record
+
+    async def extract_shop_page(self, shop_url, page=None) -> Dict:
+        """
+        Extrait toutes les métriques de la page boutique en une navigation.
+        Si `page` est fourni, l'extraction se fait sur cette page, sinon une
+        page est empruntée au pool de navigateurs partagé.
+        """
+        logger.info(f"🧩 Extraction composite page boutique pour: {shop_url} ({len(self.probes)} sondes)")
+
+        try:
+            if page is not None:
+                return await self.extract_from_page(page, shop_url)
+
+            async with get_browser_pool().page() as page:
+                return await self.extract_from_page(page, shop_url)
+
+        except Exception as e:
+            logger.error(f"❌ Erreur extraction composite page boutique: {e}")
+            record = self.empty_record()
+            record["error"] = str(e)
+            return record
+
+
+async def main():
+    """Fonction principale pour tester l'extracteur"""
+    if len(sys.argv) < 2:
+        print("Usage: python3 shop_page_extractor.py <shop_url>")
+        sys.exit(1)
+
+    # Configuration du logging (uniquement en mode CLI)
+    logging.basicConfig(level=logging.INFO)
+
+    shop_url = sys.argv[1]
+    extractor = ShopPageExtractor()
+
+    try:
+        result = await extractor.extract_shop_page(shop_url)
+        print(json.dumps(result, indent=2))
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+        sys.exit(1)
+    finally:
+        await close_browser_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Source des boutiques à scraper, filtrée directement en SQL
+L'éligibilité est un prédicat indexé (idx_shops_scraping_status_id, migration 2)
+au lieu d'un filtre Python sur toute la table : seules les boutiques éligibles
+sont lues, avec uniquement les colonnes utiles au scraper.
+Les boutiques peuvent aussi être lues en flux, page par page (keyset sur id),
+avec une mémoire constante quelle que soit la taille de la table.
+Avec refresh_stale, les boutiques déjà traitées dont une métrique a dépassé
+son TTL (table metric_freshness) sont reprises elles aussi.
+Les statuts éligibles étant déduits d'un échantillon, verify_rule() repasse
+ensuite sur toutes les boutiques et rend celles que la règle de l'API juge
+autrement que le prédicat SQL (l'appelant corrige alors la sélection).
+"""
+
+import asyncio
+import sqlite3
+import logging
+from contextlib import closing
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from freshness import stale_cutoffs
+
+logger = logging.getLogger(__name__)
+
+# Statuts à (re)traiter par défaut : jamais scrapé (NULL ou ''), partiel ou en échec.
+# Ce n'est qu'une valeur de repli : la règle de référence est
+# TrendTrackAPI.is_shop_eligible_for_scraping, d'où derive_eligible_statuses()
+# déduit la liste réellement utilisée (voir ShopDistributor.shop_source).
+ELIGIBLE_STATUSES = (None, '', 'partial', 'failed')
+
+SHOP_COLUMNS = "id, shop_name, shop_url"
+
+
+def status_params(statuses: Sequence[Optional[str]]) -> List[str]:
+    """Paramètres SQL du prédicat (NULL est traité à part)"""
+    return [status for status in statuses if status is not None]
+
+
+def eligibility_predicate(statuses: Sequence[Optional[str]] = ELIGIBLE_STATUSES) -> str:
+    """Prédicat SQL d'éligibilité (NULL si None est listé, statut dans la liste) - utilisable par l'index"""
+    clauses = []
+    if None in statuses:
+        clauses.append("scraping_status IS NULL")
+    params = status_params(statuses)
+    if params:
+        clauses.append(f"scraping_status IN ({', '.join('?' * len(params))})")
+    return f"({' OR '.join(clauses)})" if clauses else "(0)"
+
+
+def stale_predicate(cutoffs: Sequence[Tuple[str, Sequence[str]]]) -> Tuple[str, List]:
+    """
+    Prédicat SQL des boutiques dont au moins une métrique a expiré (table
+    metric_freshness, index de la migration 4) et ses paramètres.
+    """
+    clauses, params = [], []
+    for cutoff, metrics in cutoffs:
+        clauses.append(f"(metric IN ({', '.join('?' * len(metrics))}) AND fetched_at < ?)")
+        params += list(metrics) + [cutoff]
+    return f"id IN (SELECT shop_id FROM metric_freshness WHERE {' OR '.join(clauses)})", params
+
+
+def derive_eligible_statuses(db_path: str, is_eligible: Callable[[Dict], bool],
+                             samples: int = 3) -> Optional[Tuple[Optional[str], ...]]:
+    """
+    Statuts éligibles déduits de la règle de l'API : elle est appliquée aux
+    premières et dernières boutiques (par id) de chaque statut présent en base.
+    Retourne None si des boutiques d'un même statut sont jugées différemment :
+    la règle ne dépend pas que du statut et le filtre SQL ne peut pas la
+    remplacer (l'appelant garde alors le filtre Python de l'API).
+    L'échantillon ne prouve rien pour les autres lignes : ShopSource.verify_rule()
+    les contrôle toutes une fois la sélection faite.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    eligible: List[Optional[str]] = []
+    try:
+        statuses = [row[0] for row in conn.execute("SELECT DISTINCT scraping_status FROM shops")]
+        for status in statuses:
+            where = "scraping_status IS NULL" if status is None else "scraping_status = ?"
+            params = [] if status is None else [status]
+            rows = []
+            for order in ("ASC", "DESC"):
+                rows += conn.execute(
+                    f"SELECT * FROM shops WHERE {where} ORDER BY id {order} LIMIT ?", params + [samples]
+                ).fetchall()
+            verdicts = {bool(is_eligible(dict(row))) for row in rows}
+            if len(verdicts) > 1:
+                logger.warning(f"⚠️ Éligibilité non déductible du statut {status!r} : filtre de l'API conservé")
+                return None
+            if verdicts == {True}:
+                eligible.append(status)
+    finally:
+        conn.close()
+    logger.info(f"📋 Statuts éligibles (règle de l'API): {eligible}")
+    return tuple(eligible)
+
+
+def shop_domain(shop_url: str) -> str:
+    """Domaine utilisé par le scraper à partir de l'URL de la boutique"""
+    return (shop_url or '').replace('https://', '').replace('http://', '').replace('www.', '').strip('/')
+
+
+def row_to_shop(row: sqlite3.Row) -> Dict:
+    """Ligne SQL -> dict boutique attendu par le scraper (avec `domain`)"""
+    return {
+        'id': row['id'],
+        'shop_name': row['shop_name'],
+        'shop_url': row['shop_url'],
+        'domain': shop_domain(row['shop_url'])
+    }
+
+
+class ShopSource:
+    """Requêtes de sélection des boutiques éligibles sur la base TrendTrack"""
+
+    def __init__(self, db_path: str, statuses: Sequence[Optional[str]] = ELIGIBLE_STATUSES,
+                 project_source: Optional[str] = None, refresh_stale: bool = False,
+                 rule: Optional[Callable[[Dict], bool]] = None):
+        self.db_path = db_path
+        self.statuses = tuple(statuses)
+        self.project_source = project_source
+        # Boutiques déjà traitées (completed, na...) reprises quand une métrique a expiré
+        self.refresh_stale = refresh_stale
+        # Règle de l'API dont les statuts sont déduits (contrôlée ligne à ligne par verify_rule)
+        self.rule = rule
+        self._has_freshness: Optional[bool] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Connexion en lecture (lignes accessibles par nom de colonne)"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def has_freshness(self) -> bool:
+        """Table metric_freshness présente (migration 3 appliquée)"""
+        if self._has_freshness is None:
+            with closing(self._connect()) as conn:
+                self._has_freshness = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'metric_freshness'"
+                ).fetchone() is not None
+        return self._has_freshness
+
+    def _stale(self) -> Tuple[str, List]:
+        """Prédicat des métriques expirées et ses paramètres ("0" sans refresh_stale)"""
+        if self.refresh_stale and self.has_freshness():
+            return stale_predicate(stale_cutoffs())
+        return "0", []
+
+    def _where(self):
+        """Clause WHERE et paramètres (éligibilité ou métriques expirées + source optionnelle)"""
+        predicate = eligibility_predicate(self.statuses)
+        params: List = status_params(self.statuses)
+        stale, stale_params = self._stale()
+        if stale_params:
+            predicate = f"({predicate} OR {stale})"
+            params += stale_params
+        clauses = [predicate]
+        if self.project_source:
+            clauses.append("project_source = ?")
+            params.append(self.project_source)
+        return " AND ".join(clauses), params
+
+    def count_all(self) -> int:
+        """Nombre total de boutiques (pour les logs)"""
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM shops").fetchone()[0]
+
+    def count_eligible(self) -> int:
+        """Nombre de boutiques éligibles"""
+        where, params = self._where()
+        with closing(self._connect()) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM shops WHERE {where}", params).fetchone()[0]
+
+    def eligible_shops(self) -> List[Dict]:
+        """Boutiques éligibles (id, nom, URL, domaine) triées par id"""
+        where, params = self._where()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"SELECT {SHOP_COLUMNS} FROM shops WHERE {where} ORDER BY id", params).fetchall()
+        return [row_to_shop(row) for row in rows]
+
+    def fetch_page(self, after_id: int, limit: int) -> List[Dict]:
+        """Page keyset : boutiques éligibles d'id > after_id, triées par id"""
+        where, params = self._where()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT {SHOP_COLUMNS} FROM shops WHERE {where} AND id > ? ORDER BY id LIMIT ?",
+                params + [after_id, limit]
+            ).fetchall()
+        return [row_to_shop(row) for row in rows]
+
+    def verify_rule(self, page_size: int = 500) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Parcours keyset de toutes les boutiques : la règle de l'API est appliquée
+        à chaque ligne et comparée au prédicat de statuts. Retourne (oubliées,
+        en trop) : éligibles pour l'API mais pas pour le SQL, et l'inverse.
+        Les boutiques reprises pour métriques expirées ne sont pas comparées.
+        """
+        if not self.rule:
+            return [], []
+        eligible = eligibility_predicate(self.statuses)
+        stale, stale_params = self._stale()
+        scope, scope_params = ("project_source = ?", [self.project_source]) if self.project_source else ("1", [])
+        missed: List[Dict] = []
+        extra: List[Dict] = []
+        last_id = 0
+        with closing(self._connect()) as conn:
+            while True:
+                rows = conn.execute(
+                    f"SELECT *, {eligible} AS sql_eligible, {stale} AS sql_stale FROM shops "
+                    f"WHERE {scope} AND id > ? ORDER BY id LIMIT ?",
+                    status_params(self.statuses) + stale_params + scope_params + [last_id, page_size]
+                ).fetchall()
+                for row in rows:
+                    if row['sql_stale']:
+                        continue
+                    shop = {key: row[key] for key in row.keys() if key not in ('sql_eligible', 'sql_stale')}
+                    if bool(self.rule(shop)) != bool(row['sql_eligible']):
+                        (extra if row['sql_eligible'] else missed).append(row_to_shop(row))
+                if len(rows) < page_size:
+                    break
+                last_id = rows[-1]['id']
+        if missed or extra:
+            logger.warning(f"⚠️ Règle de l'API et statuts {list(self.statuses)} en désaccord : "
+                           f"{len(missed)} boutiques oubliées, {len(extra)} en trop")
+        return missed, extra
+
+    async def stream_eligible_shops(self, page_size: int = 500, prefetch_pages: int = 2) -> AsyncIterator[List[Dict]]:
+        """
+        Générateur asynchrone de pages de boutiques éligibles.
+        Un producteur lit les pages (thread) dans une file bornée à
+        `prefetch_pages` pages : il s'arrête tant que le consommateur ne suit pas.
+        """
+        pages: asyncio.Queue = asyncio.Queue(maxsize=prefetch_pages)
+        errors: List[Exception] = []
+
+        async def produce():
+            last_id = 0
+            try:
+                while True:
+                    page = await asyncio.to_thread(self.fetch_page, last_id, page_size)
+                    if page:
+                        await pages.put(page)
+                        last_id = page[-1]['id']
+                    if len(page) < page_size:
+                        break
+            except Exception as e:
+                errors.append(e)
+            await pages.put(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                page = await pages.get()
+                if page is None:
+                    break
+                yield page
+            if errors:
+                raise errors[0]
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
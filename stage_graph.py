@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Graphe d'étapes (DAG) pour le traitement d'une boutique
+Chaque étape déclare ses dépendances ; les étapes indépendantes tournent en
+parallèle avec une concurrence bornée, un timeout par étape et un résultat
+par étape. Le temps total d'une boutique devient le chemin critique du graphe
+au lieu de la somme de toutes les étapes.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Statuts possibles d'une étape
+STATUS_SUCCESS = 'success'
+STATUS_FAILED = 'failed'
+STATUS_TIMEOUT = 'timeout'
+STATUS_SKIPPED = 'skipped'
+STATUS_CANCELLED = 'cancelled'
+
+
+class Stage:
+    """Étape du graphe : une coroutine, ses dépendances et son timeout"""
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Awaitable[Any]],
+                 depends_on: Iterable[str] = (), timeout: Optional[float] = None,
+                 abort_on: Optional[Callable[[Any], bool]] = None):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        self.abort_on = abort_on
+
+
+class StageGraph:
+    """Exécute un ensemble d'étapes dépendantes avec une concurrence bornée"""
+
+    def __init__(self, max_concurrency: int = 4, default_timeout: Optional[float] = 60):
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self.stages: Dict[str, Stage] = {}
+        self.aborted_by: Optional[str] = None
+
+    def add_stage(self, name: str, func: Callable[[Dict[str, Any]], Awaitable[Any]],
+                  depends_on: Iterable[str] = (), timeout: Optional[float] = None,
+                  abort_on: Optional[Callable[[Any], bool]] = None):
+        """
+        Ajoute une étape.
+        `func` reçoit un dict {nom_dépendance: valeur} et retourne un awaitable.
+        `abort_on(valeur)` vrai => toutes les autres étapes sont annulées.
+        """
+        if name in self.stages:
+            raise ValueError(f"Étape déjà déclarée: {name}")
+        self.stages[name] = Stage(name, func, depends_on, timeout if timeout is not None else self.default_timeout, abort_on)
+        return self
+
+    def _validate(self):
+        """Vérifie que les dépendances existent et qu'il n'y a pas de cycle"""
+        for stage in self.stages.values():
+            for dep in stage.depends_on:
+                if dep not in self.stages:
+                    raise ValueError(f"Étape {stage.name}: dépendance inconnue {dep}")
+
+        visiting, visited = set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle détecté dans le graphe d'étapes autour de {name}")
+            visiting.add(name)
+            for dep in self.stages[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    async def _run_stage(self, stage: Stage, deps: Dict[str, Any], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """Exécute une étape sous le sémaphore et retourne son résultat"""
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                value = await asyncio.wait_for(stage.func(deps), timeout=stage.timeout)
+                return {'status': STATUS_SUCCESS, 'value': value, 'error': None,
+                        'duration': time.perf_counter() - start}
+            except asyncio.TimeoutError:
+                return {'status': STATUS_TIMEOUT, 'value': None, 'error': f"timeout {stage.timeout}s",
+                        'duration': time.perf_counter() - start}
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                return {'status': STATUS_FAILED, 'value': None, 'error': str(e),
+                        'duration': time.perf_counter() - start}
+
+    async def run(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Exécute le graphe et retourne {nom_étape: {status, value, error, duration}}
+        Une étape dont une dépendance n'a pas réussi est marquée 'skipped'.
+        """
+        self._validate()
+        self.aborted_by = None
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = dict(self.stages)
+        running: Dict[asyncio.Task, str] = {}
+
+        def skipped(reason):
+            return {'status': STATUS_SKIPPED, 'value': None, 'error': reason, 'duration': 0.0}
+
+        while pending or running:
+            # Lancer toutes les étapes dont les dépendances sont résolues
+            progress = True
+            while progress:
+                progress = False
+                for name in list(pending):
+                    stage = pending[name]
+                    if any(dep not in results for dep in stage.depends_on):
+                        continue
+                    del pending[name]
+                    progress = True
+                    failed_deps = [d for d in stage.depends_on if results[d]['status'] != STATUS_SUCCESS]
+                    if failed_deps:
+                        results[name] = skipped(f"dépendance non satisfaite: {', '.join(failed_deps)}")
+                        continue
+                    deps = {d: results[d]['value'] for d in stage.depends_on}
+                    running[asyncio.create_task(self._run_stage(stage, deps, semaphore))] = name
+
+            if not running:
+                break
+
+            done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = running.pop(task)
+                results[name] = task.result()
+                stage = self.stages[name]
+                if (stage.abort_on and results[name]['status'] == STATUS_SUCCESS
+                        and stage.abort_on(results[name]['value'])):
+                    self.aborted_by = name
+
+            if self.aborted_by:
+                # Annuler les étapes en cours et celles qui n'ont pas démarré
+                for task, name in running.items():
+                    task.cancel()
+                    results[name] = {'status': STATUS_CANCELLED, 'value': None,
+                                     'error': f"annulée par {self.aborted_by}", 'duration': 0.0}
+                await asyncio.gather(*running.keys(), return_exceptions=True)
+                running.clear()
+                for name in pending:
+                    results[name] = {'status': STATUS_CANCELLED, 'value': None,
+                                     'error': f"annulée par {self.aborted_by}", 'duration': 0.0}
+                pending.clear()
+
+        return results
+
+
+def format_stage_results(results: Dict[str, Dict[str, Any]]) -> str:
+    """Résumé compact des résultats d'étapes pour les logs"""
+    return ", ".join(f"{name}={r['status']}({r['duration']:.1f}s)" for name, r in results.items())
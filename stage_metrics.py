@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Histogrammes de latence par étape (RPC, navigation, sélecteur, extracteur, écriture DB)
+Chaque mesure est rangée par (type, nom, worker) dans un histogramme à buckets
+fixes. Les histogrammes sont exposés au format texte Prometheus sur un port
+HTTP local et résumés en JSON (p50/p95/max) dans le rapport de fin de run.
+"""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bornes des buckets en secondes (du fetch rapide à l'extracteur lent)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+METRIC_NAME = "scraper_stage_duration_seconds"
+ERRORS_NAME = "scraper_stage_errors_total"
+
+
+class Histogram:
+    """Histogramme cumulable : comptes par bucket, somme, nombre, max et erreurs"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # dernier = +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+        self.errors = 0
+
+    def observe(self, seconds: float, error: bool = False):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.sum += seconds
+        self.count += 1
+        self.max = max(self.max, seconds)
+        if error:
+            self.errors += 1
+
+    def merge(self, other: Dict):
+        """Ajoute un histogramme sérialisé (to_dict) ayant les mêmes buckets"""
+        for i, count in enumerate(other['counts']):
+            self.counts[i] += count
+        self.sum += other['sum']
+        self.count += other['count']
+        self.max = max(self.max, other['max'])
+        self.errors += other.get('errors', 0)
+
+    def quantile(self, q: float) -> float:
+        """Estimation par la borne haute du bucket qui contient le quantile"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {'counts': list(self.counts), 'sum': self.sum, 'count': self.count,
+                'max': self.max, 'errors': self.errors}
+
+
+class StageMetrics:
+    """Registre des histogrammes, partagé par les workers d'un même processus"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.histograms: Dict[Tuple[str, str, str], Histogram] = {}
+        # Les écritures DB sont mesurées dans des threads, l'export HTTP aussi
+        self._lock = threading.Lock()
+
+    def observe(self, kind: str, name: str, seconds: float, worker=None, error: bool = False):
+        key = (kind, name, "" if worker is None else str(worker))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds, error)
+
+    @contextmanager
+    def time(self, kind: str, name: str, worker=None):
+        """Mesure le bloc (sync ou contenant des await) ; une exception compte comme erreur"""
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(kind, name, time.perf_counter() - start, worker, error)
+
+    def snapshot(self, worker=None) -> List[Dict]:
+        """Histogrammes sérialisables (optionnellement ceux d'un seul worker)"""
+        with self._lock:
+            return [
+                {'kind': kind, 'name': name, 'worker': label, **histogram.to_dict()}
+                for (kind, name, label), histogram in sorted(self.histograms.items())
+                if worker is None or label == str(worker)
+            ]
+
+    def prometheus_text(self) -> str:
+        """Export au format d'exposition texte Prometheus"""
+        lines = [
+            f"# HELP {METRIC_NAME} Durée des étapes du scraper par type et par nom",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        errors = [
+            f"# HELP {ERRORS_NAME} Étapes terminées en erreur",
+            f"# TYPE {ERRORS_NAME} counter",
+        ]
+        for entry in self.snapshot():
+            labels = f'kind="{escape_label(entry["kind"])}",name="{escape_label(entry["name"])}",worker="{entry["worker"]}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), entry['counts']):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{METRIC_NAME}_sum{{{labels}}} {entry['sum']:.6f}")
+            lines.append(f"{METRIC_NAME}_count{{{labels}}} {entry['count']}")
+            errors.append(f"{ERRORS_NAME}{{{labels}}} {entry['errors']}")
+        return "\n".join(lines + errors) + "\n"
+
+
+def escape_label(value: str) -> str:
+    """Échappement des valeurs de labels Prometheus"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def summarize(snapshots: Iterable[Dict], buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Dict[str, Dict]:
+    """
+    Résumé JSON de fin de run : les histogrammes de tous les workers sont
+    fusionnés par (type, nom), triés par temps total décroissant.
+    """
+    merged: Dict[Tuple[str, str], Histogram] = {}
+    for entry in snapshots:
+        key = (entry['kind'], entry['name'])
+        if key not in merged:
+            merged[key] = Histogram(buckets)
+        merged[key].merge(entry)
+
+    summary = {}
+    for (kind, name), histogram in sorted(merged.items(), key=lambda item: -item[1].sum):
+        summary[f"{kind}:{name}"] = {
+            'count': histogram.count,
+            'errors': histogram.errors,
+            'total_s': round(histogram.sum, 3),
+            'avg_s': round(histogram.sum / histogram.count, 3) if histogram.count else 0.0,
+            'p50_s': round(histogram.quantile(0.5), 3),
+            'p95_s': round(histogram.quantile(0.95), 3),
+            'max_s': round(histogram.max, 3),
+        }
+    return summary
+
+
+class MetricsServer:
+    """Endpoint HTTP local (thread démon) qui sert /metrics au format Prometheus"""
+
+    def __init__(self, registry: StageMetrics, port: int, host: str = "127.0.0.1"):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        logger.info(f"📈 Métriques Prometheus exposées sur http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+# Registre du processus (un par processus worker en mode process)
+REGISTRY = StageMetrics()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests du pré-chargement groupé des analytics existantes
+"""
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+
+from analytics_format import ANALYTICS_FIELDS
+from analytics_prefetch import AnalyticsPrefetcher, load_analytics_bulk, non_empty
+
+
+def make_db():
+    """Base temporaire avec une table analytics aux colonnes écrites par le scraper"""
+    path = os.path.join(tempfile.mkdtemp(), "analytics.db")
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE analytics (shop_id INTEGER, {', '.join(f'{c} TEXT' for c in ANALYTICS_FIELDS)}, "
+                 f"created_at TEXT)")
+    conn.executemany("INSERT INTO analytics (shop_id, organic_traffic, cpc, created_at) VALUES (?, ?, ?, ?)", [
+        (1, "12000", "", "2026-09-01"),
+        (2, "na", "1.5", "2026-09-01"),
+        (2, "3400", "1.7", "2026-10-01"),
+    ])
+    conn.commit()
+    conn.close()
+    return path
+
+
+class FakeAPI:
+    """API simulée : get_shop_analytics() lit une ligne par boutique avec sa propre requête"""
+
+    def __init__(self, db_path, order="DESC"):
+        self.db_path = db_path
+        self.order = order
+        self.calls = []
+
+    def get_shop_analytics(self, shop_id):
+        self.calls.append(shop_id)
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        row = conn.execute(f"SELECT * FROM analytics WHERE shop_id = ? ORDER BY rowid {self.order} LIMIT 1",
+                           (shop_id,)).fetchone()
+        conn.close()
+        return dict(row) if row else {}
+
+
+def test_bulk_load_keeps_latest_non_empty_values():
+    """Une requête pour plusieurs boutiques, valeurs vides retirées, dernière ligne gagnante"""
+    analytics = load_analytics_bulk(make_db(), [1, 2, 3])
+    assert analytics == {1: {"organic_traffic": "12000"}, 2: {"organic_traffic": "3400", "cpc": "1.7"}}
+
+
+def test_prefetch_serves_from_cache_and_invalidates():
+    """Après le pré-chargement, get() ne relit pas la base ; invalidate() force une relecture"""
+    prefetcher = AnalyticsPrefetcher(make_db())
+
+    async def scenario():
+        await prefetcher.prefetch([1, 2, 3])
+        assert await prefetcher.get(3) == {}
+        assert (await prefetcher.get(1))["organic_traffic"] == "12000"
+        prefetcher.invalidate(1)
+        await prefetcher.get(1)
+
+    asyncio.run(scenario())
+    assert prefetcher.stats == {'bulk_queries': 2, 'hits': 2, 'misses': 1, 'parity_mismatches': 0}
+
+
+def test_fallback_when_bulk_query_fails():
+    """Sans table lisible, repli sur la lecture boutique par boutique"""
+    calls = []
+
+    def fallback(shop_id):
+        calls.append(shop_id)
+        return {"cpc": "2"}
+
+    prefetcher = AnalyticsPrefetcher(os.path.join(tempfile.mkdtemp(), "empty.db"), fallback=fallback)
+    assert asyncio.run(prefetcher.get(7)) == {"cpc": "2"}
+    assert calls == [7]
+
+
+def test_prefetched_rows_match_api_get_shop_analytics():
+    """Parité : pour chaque boutique, les lignes pré-chargées valent api.get_shop_analytics()"""
+    path = make_db()
+    api = FakeAPI(path)
+    prefetcher = AnalyticsPrefetcher(path, fallback=api.get_shop_analytics)
+
+    async def scenario():
+        await prefetcher.prefetch([1, 2, 3])
+        return {shop_id: await prefetcher.get(shop_id) for shop_id in (1, 2, 3)}
+
+    prefetched = asyncio.run(scenario())
+    for shop_id, row in prefetched.items():
+        assert non_empty(row) == non_empty(api.get_shop_analytics(shop_id))
+    assert prefetcher.bulk_enabled and prefetcher.stats['parity_mismatches'] == 0
+
+
+def test_parity_mismatch_falls_back_to_api():
+    """Si l'API ne retient pas la même ligne, les analytics viennent de l'API boutique par boutique"""
+    path = make_db()
+    api = FakeAPI(path, order="ASC")
+    prefetcher = AnalyticsPrefetcher(path, fallback=api.get_shop_analytics)
+
+    async def scenario():
+        await prefetcher.prefetch([1, 2])
+        await prefetcher.prefetch([3])
+        return await prefetcher.get(2)
+
+    assert non_empty(asyncio.run(scenario())) == {"organic_traffic": "na", "cpc": "1.5"}
+    assert not prefetcher.bulk_enabled and prefetcher.stats['parity_mismatches'] == 1
+    assert prefetcher.stats['bulk_queries'] == 1
+    assert api.calls == [1, 2, 1, 2, 3]
+
+
+if __name__ == "__main__":
+    test_bulk_load_keeps_latest_non_empty_values()
+    test_prefetch_serves_from_cache_and_invalidates()
+    test_fallback_when_bulk_query_fails()
+    test_prefetched_rows_match_api_get_shop_analytics()
+    test_parity_mismatch_falls_back_to_api()
+    print("🎉 Tous les tests du pré-chargement des analytics sont passés !")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests de la barrière d'authentification (réveil immédiat, résultat transmis, meneur mort)
+"""
+
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+from auth_barrier import FAILED, SUCCESS, TIMEOUT, AuthBarrier
+
+
+def lead_in_process(lock_dir, hold, success, crash=False):
+    """Meneur dans un autre processus : tient la barrière `hold` secondes"""
+    async def lead():
+        barrier = AuthBarrier(lock_dir)
+        await barrier.begin()
+        await asyncio.sleep(hold)
+        if crash:
+            os._exit(1)
+        barrier.finish(success, "" if success else "identifiants refusés")
+    asyncio.run(lead())
+
+
+def run_waiter_against_process(hold, success, crash=False):
+    with tempfile.TemporaryDirectory() as lock_dir:
+        AuthBarrier(lock_dir).reset()
+        process = multiprocessing.get_context("spawn").Process(
+            target=lead_in_process, args=(lock_dir, hold, success, crash))
+        process.start()
+        start = time.perf_counter()
+        outcome = asyncio.run(AuthBarrier(lock_dir).wait(timeout=30))
+        elapsed = time.perf_counter() - start
+        process.join()
+        return outcome, elapsed
+
+
+def test_same_process_waiters_wake_on_event():
+    """Workers du même processus : réveillés dès la fin, avec le résultat"""
+    with tempfile.TemporaryDirectory() as lock_dir:
+        async def scenario():
+            leader = AuthBarrier(lock_dir)
+            leader.reset()
+            waiters = [asyncio.ensure_future(AuthBarrier(lock_dir).wait(timeout=5)) for _ in range(3)]
+            await leader.begin()
+            await asyncio.sleep(0.05)
+            finished_at = time.perf_counter()
+            leader.finish(True)
+            outcomes = await asyncio.gather(*waiters)
+            return outcomes, time.perf_counter() - finished_at
+
+        outcomes, lag = asyncio.run(scenario())
+        assert outcomes == [SUCCESS] * 3
+        assert lag < 0.1
+
+
+def test_cross_process_failure_is_reported():
+    """Meneur dans un autre processus : l'échec est transmis sans attendre 5s de scrutation"""
+    outcome, elapsed = run_waiter_against_process(hold=0.5, success=False)
+    assert outcome == FAILED
+    assert elapsed < 4
+
+
+def test_dead_leader_releases_waiters():
+    """Meneur mort en cours d'authentification : verrou libéré par le système, échec"""
+    outcome, _ = run_waiter_against_process(hold=0.2, success=True, crash=True)
+    assert outcome == FAILED
+
+
+def test_no_leader_times_out():
+    """Aucun meneur : 'timeout' à l'échéance"""
+    with tempfile.TemporaryDirectory() as lock_dir:
+        barrier = AuthBarrier(lock_dir)
+        barrier.reset()
+        assert asyncio.run(barrier.wait(timeout=0.3)) == TIMEOUT
+
+
+if __name__ == "__main__":
+    test_same_process_waiters_wake_on_event()
+    test_cross_process_failure_is_reported()
+    test_dead_leader_releases_waiters()
+    test_no_leader_times_out()
+    print("🎉 Tests barrière d'authentification OK")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests de l'état d'authentification persisté (chiffré, avec expiration)
+"""
+
+import base64
+import tempfile
+import time
+from pathlib import Path
+
+from auth_state import AuthStateStore, state_expiry
+
+
+class FakeCipher:
+    """Chiffreur réversible de test (même interface que Fernet)"""
+
+    def encrypt(self, data: bytes) -> bytes:
+        return base64.b64encode(data[::-1])
+
+    def decrypt(self, token: bytes) -> bytes:
+        return base64.b64decode(token)[::-1]
+
+
+def storage_state(expires):
+    return {
+        'cookies': [
+            {'name': 'amember_login', 'value': 'user', 'domain': 'app.mytoolsplan.com', 'expires': expires},
+            {'name': 'tracking', 'value': 'x', 'domain': 'app.mytoolsplan.com', 'expires': time.time() + 5},
+            {'name': 'PHPSESSID', 'value': 'abc', 'domain': 'app.mytoolsplan.com', 'expires': -1},
+        ],
+        'origins': [],
+    }
+
+
+def test_state_round_trip_is_encrypted():
+    """L'état relu est identique, et le fichier ne contient pas les cookies en clair"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "auth_state.bin"
+        store = AuthStateStore(str(path), FakeCipher(), auth_cookies=('amember_login',))
+        state = storage_state(time.time() + 3600)
+        assert store.save(state)
+        assert b'amember_login' not in path.read_bytes()
+        assert store.load() == state
+        assert path.stat().st_mode & 0o077 == 0
+
+
+def test_expired_or_corrupted_state_is_dropped():
+    """État expiré ou illisible : None et fichier supprimé (login complet)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "auth_state.bin"
+        store = AuthStateStore(str(path), FakeCipher(), auth_cookies=('amember_login',))
+        store.save(storage_state(time.time() - 10))
+        assert store.load() is None and not path.exists()
+
+        path.write_bytes(b'not-a-token')
+        assert store.load() is None and not path.exists()
+
+
+def test_no_cipher_never_writes_plaintext():
+    """Sans chiffreur (cryptography absent), rien n'est écrit"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "auth_state.bin"
+        store = AuthStateStore(str(path), cipher=None)
+        assert not store.save(storage_state(time.time() + 3600))
+        assert not path.exists() and store.load() is None
+
+
+def test_expiry_uses_auth_cookies_and_max_age():
+    """Expiration : cookie d'auth le plus proche, borné par max_age ; les autres cookies sont ignorés"""
+    now = time.time()
+    assert state_expiry(storage_state(now + 600), now, 3600, ('amember_login',)) == now + 600
+    assert state_expiry(storage_state(now + 7200), now, 3600, ('amember_login',)) == now + 3600
+
+
+if __name__ == "__main__":
+    test_state_round_trip_is_encrypted()
+    test_expired_or_corrupted_state_is_dropped()
+    test_no_cipher_never_writes_plaintext()
+    test_expiry_uses_auth_cookies_and_max_age()
+    print("🎉 Tests état d'authentification persisté OK")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests de l'index persistant domaine -> Folder ID (pagination, reprise, âge, sauvegarde)
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from folder_index import FolderIndex
+
+
+class FakeFolders:
+    """API folders/selector-list simulée : pages de la liste, offsets demandés enregistrés"""
+
+    def __init__(self, count):
+        self.projects = [{'id': 1000 + i, 'domain': f"https://www.shop{i}.com/"} for i in range(count)]
+        self.offsets = []
+        self.fail = False
+
+    async def fetch_page(self, offset, limit):
+        self.offsets.append(offset)
+        if self.fail:
+            return {'success': False, 'error': 'HTTP 500'}
+        return {'success': True, 'data': {'projects': self.projects[offset:offset + limit]}}
+
+    def create(self):
+        """Nouveau dossier ajouté en fin de liste"""
+        i = len(self.projects)
+        self.projects.append({'id': 1000 + i, 'domain': f"shop{i}.com"})
+
+
+def index_path():
+    return os.path.join(tempfile.mkdtemp(), "folder_index.json")
+
+
+def test_full_refresh_reads_every_page():
+    """Chargement complet : toutes les pages jusqu'à la dernière incomplète, domaines normalisés"""
+    api = FakeFolders(25)
+    index = FolderIndex(index_path(), page_size=10)
+
+    assert asyncio.run(index.load(api.fetch_page))
+    assert api.offsets == [0, 10, 20]
+    assert len(index.folders) == 25 and index.folders_seen == 25
+    assert index.get("https://shop7.com") == "1007"
+    assert index.get("www.SHOP24.com") == "1024"
+
+
+def test_incremental_refresh_resumes_from_folders_seen():
+    """Rafraîchissement incrémental : reprise une page avant folders_seen, nouveaux dossiers trouvés"""
+    api = FakeFolders(25)
+    index = FolderIndex(index_path(), page_size=10)
+    asyncio.run(index.refresh(api.fetch_page, full=True))
+
+    api.create()
+    api.create()
+    api.offsets.clear()
+    assert asyncio.run(index.refresh(api.fetch_page))
+    assert api.offsets == [15, 25]
+    assert index.get("shop26.com") == "1026"
+    assert index.folders_seen == 27
+
+
+def test_added_folder_moves_resume_offset():
+    """Un dossier créé par le scraper compte dans folders_seen (pas relu depuis le début)"""
+    api = FakeFolders(20)
+    index = FolderIndex(index_path(), page_size=10)
+    asyncio.run(index.refresh(api.fetch_page, full=True))
+
+    api.create()
+    index.add("shop20.com", 1020)
+    assert index.get("shop20.com") == "1020" and index.folders_seen == 21
+    api.offsets.clear()
+    asyncio.run(index.refresh(api.fetch_page))
+    assert api.offsets == [11, 21]
+
+
+def test_old_index_on_disk_falls_back_to_full_reload():
+    """Index disque plus vieux que max_age : relecture complète ; récent : incrémental"""
+    path = index_path()
+    api = FakeFolders(15)
+    asyncio.run(FolderIndex(path, page_size=10).load(api.fetch_page))
+
+    api.offsets.clear()
+    recent = FolderIndex(path, page_size=10, max_age=3600)
+    assert asyncio.run(recent.load(api.fetch_page))
+    assert api.offsets == [5, 15]
+
+    with open(path) as f:
+        data = json.load(f)
+    data['refreshed_at'] = time.time() - 7200
+    data['folders']['stale.com'] = "999"
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+    # Entre-temps, trois dossiers supprimés côté API
+    del api.projects[12:]
+    api.offsets.clear()
+    old = FolderIndex(path, page_size=10, max_age=3600)
+    assert asyncio.run(old.load(api.fetch_page))
+    assert api.offsets == [0, 10]
+    assert old.get("stale.com") is None and len(old.folders) == 12
+    assert old.folders_seen == 12
+
+
+def test_save_is_atomic_and_reloads():
+    """Sauvegarde par renommage (aucun fichier temporaire restant), relue à l'identique"""
+    path = index_path()
+    api = FakeFolders(12)
+    index = FolderIndex(path, page_size=10)
+    asyncio.run(index.refresh(api.fetch_page, full=True))
+    index.add("new-shop.com", 4242)
+
+    assert os.listdir(os.path.dirname(path)) == ["folder_index.json"]
+    reloaded = FolderIndex(path, page_size=10)
+    assert reloaded._load_from_disk()
+    assert reloaded.folders == index.folders
+    assert reloaded.folders_seen == index.folders_seen == 13
+    assert reloaded.refreshed_at == index.refreshed_at
+
+
+def test_api_error_keeps_index_unloaded():
+    """Erreur API : échec signalé, index non marqué comme chargé"""
+    api = FakeFolders(5)
+    api.fail = True
+    index = FolderIndex(index_path(), page_size=10)
+    assert not asyncio.run(index.load(api.fetch_page))
+    assert not index.loaded
+
+
+if __name__ == "__main__":
+    test_full_refresh_reads_every_page()
+    test_incremental_refresh_resumes_from_folders_seen()
+    test_added_folder_moves_resume_offset()
+    test_old_index_on_disk_falls_back_to_full_reload()
+    test_save_is_atomic_and_reloads()
+    test_api_error_keeps_index_unloaded()
+    print("🎉 Tests index des dossiers OK")
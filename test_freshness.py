@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests de la fraîcheur des métriques (TTL par famille, étapes à relancer)
+"""
+
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from analytics_format import ANALYTICS_FIELDS, EXTRA_METRICS, format_analytics
+from freshness import STAGE_METRICS, FreshnessPlanner, FreshnessStore, fetched_metrics
+from migrations import migrate
+
+NOW = datetime(2025, 9, 15, tzinfo=timezone.utc)
+
+
+def ago(**delta):
+    """Horodatage ISO il y a `delta`"""
+    return (NOW - timedelta(**delta)).isoformat()
+
+
+def test_only_fresh_metrics_are_kept():
+    """organic (30 j) encore valable, marché (7 j) expiré, métrique sans horodatage périmée"""
+    planner = FreshnessPlanner()
+    existing = {"organic_traffic": "12000", "market_us": "0.5", "aov": "40", "pixel_google": "na"}
+    timestamps = {"organic_traffic": ago(days=10), "market_us": ago(days=8), "pixel_google": ago(hours=1)}
+
+    fresh = planner.fresh_metrics(existing, timestamps, now=NOW)
+    assert fresh == {"organic_traffic": "12000"}
+
+
+def test_without_timestamps_keeps_legacy_behaviour():
+    """Sans suivi de fraîcheur, toute valeur présente reste valable (comme avant)"""
+    planner = FreshnessPlanner()
+    existing = {"organic_traffic": "12000"}
+    assert planner.fresh_metrics(existing, None) == existing
+
+
+def test_stale_stages():
+    """Seules les étapes dont une métrique manque ou a expiré sont relancées"""
+    planner = FreshnessPlanner()
+    fresh = {"pixel_google": "yes", "pixel_facebook": "no", "total_products": "120", "aov": "40"}
+    assert planner.stale_stages(fresh) == {"domain_overview", "shop_page", "cpc"}
+
+
+def test_stage_metrics_are_written_by_formatter():
+    """Chaque métrique d'étape est une colonne écrite : une boutique complète n'a aucune étape à relancer"""
+    tracked = {metric for metrics in STAGE_METRICS.values() for metric in metrics}
+    assert tracked <= set(ANALYTICS_FIELDS)
+
+    session_data = {'data': {
+        'domain_overview': {
+            'organic_search_traffic': '12000', 'paid_search_traffic': '300', 'bounce_rate': '0.4',
+            'avg_visit_duration': '95', 'traffic': '15000', 'branded_traffic': '2000', 'conversion_rate': '0.02'
+        },
+        'traffic_analysis': {'visits': '18000'},
+    }}
+    extra = {metric: '1' for metric in EXTRA_METRICS}
+    row = format_analytics(session_data, extra)
+
+    planner = FreshnessPlanner()
+    timestamps = {metric: ago(hours=1) for metric in row}
+    fresh = planner.fresh_metrics(row, timestamps, now=NOW)
+    assert planner.stale_stages(fresh) == set()
+
+
+def test_store_records_and_loads_timestamps():
+    """Les métriques récupérées sont horodatées puis relues par lot"""
+    path = os.path.join(tempfile.mkdtemp(), "shops.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE shops (id INTEGER PRIMARY KEY, shop_url TEXT, scraping_status TEXT, "
+                 "updated_at TEXT, project_source TEXT)")
+    conn.close()
+    migrate(path)
+
+    store = FreshnessStore(path)
+    store.record([(1, ["aov"]), (2, ["cpc"])], fetched_at=ago(days=1))
+    store.record([(1, ["aov"])], fetched_at=ago(hours=1))
+
+    timestamps = store.load([1, 2, 3])
+    assert timestamps == {1: {"aov": ago(hours=1)}, 2: {"cpc": ago(days=1)}, 3: {}}
+
+
+def test_reused_fresh_metrics_keep_their_timestamp():
+    """Une métrique fraîche réécrite telle quelle n'est pas réhorodatée : elle finit par expirer"""
+    path = os.path.join(tempfile.mkdtemp(), "shops.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE shops (id INTEGER PRIMARY KEY, shop_url TEXT, scraping_status TEXT, "
+                 "updated_at TEXT, project_source TEXT)")
+    conn.close()
+    migrate(path)
+
+    store = FreshnessStore(path)
+    store.record([(1, ["organic_traffic", "aov"])], fetched_at=ago(days=29))
+
+    planner = FreshnessPlanner()
+    existing = {"organic_traffic": "12000", "aov": "40"}
+    reused = planner.fresh_metrics(existing, store.load([1])[1], now=NOW)
+    assert reused == {"organic_traffic": "12000"}
+
+    # Ligne écrite : organic repris, aov re-scrapé, cpc nouveau, pixel vide
+    row = {"organic_traffic": "12000", "aov": "42", "cpc": "1.2", "pixel_google": ""}
+    assert sorted(fetched_metrics(row, reused)) == ["aov", "cpc"]
+    store.record([(1, fetched_metrics(row, reused))], fetched_at=ago(hours=1))
+
+    timestamps = store.load([1])[1]
+    assert timestamps["organic_traffic"] == ago(days=29)
+    assert timestamps["aov"] == ago(hours=1) and timestamps["cpc"] == ago(hours=1)
+    later = NOW + timedelta(days=2)
+    assert "organic_traffic" not in planner.fresh_metrics(row, timestamps, now=later)
+
+
+if __name__ == "__main__":
+    test_only_fresh_metrics_are_kept()
+    test_without_timestamps_keeps_legacy_behaviour()
+    test_stale_stages()
+    test_stage_metrics_are_written_by_formatter()
+    test_store_records_and_loads_timestamps()
+    test_reused_fresh_metrics_keep_their_timestamp()
+    print("🎉 Tous les tests de fraîcheur des métriques sont passés !")
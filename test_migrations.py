@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests du moteur de migrations versionnées
+"""
+
+import os
+import sqlite3
+import tempfile
+
+from migrations import MIGRATIONS, Migration, migrate, table_columns
+
+
+def make_db():
+    """Base temporaire avec l'ancienne table shops (sans colonnes live_ads)"""
+    path = os.path.join(tempfile.mkdtemp(), "shops.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE shops (id INTEGER PRIMARY KEY, shop_url TEXT, scraping_status TEXT, "
+                 "updated_at TEXT, project_source TEXT)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_migrations_apply_once_in_order():
+    """Toutes les migrations sont appliquées puis ne sont plus rejouées"""
+    path = make_db()
+    latest = max(m.version for m in MIGRATIONS)
+    assert migrate(path) == latest
+    assert migrate(path) == latest
+
+    conn = sqlite3.connect(path)
+    assert {"live_ads_7d", "live_ads_30d"} <= set(table_columns(conn, "shops"))
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(shops)")}
+    assert "idx_shops_scraping_status_id" in indexes
+    versions = [row[0] for row in conn.execute("SELECT version FROM schema_migrations ORDER BY version")]
+    assert versions == sorted(m.version for m in MIGRATIONS)
+    conn.close()
+
+
+def test_failed_step_rolls_back_whole_migration():
+    """Une étape en erreur annule toute la migration et sa version n'est pas enregistrée"""
+    path = make_db()
+    broken = MIGRATIONS + [Migration(99, "cassée", [
+        "CREATE INDEX idx_tmp ON shops(shop_url)",
+        "SELECT * FROM table_inexistante",
+    ])]
+    try:
+        migrate(path, migrations=broken)
+        assert False, "la migration aurait dû échouer"
+    except sqlite3.OperationalError:
+        pass
+
+    conn = sqlite3.connect(path)
+    assert "idx_tmp" not in {row[1] for row in conn.execute("PRAGMA index_list(shops)")}
+    assert conn.execute("SELECT MAX(version) FROM schema_migrations").fetchone()[0] == max(m.version for m in MIGRATIONS)
+    conn.close()
+
+
+if __name__ == "__main__":
+    test_migrations_apply_once_in_order()
+    test_failed_step_rolls_back_whole_migration()
+    print("🎉 Tous les tests des migrations sont passés !")
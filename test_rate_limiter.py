@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests du limiteur de débit partagé (seau à jetons + AIMD)
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+import rate_limiter
+from rate_limiter import SharedRateLimiter, is_healthy
+
+FAMILIES = {'rpc': {'rate': 10.0, 'min_rate': 1.0, 'max_rate': 12.0, 'burst': 2,
+                    'increase': 1.0, 'decrease': 0.5, 'slow_after': 5.0}}
+
+
+def make_path():
+    return os.path.join(tempfile.mkdtemp(), "rate_limits.db")
+
+
+def test_bucket_is_shared_between_instances():
+    """Deux limiteurs sur le même fichier (deux processus) consomment le même seau"""
+    path = make_path()
+    first = SharedRateLimiter(path, FAMILIES)
+    second = SharedRateLimiter(path, FAMILIES)
+
+    assert first.reserve('rpc') == 0.0
+    assert second.reserve('rpc') == 0.0
+    # Rafale épuisée : les suivants attendent leur tour, l'attente s'allonge
+    wait_1 = first.reserve('rpc')
+    wait_2 = second.reserve('rpc')
+    assert 0.05 < wait_1 < wait_2 <= 0.25
+
+
+def test_aimd_raises_then_cuts_once_per_burst():
+    """+increase par réponse saine (plafonné), une seule coupe pour une rafale de 429"""
+    limiter = SharedRateLimiter(make_path(), FAMILIES)
+    assert limiter.record('rpc', True) == 11.0
+    assert limiter.record('rpc', True) == 12.0
+    assert limiter.record('rpc', True) == 12.0
+
+    assert limiter.record('rpc', False) == 6.0
+    assert limiter.record('rpc', False) == 6.0  # même fenêtre de coupe
+    # Une réponse trop lente compte comme un signal de surcharge
+    rate_limiter.CUT_COOLDOWN = 0.0
+    try:
+        assert limiter.record('rpc', True, latency=9.0) == 3.0
+    finally:
+        rate_limiter.CUT_COOLDOWN = 1.0
+    assert limiter.rates() == {'rpc': 3.0}
+
+
+def test_response_classification():
+    """429 / 5xx / erreur réseau cassent le débit, une erreur 4xx métier non"""
+    assert not is_healthy({'error': 'HTTP 429: Too Many Requests'})
+    assert not is_healthy({'error': 'boom', 'status': 503})
+    assert not is_healthy({'success': False, 'error': 'Failed to fetch', 'type': 'fetch_error'})
+    assert not is_healthy(TimeoutError())
+    assert is_healthy({'error': 'HTTP 400: bad params'})
+    assert is_healthy({'result': []})
+
+
+def test_acquire_waits_for_its_turn():
+    """acquire attend réellement le temps réservé"""
+    limiter = SharedRateLimiter(make_path(), FAMILIES)
+
+    async def scenario():
+        start = time.perf_counter()
+        for _ in range(4):
+            await limiter.acquire('rpc')
+        return time.perf_counter() - start
+
+    assert asyncio.run(scenario()) >= 0.15
+
+
+if __name__ == "__main__":
+    test_bucket_is_shared_between_instances()
+    test_aimd_raises_then_cuts_once_per_burst()
+    test_response_classification()
+    test_acquire_waits_for_its_turn()
+    print("🎉 Tous les tests du limiteur de débit sont passés !")
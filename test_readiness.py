@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests des sondes de disponibilité (échéances et temps gagné sur les attentes fixes)
+"""
+
+import asyncio
+
+from readiness import ReadinessProbes
+
+
+class FakePage:
+    """Page minimale : chaque sélecteur apparaît après un délai donné (None = jamais)"""
+
+    def __init__(self, appear_after):
+        self.appear_after = appear_after
+        self.url = "https://app.mytoolsplan.com/login"
+
+    async def wait_for_selector(self, selector, timeout=None, state=None):
+        delay = self.appear_after.get(selector)
+        if delay is None or delay * 1000 > timeout:
+            await asyncio.sleep(timeout / 1000)
+            raise TimeoutError(f"{selector} absent")
+        await asyncio.sleep(delay)
+        return selector
+
+    async def evaluate(self, script, arg=None):
+        await asyncio.sleep(arg['quietMs'] / 1000)
+        return True
+
+
+def test_first_matching_selector_wins():
+    """Les sélecteurs sont attendus en parallèle : le plus rapide répond"""
+    probes = ReadinessProbes()
+    page = FakePage({'h3.slow': 0.2, 'h3.fast': 0.01})
+    matched = asyncio.run(probes.selector(page, ['h3.missing', 'h3.slow', 'h3.fast'], 'section', deadline=1,
+                                          replaces=3.0))
+    assert matched == 'h3.fast'
+    summary = probes.summary()['section']
+    assert summary['timeouts'] == 0 and summary['waited_s'] < 0.2
+    assert summary['saved_s'] > 2.5
+
+
+def test_deadline_caps_the_wait():
+    """Aucun sélecteur : la sonde rend None à l'échéance, comptée comme timeout"""
+    probes = ReadinessProbes()
+    assert asyncio.run(probes.selector(FakePage({}), 'div.never', 'absent', deadline=0.05)) is None
+    assert probes.summary()['absent']['timeouts'] == 1
+
+
+def test_dom_quiet_reports_against_fixed_delay():
+    """DOM stable après la fenêtre de calme, gain mesuré face à l'attente fixe"""
+    probes = ReadinessProbes()
+    assert asyncio.run(probes.dom_quiet(FakePage({}), 'navigation', deadline=1.0, quiet=0.05, replaces=2.0))
+    summary = probes.summary()['navigation']
+    assert summary['replaced_fixed_s'] == 2.0 and summary['saved_s'] > 1.5
+
+
+if __name__ == "__main__":
+    test_first_matching_selector_wins()
+    test_deadline_caps_the_wait()
+    test_dom_quiet_reports_against_fixed_delay()
+    print("🎉 Tous les tests des sondes de disponibilité sont passés !")
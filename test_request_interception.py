@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests des profils d'interception des requêtes (page.route)
+"""
+
+import asyncio
+
+from request_interception import RequestInterceptor
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+
+class FakeRoute:
+    """Route Playwright minimale : retient la décision prise"""
+
+    def __init__(self, url, resource_type):
+        self.request = FakeRequest(url, resource_type)
+        self.outcome = None
+
+    async def abort(self, error_code=None):
+        self.outcome = 'aborted'
+
+    async def continue_(self):
+        self.outcome = 'continued'
+
+
+def route(interceptor, url, resource_type):
+    fake = FakeRoute(url, resource_type)
+    asyncio.run(interceptor.handle(fake))
+    return fake.outcome
+
+
+def test_profiles():
+    """dom-lite bloque images et polices, api-only ne garde que document/xhr/fetch, full rien"""
+    interceptor = RequestInterceptor('dom-lite')
+    assert route(interceptor, "https://shop.com/hero.jpg", "image") == 'aborted'
+    assert route(interceptor, "https://shop.com/app.js", "script") == 'continued'
+
+    interceptor.use('api-only')
+    assert route(interceptor, "https://cdn.shop.com/app.js", "script") == 'aborted'
+    assert route(interceptor, "https://sam.mytoolsplan.xyz/dpa/rpc", "fetch") == 'continued'
+
+    interceptor.use('full')
+    assert route(interceptor, "https://shop.com/hero.jpg", "image") == 'continued'
+    assert interceptor.stats.blocked == 2
+    assert interceptor.stats.blocked_by_type == {'image': 1, 'script': 1}
+
+
+def test_allowlist_keeps_app_scripts():
+    """Les scripts MyToolsPlan restent autorisés en api-only (allowlist par domaine)"""
+    interceptor = RequestInterceptor('api-only')
+    assert route(interceptor, "https://app.mytoolsplan.com/static/app.js", "script") == 'continued'
+    assert route(interceptor, "https://app.mytoolsplan.com/logo.png", "image") == 'aborted'
+
+
+def test_trackers_are_seen_without_download():
+    """Les trackers sont relevés pour la détection des pixels puis bloqués"""
+    interceptor = RequestInterceptor('dom-lite')
+    assert route(interceptor, "https://www.googletagmanager.com/gtag/js?id=G-1", "script") == 'aborted'
+    assert interceptor.detected_pixels() == {'pixel_google': 'present', 'pixel_facebook': 'absent'}
+
+    interceptor.reset_trackers()
+    interceptor.use('full')
+    assert route(interceptor, "https://connect.facebook.net/en_US/fbevents.js", "script") == 'continued'
+    assert interceptor.detected_pixels()['pixel_facebook'] == 'present'
+
+
+if __name__ == "__main__":
+    test_profiles()
+    test_allowlist_keeps_app_scripts()
+    test_trackers_are_seen_without_download()
+    print("🎉 Tous les tests de l'interception des requêtes sont passés !")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Tests de l'extraction par capture des réponses réseau (matchers JSON par métrique)
+"""
+
+import asyncio
+import json
+
+from readiness import ReadinessProbes
+from response_capture import ResponseCapture, find_key, format_visit_duration, rpc_methods
+
+
+class FakeRequest:
+    """Requête minimale : corps POST"""
+
+    def __init__(self, post_data=None):
+        self.post_data = post_data
+
+
+class FakeResponse:
+    """Réponse minimale : URL, content-type, JSON et requête d'origine"""
+
+    def __init__(self, url, payload, content_type="application/json", post_data=None):
+        self.url = url
+        self.headers = {'content-type': content_type}
+        self.payload = payload
+        self.request = FakeRequest(post_data)
+
+    async def json(self):
+        return self.payload
+
+
+class FakePage:
+    """Page minimale : enregistre le handler 'response' et le déclenche à la demande"""
+
+    def __init__(self):
+        self.handlers = []
+
+    def on(self, event, handler):
+        assert event == "response"
+        self.handlers.append(handler)
+
+    async def emit(self, response, delay=0):
+        await asyncio.sleep(delay)
+        for handler in self.handlers:
+            await handler(response)
+
+
+ENGAGEMENT_URL = "https://sam.mytoolsplan.xyz/analytics/ta/api/v3/engagement?target=shop.com"
+RPC_URL = "https://app.mytoolsplan.com/dpa/rpc"
+
+
+def rpc_body(method):
+    return json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': {}})
+
+
+def test_engagement_json_captured_before_render():
+    """Les métriques engagement sont lues dans le JSON dès son arrivée"""
+    async def scenario():
+        page = FakePage()
+        capture = ResponseCapture(readiness=ReadinessProbes()).attach(page)
+        capture.reset(scope="shop.com")
+        payload = {'code': 200, 'data': {'totalBounceRate': 0.42, 'totalAvgVisitDuration': 95}}
+        asyncio.ensure_future(page.emit(FakeResponse(ENGAGEMENT_URL, payload), delay=0.01))
+        found = await capture.wait_for(['bounce_rate', 'avg_visit_duration'], deadline=1, name='engagement:json')
+        return capture, found
+
+    capture, found = asyncio.run(scenario())
+    assert found == {'bounce_rate': '0.42', 'avg_visit_duration': '01:35'}
+    assert capture.readiness.summary()['engagement:json']['timeouts'] == 0
+
+
+def test_unmatched_or_non_json_responses_are_ignored():
+    """Réponses hors matchers ou non JSON : rien n'est parsé, l'attente s'arrête à l'échéance"""
+    async def scenario():
+        page = FakePage()
+        capture = ResponseCapture().attach(page)
+        await page.emit(FakeResponse("https://cdn.example.com/app.js", {'visits': 1}))
+        await page.emit(FakeResponse(ENGAGEMENT_URL, "<html>", content_type="text/html"))
+        found = await capture.wait_for(['bounce_rate'], deadline=0.05)
+        return capture, found
+
+    capture, found = asyncio.run(scenario())
+    assert found == {}
+    assert capture.stats['responses_parsed'] == 0
+
+
+def test_traffic_summary_scoped_to_domain():
+    """Visites / conversion trouvées dans le JSON RPC, relues seulement pour le même domaine"""
+    async def scenario():
+        page = FakePage()
+        capture = ResponseCapture().attach(page)
+        capture.reset(scope="shop.com")
+        payload = {'jsonrpc': '2.0', 'result': {'summary': {'visits': 12000, 'purchaseConversion': 0.021}}}
+        await page.emit(FakeResponse(RPC_URL, payload, post_data=rpc_body("traffic.Summary")))
+        assert await capture.wait_for(['conversion_rate'], deadline=1, scope="other.com") == {}
+        return capture
+
+    capture = asyncio.run(scenario())
+    assert capture.get('visits', scope="shop.com") == '12000'
+    assert capture.get('conversion_rate', scope="shop.com") == '0.021'
+    assert capture.get('conversion_rate', scope="other.com") is None
+
+
+def test_scraper_own_rpc_responses_are_ignored():
+    """Réponses /dpa/rpc du scraper (organic.*, méthodes enregistrées) ou sans méthode lisible : ignorées"""
+    async def scenario():
+        page = FakePage()
+        capture = ResponseCapture().attach(page)
+        capture.reset(scope="shop.com")
+        capture.ignore_method("trends.Batch")
+        payload = {'jsonrpc': '2.0', 'result': {'visits': 99, 'conversionRate': 0.5}}
+        await page.emit(FakeResponse(RPC_URL, payload, post_data=rpc_body("organic.OverviewTrend")))
+        await page.emit(FakeResponse(RPC_URL, payload, post_data=json.dumps([
+            {'method': 'traffic.Summary'}, {'method': 'organic.Summary'}
+        ])))
+        await page.emit(FakeResponse(RPC_URL, payload, post_data=rpc_body("trends.Batch")))
+        await page.emit(FakeResponse(RPC_URL, payload, post_data=None))
+        return capture
+
+    capture = asyncio.run(scenario())
+    assert capture.get('visits') is None and capture.get('conversion_rate') is None
+    assert capture.stats['own_rpc_ignored'] == 3
+    assert capture.stats['responses_parsed'] == 0
+    assert rpc_methods(FakeRequest("not json")) == ()
+
+
+def test_find_key_prefers_shallow_values():
+    """Les champs de synthèse (peu profonds) passent avant les séries de tendance"""
+    payload = {'trend': [{'visits': 1}], 'summary': {'visits': 500}}
+    assert find_key(payload, ('visits',)) == 500
+    assert find_key({'visits': None, 'rows': []}, ('visits',)) is None
+
+
+def test_visit_duration_formatted_as_minutes_seconds():
+    """Durée en secondes -> MM:SS, comme l'API engagement et le DOM ; vide si absente"""
+    assert format_visit_duration(95) == "01:35"
+    assert format_visit_duration(612.7) == "10:12"
+    assert format_visit_duration("75") == "01:15"
+    assert format_visit_duration(0) == format_visit_duration(None) == format_visit_duration("na") == ""
+
+
+if __name__ == "__main__":
+    test_engagement_json_captured_before_render()
+    test_unmatched_or_non_json_responses_are_ignored()
+    test_traffic_summary_scoped_to_domain()
+    test_scraper_own_rpc_responses_are_ignored()
+    test_find_key_prefers_shallow_values()
+    test_visit_duration_formatted_as_minutes_seconds()
+    print("🎉 Tests capture des réponses OK")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests de la politique de retry (classification, budget, disjoncteurs)
+"""
+
+import asyncio
+import os
+import tempfile
+
+from retry_policy import RetryPolicy, classify, AUTH, CLIENT, SERVER, THROTTLED, TIMEOUT, FETCH_ERROR, OK
+
+
+def make_policy(**kwargs):
+    path = os.path.join(tempfile.mkdtemp(), "retry_state.db")
+    kwargs.setdefault('base_delay', 0.001)
+    kwargs.setdefault('max_delay', 0.005)
+    return RetryPolicy(path, **kwargs)
+
+
+def failing(responses):
+    """Tentative qui rend les réponses données une par une et compte les appels"""
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        response = responses[min(len(calls), len(responses)) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+    return attempt, calls
+
+
+def test_classification():
+    assert classify({'success': False, 'error': 'HTTP 401: Unauthorized'}) == AUTH
+    assert classify({'success': False, 'error': 404}) == CLIENT
+    assert classify({'error': 'HTTP 429: slow down', 'status': 429}) == THROTTLED
+    assert classify({'success': False, 'error': 'HTTP 502: Bad Gateway'}) == SERVER
+    assert classify({'success': False, 'error': 'Failed to fetch', 'type': 'fetch_error'}) == FETCH_ERROR
+    assert classify(asyncio.TimeoutError()) == TIMEOUT
+    assert classify({'success': True, 'data': {}}) == OK
+
+
+def test_only_transient_errors_are_retried():
+    """Un 5xx est réessayé jusqu'au succès, une erreur d'auth ne l'est pas"""
+    policy = make_policy()
+    attempt, calls = failing([{'error': 'HTTP 500: oops'}, {'success': True, 'data': 1}])
+    assert asyncio.run(policy.run('folders', attempt))['data'] == 1
+    assert len(calls) == 2
+
+    attempt, calls = failing([{'success': False, 'error': 'HTTP 403: Forbidden'}])
+    assert asyncio.run(policy.run('folders', attempt))['error'].startswith('HTTP 403')
+    assert len(calls) == 1
+
+
+def test_retry_budget_caps_retries_per_run():
+    """Budget épuisé : plus de retry, la première erreur est rendue"""
+    policy = make_policy(budget_min=1, budget_ratio=0.0, failure_threshold=100)
+    attempt, calls = failing([{'success': False, 'type': 'fetch_error', 'error': 'x'}])
+    asyncio.run(policy.run('rpc', attempt))
+    assert len(calls) == 2  # 1 essai + le seul retry du budget, le suivant est refusé
+
+    attempt, calls = failing([{'success': False, 'type': 'fetch_error', 'error': 'x'}])
+    asyncio.run(policy.run('rpc', attempt))
+    assert len(calls) == 1 and policy.stats['budget_denied'] == 2
+
+
+def test_breaker_opens_for_every_worker_then_probes():
+    """Disjoncteur partagé : un autre worker (autre instance) échoue vite, puis une sonde le referme"""
+    policy = make_policy(failure_threshold=3, reset_timeout=0.05)
+    other_worker = RetryPolicy(policy.path, base_delay=0.001, max_delay=0.005, reset_timeout=0.05)
+
+    attempt, calls = failing([TimeoutError("navigation timeout")])
+    result = asyncio.run(policy.run('organic.OverviewTrend', attempt))
+    assert result['type'] == 'exception' and len(calls) == 3
+
+    attempt, calls = failing([{'success': True}])
+    assert asyncio.run(other_worker.run('organic.OverviewTrend', attempt))['type'] == 'circuit_open'
+    assert calls == []
+
+    async def after_reset_timeout():
+        await asyncio.sleep(0.06)
+        return await other_worker.run('organic.OverviewTrend', attempt)
+
+    assert asyncio.run(after_reset_timeout()) == {'success': True}
+    assert policy.breaker_states() == {}
+
+
+if __name__ == "__main__":
+    test_classification()
+    test_only_transient_errors_are_retried()
+    test_retry_budget_caps_retries_per_run()
+    test_breaker_opens_for_every_worker_then_probes()
+    print("🎉 Tous les tests de la politique de retry sont passés !")
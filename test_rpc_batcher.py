@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests du regroupement des appels RPC (fenêtre, découpage, réponses, erreurs, débit)
+"""
+
+import asyncio
+
+from rpc_batcher import RPCBatcher, batch_outcome
+
+
+class FakePage:
+    """Page simulée : chaque evaluate renvoie, par requête, sa méthode et ses paramètres"""
+
+    def __init__(self, fail=False, elapsed=0.2, status=None):
+        self.fail = fail
+        self.elapsed = elapsed
+        self.status = status
+        self.batches = []
+
+    async def evaluate(self, js, payloads):
+        self.batches.append([payload['params']['n'] for payload in payloads])
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("Target page, context or browser has been closed")
+        outcomes = []
+        for payload in payloads:
+            result = {'result': {'method': payload['method'], 'n': payload['params']['n']}}
+            if self.status and payload['params']['n'] == 1:
+                result = {'error': f"HTTP {self.status}: Too Many Requests", 'status': self.status}
+            outcomes.append({'result': result, 'elapsed': self.elapsed})
+        return outcomes
+
+
+class FakeLimiter:
+    """Limiteur simulé : rafale fixe, réservations et ajustements enregistrés"""
+
+    def __init__(self, burst=3):
+        self._burst = burst
+        self.acquired = []
+        self.reports = []
+
+    def burst(self, family):
+        return self._burst
+
+    async def acquire(self, family, tokens=1):
+        self.acquired.append(tokens)
+        return 0.0
+
+    async def report(self, family, result, latency=None):
+        self.reports.append((result, latency))
+        return 1.0
+
+
+def test_calls_in_window_share_one_evaluate():
+    """Les appels soumis pendant la fenêtre partent ensemble, après la fenêtre"""
+    page = FakePage()
+    batcher = RPCBatcher(lambda: page, max_batch=20, window=0.05)
+
+    async def scenario():
+        calls = [asyncio.ensure_future(batcher.call("organic.Summary", {'n': n})) for n in range(3)]
+        await asyncio.sleep(0.01)
+        sent_early = list(page.batches)
+        results = await asyncio.gather(*calls)
+        return sent_early, results
+
+    sent_early, results = asyncio.run(scenario())
+    assert sent_early == []
+    assert page.batches == [[0, 1, 2]]
+    assert batcher.stats['batches'] == 1 and batcher.stats['evaluates_saved'] == 2
+
+
+def test_batches_split_at_max_batch_and_map_responses():
+    """Au-delà de max_batch, plusieurs evaluate ; chaque appelant reçoit sa propre réponse"""
+    page = FakePage()
+    batcher = RPCBatcher(lambda: page, max_batch=2, window=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.call("organic.Summary", {'n': n}) for n in range(5)))
+
+    results = asyncio.run(scenario())
+    assert [len(batch) for batch in page.batches] == [2, 2, 1]
+    assert sorted(n for batch in page.batches for n in batch) == [0, 1, 2, 3, 4]
+    assert [r['result']['n'] for r in results] == [0, 1, 2, 3, 4]
+    assert all(r['result']['method'] == "organic.Summary" for r in results)
+
+
+def test_evaluate_failure_settles_every_future():
+    """Si l'evaluate échoue, tous les appelants reçoivent une erreur (aucun n'attend indéfiniment)"""
+    page = FakePage(fail=True)
+    batcher = RPCBatcher(lambda: page, max_batch=20, window=0.01)
+
+    async def scenario():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.call("organic.Summary", {'n': n}) for n in range(3))), timeout=1
+        )
+
+    results = asyncio.run(scenario())
+    assert len(results) == 3
+    assert all(r['type'] == 'fetch_error' and 'closed' in r['error'] for r in results)
+
+
+def test_batches_capped_at_burst_with_one_report_per_batch():
+    """Avec un limiteur : lots bornés à la rafale, un seul ajustement par lot à la latence par requête"""
+    page = FakePage(elapsed=0.2, status=429)
+    limiter = FakeLimiter(burst=3)
+    batcher = RPCBatcher(lambda: page, max_batch=20, window=0.01, rate_limiter=limiter)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.call("organic.Summary", {'n': n}) for n in range(7)))
+
+    asyncio.run(scenario())
+    assert batcher.max_batch == 3
+    assert [len(batch) for batch in page.batches] == [3, 3, 1]
+    assert limiter.acquired == [3, 3, 1]
+    assert len(limiter.reports) == 3
+    # Le lot contenant la réponse 429 est rapporté comme limité, les autres comme sains
+    assert limiter.reports[0][0]['status'] == 429
+    assert all(latency == 0.2 for _, latency in limiter.reports)
+
+
+def test_batch_outcome_prefers_unhealthy_response():
+    """Réponse représentative : la première malsaine, sinon la première ; latence maximale"""
+    ok, throttled = {'result': 1}, {'error': 'HTTP 429: slow down'}
+    assert batch_outcome([ok, throttled], [0.1, 0.4]) == (throttled, 0.4)
+    assert batch_outcome([ok], [0.1]) == (ok, 0.1)
+
+
+if __name__ == "__main__":
+    test_calls_in_window_share_one_evaluate()
+    test_batches_split_at_max_batch_and_map_responses()
+    test_evaluate_failure_settles_every_future()
+    test_batches_capped_at_burst_with_one_report_per_batch()
+    test_batch_outcome_prefers_unhealthy_response()
+    print("🎉 Tests regroupement RPC OK")
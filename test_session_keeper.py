@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests du gardien de session partagée (contrôle de fond et rafraîchissement unique)
+"""
+
+import asyncio
+
+from session_keeper import SessionKeeper, shared_keeper
+
+
+class FakeSession:
+    """Session simulée : périmée jusqu'au premier rafraîchissement"""
+
+    def __init__(self, healthy=False, refresh_delay=0.05):
+        self.healthy = healthy
+        self.refresh_delay = refresh_delay
+        self.refreshes = 0
+
+    async def check(self):
+        return self.healthy
+
+    async def refresh(self):
+        self.refreshes += 1
+        await asyncio.sleep(self.refresh_delay)
+        self.healthy = True
+        return True
+
+
+def test_stale_session_refreshed_once_for_all_workers():
+    """Cinq workers voient la session périmée => un seul rafraîchissement"""
+    session = FakeSession()
+    keeper = SessionKeeper(object(), session.refresh, check=session.check)
+
+    async def scenario():
+        return await asyncio.gather(*(keeper.ensure_fresh(f"worker {i}") for i in range(5)))
+
+    assert asyncio.run(scenario()) == [True] * 5
+    assert session.refreshes == 1
+    assert keeper.stats['coalesced'] == 4 and keeper.stats['refreshes'] == 1
+
+
+def test_auth_calls_wait_for_refresh():
+    """Pendant le rafraîchissement, wait_ready bloque jusqu'à la fin"""
+    session = FakeSession(refresh_delay=0.1)
+    keeper = SessionKeeper(object(), session.refresh, check=session.check)
+    order = []
+
+    async def auth_call():
+        await asyncio.sleep(0.01)
+        await keeper.wait_ready()
+        order.append(('call', session.healthy))
+
+    async def scenario():
+        await asyncio.gather(keeper.ensure_fresh("test"), auth_call())
+
+    asyncio.run(scenario())
+    assert order == [('call', True)]
+    assert keeper.stats['gated_waits'] == 1
+
+
+def test_background_check_triggers_refresh():
+    """La tâche de fond détecte la session périmée sans appel des workers"""
+    session = FakeSession()
+
+    async def scenario():
+        keeper = shared_keeper(session, session.refresh, check=session.check, interval=0.02, min_refresh_gap=0)
+        assert shared_keeper(session, session.refresh) is keeper
+        keeper.start()
+        keeper.start()
+        await asyncio.sleep(0.15)
+        await keeper.stop()
+        assert keeper._loop is not None  # un worker utilise encore la session
+        await keeper.stop()
+        return keeper
+
+    keeper = asyncio.run(scenario())
+    assert session.refreshes == 1
+    assert keeper._loop is None and keeper.stats['checks'] >= 2
+
+
+if __name__ == "__main__":
+    test_stale_session_refreshed_once_for_all_workers()
+    test_auth_calls_wait_for_refresh()
+    test_background_check_triggers_refresh()
+    print("🎉 Tests gardien de session OK")
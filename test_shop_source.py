@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Tests de la sélection SQL des boutiques éligibles
+"""
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from migrations import migrate
+from shop_source import (ELIGIBLE_STATUSES, ShopSource, derive_eligible_statuses, eligibility_predicate,
+                         status_params)
+
+FIXTURE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_trendtrack_with_live_ads.db")
+
+
+def make_db():
+    """Base temporaire migrée avec des boutiques de chaque statut"""
+    path = os.path.join(tempfile.mkdtemp(), "shops.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE shops (id INTEGER PRIMARY KEY, shop_name TEXT, shop_url TEXT, "
+                 "scraping_status TEXT, updated_at TEXT, project_source TEXT)")
+    conn.executemany("INSERT INTO shops (shop_name, shop_url, scraping_status, project_source) VALUES (?, ?, ?, ?)", [
+        ("A", "https://www.a.com/", None, "trendtrack"),
+        ("B", "https://b.com", "completed", "trendtrack"),
+        ("C", "http://c.com", "failed", "import_csv"),
+        ("D", "https://d.com", "", "trendtrack"),
+        ("E", "https://e.com", "na", "trendtrack"),
+        ("F", "https://f.com", "partial", "trendtrack"),
+    ])
+    conn.commit()
+    conn.close()
+    migrate(path)
+    return path
+
+
+def test_only_eligible_shops_are_read():
+    """Seuls NULL / '' / partial / failed sont retournés, avec le domaine dérivé"""
+    source = ShopSource(make_db())
+    shops = source.eligible_shops()
+    assert [s['shop_name'] for s in shops] == ["A", "C", "D", "F"]
+    assert shops[0]['domain'] == "a.com"
+    assert source.count_eligible() == 4
+    assert source.count_all() == 6
+
+
+def test_project_source_filter():
+    """Le filtre par source de projet s'ajoute au prédicat d'éligibilité"""
+    source = ShopSource(make_db(), project_source="import_csv")
+    assert [s['shop_name'] for s in source.eligible_shops()] == ["C"]
+
+
+def test_predicate_uses_status_index():
+    """Le prédicat d'éligibilité est servi par l'index de la migration 2"""
+    conn = sqlite3.connect(make_db())
+    plan = " ".join(row[3] for row in conn.execute(
+        f"EXPLAIN QUERY PLAN SELECT id FROM shops WHERE {eligibility_predicate()}", status_params(ELIGIBLE_STATUSES)
+    ))
+    conn.close()
+    assert "idx_shops_scraping_status_id" in plan
+
+
+def status_rule(shop):
+    """Règle d'éligibilité de l'API (forme fonction du statut seul)"""
+    return shop.get('scraping_status') not in ('completed', 'na')
+
+
+def python_filter_ids(db_path, rule):
+    """Ids retenus par le filtre Python sur toute la table (chemin de l'API)"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    shops = [dict(row) for row in conn.execute("SELECT * FROM shops ORDER BY id")]
+    conn.close()
+    return [shop['id'] for shop in shops if rule(shop)]
+
+
+def test_statuses_derived_from_api_rule_match_python_filter():
+    """Statuts déduits de la règle de l'API : même sélection que le filtre Python (base de test et fixture)"""
+    for db_path in (make_db(), FIXTURE_DB):
+        statuses = derive_eligible_statuses(db_path, status_rule)
+        assert statuses is not None
+        source = ShopSource(db_path, statuses=statuses, rule=status_rule)
+        assert [shop['id'] for shop in source.eligible_shops()] == python_filter_ids(db_path, status_rule)
+        assert source.verify_rule(page_size=2) == ([], [])
+
+    # Règle plus stricte : NULL exclu, '' gardé
+    strict = lambda shop: shop.get('scraping_status') == ''
+    db_path = make_db()
+    statuses = derive_eligible_statuses(db_path, strict)
+    assert statuses == ('',)
+    assert [s['shop_name'] for s in ShopSource(db_path, statuses=statuses).eligible_shops()] == ["D"]
+
+
+def test_rule_not_reducible_to_statuses_is_detected():
+    """Règle qui dépend d'autre chose que du statut : None, le filtre de l'API reste utilisé"""
+    db_path = make_db()
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO shops (shop_name, shop_url, scraping_status) VALUES ('G', 'https://g.com', 'failed')")
+    conn.commit()
+    conn.close()
+    by_source = lambda shop: shop.get('scraping_status') == 'failed' and shop.get('project_source') == 'import_csv'
+    assert derive_eligible_statuses(db_path, by_source) is None
+
+
+def test_every_row_is_checked_against_the_api_rule():
+    """Règle qui dépend d'un champ de lignes hors échantillon : verify_rule les trouve toutes"""
+    db_path = make_db()
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO shops (shop_name, shop_url, scraping_status, project_source) VALUES (?, ?, ?, ?)", [
+        (f"S{i}", f"https://s{i}.com", status, source) for i, (status, source) in enumerate(
+            [('failed', 'trendtrack'), ('completed', 'trendtrack')] * 4 +
+            [('failed', 'blacklist'), ('completed', 'priority')] +
+            [('failed', 'trendtrack'), ('completed', 'trendtrack')] * 4
+        )
+    ])
+    conn.commit()
+    conn.close()
+    rule = lambda shop: (status_rule(shop) and shop.get('project_source') != 'blacklist') or \
+        shop.get('project_source') == 'priority'
+
+    # L'échantillon (3 premières / 3 dernières lignes par statut) ne voit pas S8 ni S9
+    statuses = derive_eligible_statuses(db_path, rule)
+    assert statuses is not None
+    source = ShopSource(db_path, statuses=statuses, rule=rule)
+    missed, extra = source.verify_rule(page_size=4)
+    assert [s['shop_name'] for s in missed] == ["S9"]
+    assert [s['shop_name'] for s in extra] == ["S8"]
+    selected = {s['id'] for s in source.eligible_shops()} | {s['id'] for s in missed}
+    assert sorted(selected - {s['id'] for s in extra}) == python_filter_ids(db_path, rule)
+    assert ShopSource(db_path, statuses=statuses).verify_rule() == ([], [])
+
+
+def test_completed_shops_with_expired_metrics_are_selected():
+    """refresh_stale : une boutique completed revient quand une de ses métriques a dépassé son TTL"""
+    db_path = make_db()
+    now = datetime.now(timezone.utc)
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO metric_freshness (shop_id, metric, fetched_at) VALUES (?, ?, ?)", [
+        (2, "organic_traffic", (now - timedelta(days=10)).isoformat()),  # B completed, encore frais
+        (2, "market_us", (now - timedelta(days=8)).isoformat()),         # B completed, marché expiré (7 j)
+        (5, "organic_traffic", (now - timedelta(days=1)).isoformat()),   # E na, frais
+    ])
+    conn.commit()
+    conn.close()
+
+    assert [s['shop_name'] for s in ShopSource(db_path).eligible_shops()] == ["A", "C", "D", "F"]
+    source = ShopSource(db_path, refresh_stale=True)
+    assert [s['shop_name'] for s in source.eligible_shops()] == ["A", "B", "C", "D", "F"]
+    assert source.count_eligible() == 5
+    assert [s['shop_name'] for s in source.fetch_page(1, 2)] == ["B", "C"]
+
+
+def test_stream_pages_by_keyset_with_bounded_buffer():
+    """Le flux rend des pages keyset sans lire plus de `prefetch_pages` pages d'avance"""
+    source = ShopSource(make_db())
+    fetched = []
+    original_fetch_page = source.fetch_page
+
+    def tracking_fetch_page(after_id, limit):
+        fetched.append(after_id)
+        return original_fetch_page(after_id, limit)
+
+    source.fetch_page = tracking_fetch_page
+
+    async def scenario():
+        stream = source.stream_eligible_shops(page_size=1, prefetch_pages=1)
+        first = await stream.__anext__()
+        await asyncio.sleep(0.05)
+        read_ahead = len(fetched)
+        rest = [page async for page in stream]
+        return first, read_ahead, rest
+
+    first, read_ahead, rest = asyncio.run(scenario())
+    assert [s['shop_name'] for s in first] == ["A"]
+    assert read_ahead <= 3
+    assert [page[0]['shop_name'] for page in rest] == ["C", "D", "F"]
+    assert fetched[:2] == [0, 1]
+
+
+if __name__ == "__main__":
+    test_only_eligible_shops_are_read()
+    test_project_source_filter()
+    test_predicate_uses_status_index()
+    test_statuses_derived_from_api_rule_match_python_filter()
+    test_rule_not_reducible_to_statuses_is_detected()
+    test_every_row_is_checked_against_the_api_rule()
+    test_completed_shops_with_expired_metrics_are_selected()
+    test_stream_pages_by_keyset_with_bounded_buffer()
+    print("🎉 Tous les tests de la source de boutiques sont passés !")
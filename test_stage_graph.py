@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests du graphe d'étapes par boutique (sans Playwright)
+"""
+
+import asyncio
+import time
+
+from stage_graph import StageGraph
+
+
+def sleeper(delay, value):
+    """Fabrique une étape qui attend `delay` secondes puis retourne `value`"""
+    async def stage(deps):
+        await asyncio.sleep(delay)
+        return value
+    return stage
+
+
+def test_independent_stages_run_concurrently():
+    """Le temps total suit le chemin critique, pas la somme des étapes"""
+    graph = StageGraph(max_concurrency=4)
+    for name in ("a", "b", "c", "d"):
+        graph.add_stage(name, sleeper(0.1, name))
+
+    start = time.perf_counter()
+    results = asyncio.run(graph.run())
+    elapsed = time.perf_counter() - start
+
+    assert all(r['status'] == 'success' for r in results.values())
+    assert elapsed < 0.3
+
+
+def test_dependency_receives_parent_value():
+    """Une étape dépendante reçoit la valeur de sa dépendance"""
+    async def read_cpc(deps):
+        return deps["overview"]["cpc"]
+
+    graph = StageGraph()
+    graph.add_stage("overview", sleeper(0.01, {"cpc": "1.2"}))
+    graph.add_stage("cpc", read_cpc, depends_on=("overview",))
+
+    results = asyncio.run(graph.run())
+    assert results["cpc"]['status'] == 'success'
+    assert results["cpc"]['value'] == "1.2"
+
+
+def test_timeout_and_skipped_dependents():
+    """Une étape en timeout fait sauter ses dépendantes sans bloquer les autres"""
+    graph = StageGraph()
+    graph.add_stage("slow", sleeper(1, "x"), timeout=0.05)
+    graph.add_stage("child", sleeper(0, "y"), depends_on=("slow",))
+    graph.add_stage("other", sleeper(0, "z"))
+
+    results = asyncio.run(graph.run())
+    assert results["slow"]['status'] == 'timeout'
+    assert results["child"]['status'] == 'skipped'
+    assert results["other"]['status'] == 'success'
+
+
+def test_abort_cancels_remaining_stages():
+    """Un retour 'na' de l'étape racine annule les étapes encore en cours"""
+    graph = StageGraph()
+    graph.add_stage("overview", sleeper(0.01, 'na'), abort_on=lambda v: v == 'na')
+    graph.add_stage("shop_page", sleeper(1, {}))
+    graph.add_stage("cpc", sleeper(0, "1"), depends_on=("overview",))
+
+    start = time.perf_counter()
+    results = asyncio.run(graph.run())
+    assert time.perf_counter() - start < 0.5
+    assert graph.aborted_by == "overview"
+    assert results["shop_page"]['status'] == 'cancelled'
+    assert results["cpc"]['status'] == 'cancelled'
+
+
+def test_cycle_is_rejected():
+    """Un graphe cyclique est refusé avant toute exécution"""
+    graph = StageGraph()
+    graph.add_stage("a", sleeper(0, 1), depends_on=("b",))
+    graph.add_stage("b", sleeper(0, 2), depends_on=("a",))
+    try:
+        asyncio.run(graph.run())
+    except ValueError:
+        return
+    assert False, "cycle non détecté"
+
+
+if __name__ == "__main__":
+    test_independent_stages_run_concurrently()
+    test_dependency_receives_parent_value()
+    test_timeout_and_skipped_dependents()
+    test_abort_cancels_remaining_stages()
+    test_cycle_is_rejected()
+    print("🎉 Tous les tests du graphe d'étapes sont passés !")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests des histogrammes de latence par étape et de leur export
+"""
+
+import asyncio
+import urllib.request
+
+from stage_metrics import StageMetrics, MetricsServer, summarize
+
+
+def test_timed_blocks_fill_buckets_and_errors():
+    """Un bloc mesuré (même avec await) tombe dans son bucket ; une exception compte comme erreur"""
+    registry = StageMetrics(buckets=(0.01, 1.0))
+
+    async def scenario():
+        with registry.time('rpc', 'organic.Summary', worker=0):
+            await asyncio.sleep(0.02)
+        try:
+            with registry.time('rpc', 'organic.Summary', worker=0):
+                raise RuntimeError("fetch_error")
+        except RuntimeError:
+            pass
+
+    asyncio.run(scenario())
+    [entry] = registry.snapshot()
+    assert entry['count'] == 2 and entry['errors'] == 1
+    assert entry['counts'] == [1, 1, 0]
+
+
+def test_prometheus_text_is_cumulative():
+    """Les buckets exportés sont cumulés et se terminent par +Inf == count"""
+    registry = StageMetrics(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 5.0):
+        registry.observe('navigation', 'Organic Search', seconds, worker=1)
+
+    text = registry.prometheus_text()
+    labels = 'kind="navigation",name="Organic Search",worker="1"'
+    assert f'scraper_stage_duration_seconds_bucket{{{labels},le="0.1"}} 1' in text
+    assert f'scraper_stage_duration_seconds_bucket{{{labels},le="1.0"}} 2' in text
+    assert f'scraper_stage_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in text
+    assert f'scraper_stage_duration_seconds_count{{{labels}}} 3' in text
+
+
+def test_summary_merges_workers():
+    """Le résumé de fin de run fusionne les workers et trie par temps total"""
+    registry = StageMetrics()
+    registry.observe('extractor', 'shop_page', 8.0, worker=0)
+    registry.observe('extractor', 'shop_page', 12.0, worker=1)
+    registry.observe('db_write', 'analytics', 0.02, worker=0)
+
+    summary = summarize(registry.snapshot(0) + registry.snapshot(1))
+    assert list(summary) == ['extractor:shop_page', 'db_write:analytics']
+    assert summary['extractor:shop_page']['count'] == 2
+    assert summary['extractor:shop_page']['total_s'] == 20.0
+    assert summary['extractor:shop_page']['max_s'] == 12.0
+
+
+def test_metrics_endpoint():
+    """L'endpoint HTTP local sert le texte Prometheus"""
+    registry = StageMetrics()
+    registry.observe('selector', 'Bounce Rate', 0.3, worker=0)
+    server = MetricsServer(registry, port=0).start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+            body = response.read().decode('utf-8')
+    finally:
+        server.stop()
+    assert 'name="Bounce Rate"' in body
+
+
+if __name__ == "__main__":
+    test_timed_blocks_fill_buckets_and_errors()
+    test_prometheus_text_is_cumulative()
+    test_summary_merges_workers()
+    test_metrics_endpoint()
+    print("🎉 Tous les tests des métriques de latence sont passés !")
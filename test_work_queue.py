@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests de la file de travail partagée (baux, expiration, remise en file)
+"""
+
+import os
+import tempfile
+import time
+
+from work_queue import ShopWorkQueue
+
+
+def make_queue(n_shops=5, **kwargs):
+    """File temporaire remplie avec `n_shops` boutiques"""
+    path = os.path.join(tempfile.mkdtemp(), "queue.db")
+    queue = ShopWorkQueue(path, **kwargs)
+    queue.reset([{"id": i, "shop_url": f"shop{i}.com"} for i in range(n_shops)])
+    return queue
+
+
+def test_workers_pull_until_empty():
+    """Un worker rapide prend plus de boutiques qu'un worker lent"""
+    queue = make_queue(5)
+    fast, slow = [], []
+
+    slow_batch = queue.lease(worker_id=1, batch_size=1)
+    slow.extend(slow_batch)
+    while True:
+        batch = queue.lease(worker_id=0, batch_size=2)
+        if not batch:
+            break
+        for shop in batch:
+            queue.complete(0, shop["id"], True)
+        fast.extend(batch)
+    queue.complete(1, slow_batch[0]["id"], True)
+
+    assert len(fast) == 4 and len(slow) == 1
+    assert {s["id"] for s in fast + slow} == set(range(5))
+    assert queue.stats()["done"] == 5
+
+
+def test_expired_lease_is_requeued():
+    """Le bail d'un worker mort expire et la boutique repart dans la file"""
+    queue = make_queue(1, lease_seconds=0.05)
+    assert queue.lease(worker_id=0)
+    assert queue.lease(worker_id=1) == []
+
+    time.sleep(0.1)
+    batch = queue.lease(worker_id=1)
+    assert [s["id"] for s in batch] == [0]
+
+    # Le worker mort ne peut plus terminer une boutique qui ne lui appartient plus
+    queue.complete(0, 0, True)
+    assert queue.stats()["leased"] == 1
+
+
+def test_release_returns_leases():
+    """Un arrêt propre rend les boutiques louées sans attendre l'expiration"""
+    queue = make_queue(3)
+    queue.lease(worker_id=0, batch_size=3)
+    assert queue.release(0) == 3
+    assert queue.stats()["pending"] == 3
+
+
+def test_release_counts_attempts():
+    """Une boutique rendue à chaque bail (worker qui plante dessus) est abandonnée après max_attempts"""
+    queue = make_queue(1, max_attempts=2)
+    for _ in range(2):
+        assert [s["id"] for s in queue.lease(worker_id=0)] == [0]
+        queue.release(0)
+    assert queue.lease(worker_id=0) == []
+    stats = queue.stats()
+    assert stats["abandoned"] == 1 and stats["pending"] == 0
+
+
+def test_feeding_queue_is_not_finished_when_empty():
+    """Une file vide mais encore alimentée n'est pas terminée"""
+    queue = make_queue(0)
+    queue.reset(feeding=True)
+    assert queue.lease(worker_id=0) == [] and queue.is_feeding()
+    queue.append([{"id": 10}])
+    assert [s["id"] for s in queue.lease(worker_id=0)] == [10]
+    queue.close_feed()
+    assert not queue.is_feeding()
+
+
+def test_withdraw_only_removes_pending_shops():
+    """Les boutiques retirées disparaissent de la file, sauf celles déjà louées"""
+    queue = make_queue(4)
+    leased = queue.lease(worker_id=0)[0]["id"]
+    assert queue.withdraw([leased, 2, 3]) == 2
+    assert queue.stats()["total"] == 2
+    assert queue.withdraw([]) == 0
+
+
+if __name__ == "__main__":
+    test_workers_pull_until_empty()
+    test_expired_lease_is_requeued()
+    test_release_returns_leases()
+    test_release_counts_attempts()
+    test_feeding_queue_is_not_finished_when_empty()
+    test_withdraw_only_removes_pending_shops()
+    print("🎉 Tous les tests de la file de travail sont passés !")
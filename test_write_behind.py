@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests du tampon d'écriture différée des analytics
+"""
+
+import asyncio
+import os
+import tempfile
+
+from write_behind import WriteBehindBuffer
+
+
+def journal_path():
+    """Chemin de journal temporaire"""
+    return os.path.join(tempfile.mkdtemp(), "journal.jsonl")
+
+
+def test_flush_every_n_rows_in_one_batch():
+    """Les lignes sont écrites par lots de max_rows et le journal est vidé"""
+    batches = []
+    path = journal_path()
+    buffer = WriteBehindBuffer(batches.append, path, max_rows=3, max_delay=60)
+
+    async def scenario():
+        for shop_id in range(7):
+            await buffer.add(shop_id, {"organic_traffic": str(shop_id)})
+        assert buffer.get_metrics()['pending'] == 1
+        await buffer.close()
+
+    asyncio.run(scenario())
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert open(path).read() == ""
+    assert buffer.get_metrics()['flushes'] == 3
+
+
+def test_journal_replays_after_crash():
+    """Des lignes jamais écrites (arrêt brutal) sont rejouées au démarrage suivant"""
+    path = journal_path()
+    crashed = WriteBehindBuffer(lambda rows: None, path, max_rows=10)
+    asyncio.run(crashed.add(42, {"cpc": "1.2"}))
+    with open(path, 'a') as f:
+        f.write('{"shop_id": 43, "da')  # ligne tronquée par le kill
+
+    batches = []
+    restarted = WriteBehindBuffer(batches.append, path, max_rows=10)
+    assert restarted.replay() == 1
+    asyncio.run(restarted.flush())
+    assert batches == [[(42, {"cpc": "1.2"})]]
+
+
+def test_failed_flush_keeps_rows():
+    """Un échec d'écriture garde les lignes pour le flush suivant"""
+    attempts = []
+
+    def flaky_writer(rows):
+        attempts.append(len(rows))
+        if len(attempts) == 1:
+            raise RuntimeError("database is locked")
+
+    buffer = WriteBehindBuffer(flaky_writer, journal_path(), max_rows=10)
+
+    async def scenario():
+        await buffer.add(1, {"aov": "50"})
+        assert await buffer.flush() is False
+        assert await buffer.flush() is True
+
+    asyncio.run(scenario())
+    assert attempts == [1, 1]
+    assert buffer.get_metrics()['flush_failures'] == 1
+
+
+if __name__ == "__main__":
+    test_flush_every_n_rows_in_one_batch()
+    test_journal_replays_after_crash()
+    test_failed_flush_keeps_rows()
+    print("🎉 Tous les tests du write-behind sont passés !")
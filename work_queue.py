@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+File de travail partagée entre les workers (remplace le découpage statique)
+Les workers prennent les boutiques une par une ou par petits lots "loués"
+(lease). Un bail expiré (worker mort ou bloqué) remet ses boutiques dans la
+file. La file est stockée dans SQLite : elle fonctionne entre tâches asyncio
+comme entre processus. Elle peut être alimentée au fil de l'eau : tant que
+l'alimentation est ouverte, une file vide signifie "attendre", pas "terminé".
+"""
+
+import json
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = 'pending'
+STATUS_LEASED = 'leased'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_ABANDONED = 'abandoned'
+
+
+class ShopWorkQueue:
+    """File de boutiques avec baux expirables, partagée via un fichier SQLite"""
+
+    def __init__(self, path: str = "shop_queue.db", lease_seconds: float = 900, max_attempts: int = 3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS shop_queue (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    shop_id INTEGER NOT NULL UNIQUE,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    lease_owner INTEGER,
+                    lease_expires REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    finished_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_shop_queue_status ON shop_queue(status, seq)")
+            conn.execute("CREATE TABLE IF NOT EXISTS shop_queue_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    @contextmanager
+    def _transaction(self):
+        """Connexion courte et transaction exclusive par opération (sûre entre threads et processus)"""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def reset(self, shops: Iterable[Dict] = (), feeding: bool = False) -> int:
+        """
+        Remplace le contenu de la file par les boutiques du run.
+        `feeding=True` : d'autres boutiques seront ajoutées (append) jusqu'à close_feed().
+        """
+        rows = [(shop["id"], json.dumps(shop, default=str)) for shop in shops]
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM shop_queue")
+            conn.executemany("INSERT OR IGNORE INTO shop_queue (shop_id, payload) VALUES (?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO shop_queue_meta (key, value) VALUES ('feeding', ?)",
+                         ('1' if feeding else '0',))
+        logger.info(f"📥 File de travail: {len(rows)} boutiques en attente")
+        return len(rows)
+
+    def append(self, shops: Iterable[Dict]) -> int:
+        """Ajoute une page de boutiques à la file (alimentation en flux)"""
+        rows = [(shop["id"], json.dumps(shop, default=str)) for shop in shops]
+        with self._transaction() as conn:
+            conn.executemany("INSERT OR IGNORE INTO shop_queue (shop_id, payload) VALUES (?, ?)", rows)
+        return len(rows)
+
+    def withdraw(self, shop_ids: Iterable[int]) -> int:
+        """Retire de la file des boutiques pas encore louées (sélection corrigée) ; retourne le nombre retiré"""
+        shop_ids = list(shop_ids)
+        withdrawn = 0
+        with self._transaction() as conn:
+            # Par tranches : SQLite limite le nombre de paramètres par requête
+            for start in range(0, len(shop_ids), 500):
+                chunk = shop_ids[start:start + 500]
+                withdrawn += conn.execute(
+                    f"DELETE FROM shop_queue WHERE status = ? AND shop_id IN ({', '.join('?' * len(chunk))})",
+                    [STATUS_PENDING] + chunk
+                ).rowcount
+        return withdrawn
+
+    def close_feed(self):
+        """Signale qu'aucune boutique ne sera plus ajoutée"""
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO shop_queue_meta (key, value) VALUES ('feeding', '0')")
+
+    def is_feeding(self) -> bool:
+        """Vrai tant que l'alimentation de la file n'est pas terminée"""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value FROM shop_queue_meta WHERE key = 'feeding'").fetchone()
+        return bool(row) and row["value"] == '1'
+
+    def _return_leases(self, conn: sqlite3.Connection, rows, reason: str):
+        """Remet en file des boutiques louées, ou les abandonne après max_attempts (tentatives comptées au bail)"""
+        returned = 0
+        for row in rows:
+            status = STATUS_PENDING if row["attempts"] < self.max_attempts else STATUS_ABANDONED
+            conn.execute(
+                "UPDATE shop_queue SET status = ?, lease_owner = NULL, lease_expires = NULL WHERE shop_id = ?",
+                (status, row["shop_id"])
+            )
+            if status == STATUS_PENDING:
+                returned += 1
+            logger.warning(f"⏰ File de travail: {reason} boutique {row['shop_id']} (worker {row['lease_owner']}) -> {status}")
+        return returned
+
+    def _requeue_expired(self, conn: sqlite3.Connection, now: float):
+        """Remet en file les baux expirés (ou abandonne après max_attempts)"""
+        expired = conn.execute(
+            "SELECT shop_id, lease_owner, attempts FROM shop_queue WHERE status = ? AND lease_expires < ?",
+            (STATUS_LEASED, now)
+        ).fetchall()
+        self._return_leases(conn, expired, "bail expiré")
+
+    def lease(self, worker_id: int, batch_size: int = 1) -> List[Dict]:
+        """Loue jusqu'à `batch_size` boutiques pour ce worker ([] si la file est vide)"""
+        now = time.time()
+        with self._transaction() as conn:
+            self._requeue_expired(conn, now)
+            rows = conn.execute(
+                "SELECT shop_id, payload FROM shop_queue WHERE status = ? ORDER BY seq LIMIT ?",
+                (STATUS_PENDING, batch_size)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE shop_queue SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE shop_id = ?",
+                [(STATUS_LEASED, worker_id, now + self.lease_seconds, row["shop_id"]) for row in rows]
+            )
+        return [json.loads(row["payload"]) for row in rows]
+
+    def renew(self, worker_id: int, shop_ids: Iterable[int]):
+        """Prolonge le bail des boutiques encore à traiter dans le lot"""
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE shop_queue SET lease_expires = ? WHERE shop_id = ? AND lease_owner = ? AND status = ?",
+                [(time.time() + self.lease_seconds, shop_id, worker_id, STATUS_LEASED) for shop_id in shop_ids]
+            )
+
+    def complete(self, worker_id: int, shop_id: int, success: bool):
+        """Marque une boutique louée comme terminée"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE shop_queue SET status = ?, lease_owner = NULL, lease_expires = NULL, finished_at = ? "
+                "WHERE shop_id = ? AND lease_owner = ?",
+                (STATUS_DONE if success else STATUS_FAILED, time.time(), shop_id, worker_id)
+            )
+
+    def release(self, worker_id: int) -> int:
+        """
+        Rend immédiatement à la file les boutiques encore louées par ce worker
+        (même règle que l'expiration : abandon après max_attempts). Retourne le nombre remis en file.
+        """
+        with self._transaction() as conn:
+            leased = conn.execute(
+                "SELECT shop_id, lease_owner, attempts FROM shop_queue WHERE lease_owner = ? AND status = ?",
+                (worker_id, STATUS_LEASED)
+            ).fetchall()
+            return self._return_leases(conn, leased, "bail rendu")
+
+    def stats(self) -> Dict[str, int]:
+        """Nombre de boutiques par statut (+ total)"""
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM shop_queue GROUP BY status").fetchall()
+        counts = {STATUS_PENDING: 0, STATUS_LEASED: 0, STATUS_DONE: 0, STATUS_FAILED: 0, STATUS_ABANDONED: 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        counts['total'] = sum(counts.values())
+        return counts
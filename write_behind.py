@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Tampon d'écriture différée (write-behind) pour les analytics des boutiques
+Les lignes sont accumulées puis écrites par lot tous les N lignes ou toutes les
+T secondes, hors de la boucle asyncio. Chaque ligne est d'abord ajoutée à un
+journal JSONL (fsync) : après un arrêt brutal, les lignes non écrites sont
+rejouées au démarrage suivant.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# writer(rows) écrit [(shop_id, analytics_data), ...] en une fois (appelé dans un thread)
+Writer = Callable[[List[Tuple[int, Dict]]], None]
+
+
+class WriteBehindBuffer:
+    """Tampon asynchrone avec journal disque et métrique de latence de flush"""
+
+    def __init__(self, writer: Writer, journal_path: str, max_rows: int = 20, max_delay: float = 5.0):
+        self.writer = writer
+        self.journal_path = journal_path
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self._rows: Dict[int, Dict] = {}
+        self._oldest_at = None
+        self._flush_lock = asyncio.Lock()
+        self._journal_lock = asyncio.Lock()
+        self._timer_task = None
+        self._flush_latencies = deque(maxlen=1000)
+        self.stats = {'rows_added': 0, 'rows_flushed': 0, 'flushes': 0, 'flush_failures': 0, 'replayed': 0}
+
+    def _append_journal(self, shop_id: int, data: Dict):
+        """Ajoute une ligne au journal et force l'écriture disque"""
+        with open(self.journal_path, 'a') as f:
+            f.write(json.dumps({'shop_id': shop_id, 'data': data}, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rewrite_journal(self):
+        """Réécrit le journal avec les seules lignes encore en attente (remplacement atomique)"""
+        tmp_path = f"{self.journal_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            for shop_id, data in self._rows.items():
+                f.write(json.dumps({'shop_id': shop_id, 'data': data}, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def replay(self) -> int:
+        """Recharge les lignes d'un journal laissé par un arrêt brutal"""
+        if not os.path.exists(self.journal_path):
+            return 0
+        replayed = 0
+        with open(self.journal_path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # dernière ligne tronquée par le crash
+                self._rows[entry['shop_id']] = entry['data']
+                replayed += 1
+        if replayed:
+            self._oldest_at = time.monotonic()
+            self.stats['replayed'] += replayed
+            logger.info(f"♻️ Write-behind: {replayed} lignes rejouées depuis {self.journal_path}")
+        return replayed
+
+    def start(self):
+        """Démarre le flush périodique (toutes les max_delay secondes)"""
+        if self._timer_task is None:
+            self._timer_task = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        """Flush des lignes plus anciennes que max_delay"""
+        while True:
+            await asyncio.sleep(self.max_delay)
+            if self._rows and time.monotonic() - self._oldest_at >= self.max_delay:
+                await self.flush()
+
+    async def add(self, shop_id: int, data: Dict):
+        """Ajoute (ou remplace) les analytics d'une boutique ; flush si le lot est plein"""
+        async with self._journal_lock:
+            await asyncio.to_thread(self._append_journal, shop_id, data)
+            if not self._rows:
+                self._oldest_at = time.monotonic()
+            self._rows[shop_id] = data
+        self.stats['rows_added'] += 1
+        if len(self._rows) >= self.max_rows:
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """Écrit toutes les lignes en attente en un lot"""
+        async with self._flush_lock:
+            if not self._rows:
+                return True
+            batch = list(self._rows.items())
+            self._rows = {}
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(self.writer, batch)
+            except Exception as e:
+                # Les lignes restent en attente (et dans le journal) pour le prochain flush
+                for shop_id, data in batch:
+                    self._rows.setdefault(shop_id, data)
+                self.stats['flush_failures'] += 1
+                logger.error(f"❌ Write-behind: échec du flush de {len(batch)} lignes: {e}")
+                return False
+
+            latency = time.perf_counter() - start
+            self._flush_latencies.append(latency)
+            self.stats['flushes'] += 1
+            self.stats['rows_flushed'] += len(batch)
+            if self._rows:
+                self._oldest_at = time.monotonic()
+            async with self._journal_lock:
+                await asyncio.to_thread(self._rewrite_journal)
+            logger.info(f"💾 Write-behind: {len(batch)} lignes écrites en {latency * 1000:.0f} ms")
+            return True
+
+    async def close(self):
+        """Arrête le flush périodique et écrit les dernières lignes"""
+        if self._timer_task is not None:
+            self._timer_task.cancel()
+            await asyncio.gather(self._timer_task, return_exceptions=True)
+            self._timer_task = None
+        await self.flush()
+
+    def get_metrics(self) -> Dict[str, float]:
+        """Compteurs et latence de flush (moyenne, p95, max)"""
+        latencies = sorted(self._flush_latencies)
+        metrics = dict(self.stats)
+        metrics['pending'] = len(self._rows)
+        if latencies:
+            metrics['flush_latency_avg'] = sum(latencies) / len(latencies)
+            metrics['flush_latency_p95'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            metrics['flush_latency_max'] = latencies[-1]
+        else:
+            metrics['flush_latency_avg'] = metrics['flush_latency_p95'] = metrics['flush_latency_max'] = 0.0
+        return metrics